@@ -1,5 +1,40 @@
 import os
 import sys
 
+import pytest
+
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "src")))
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark", action="store_true", default=False, help="run the benchmark tests"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    # Wall-clock assertions depend on the machine, so they stay out of the default suite
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmark; run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(autouse=True)
+def reset_provider_state():
+    # Circuit breakers, rate limiters and metrics are process-wide, so state from one test must
+    # not leak
+    from src.failover import reset_circuit_breakers
+    from src.metrics import reset_metrics
+    from src.rate_limit import reset_rate_limiters
+
+    reset_circuit_breakers()
+    reset_rate_limiters()
+    reset_metrics()
+    yield
+    reset_circuit_breakers()
+    reset_rate_limiters()
+    reset_metrics()
@@ -30,6 +30,10 @@ setup(
         "typer==0.12.3",
         "rich==13.7.1",
     ],
+    extras_require={
+        "server": ["fastapi==0.110.3", "uvicorn==0.30.1"],
+        "fast": ["orjson>=3.8"],
+    },
     entry_points={
         "console_scripts": [
             "smart-assistants=src.main:app",
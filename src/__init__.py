@@ -1,15 +1,25 @@
-from .assistants import create_assistant, get_full_response
+from .assistants import (
+    create_assistant,
+    get_assistant,
+    get_full_response,
+    get_full_response_async,
+    stream_full_response,
+)
 from .config import settings
-from .orchestrator import Orchestrator, Task, TaskExchange
+from .orchestrator import Orchestrator, Task, TaskExchange, WorkflowEvent
 from .workers import PlanResponse, SAAsWorkers, WorkerTask
 
 __all__ = [
     "get_full_response",
+    "get_full_response_async",
+    "stream_full_response",
     "create_assistant",
+    "get_assistant",
     "settings",
     "Orchestrator",
     "Task",
     "TaskExchange",
+    "WorkflowEvent",
     "SAAsWorkers",
     "WorkerTask",
     "PlanResponse",
@@ -1,33 +1,88 @@
+import asyncio
+import contextvars
 import os
+import threading
 import time
-from typing import Any, List, Optional
+from contextlib import contextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
-import vertexai
-from dotenv import load_dotenv
 from phi.assistant import Assistant
-from phi.llm.anthropic import Claude
-from phi.llm.gemini import Gemini
-from phi.llm.openai import OpenAIChat
-from phi.tools.tavily import TavilyTools
+from phi.llm.base import LLM
+from phi.memory.assistant import AssistantMemory
 
+from src.cache import get_response_cache, make_cache_key
 from src.config import settings
-from src.utils.exceptions import AssistantError
+from src.deadline import call_timeout, expired
+from src.failover import CircuitBreaker, fallback_models, get_circuit_breaker
+from src.metrics import observe_llm_call, record_cache_lookup, record_retry, record_tokens
+from src.rate_limit import ProviderLimiter, provider_slot
+from src.retry import RetryPolicy, is_retryable, next_delay, retry_policy
+from src.token_budget import estimate_tokens, fit_prompt, output_cap
+from src.utils.exceptions import AssistantError, CircuitOpenError
 from src.utils.logging import setup_logging
 
-load_dotenv()
+if TYPE_CHECKING:
+    from phi.tools.tavily import TavilyTools
+
 logger = setup_logging()
 
 output_dir = os.path.join(os.getcwd(), "output")
-os.makedirs(output_dir, exist_ok=True)
 
-try:
-    vertexai.init(project=settings.PROJECT_ID, location=settings.LOCATION)
-except Exception as e:
-    logger.error(f"Error initializing VertexAI: {str(e)}")
+# Directory the file tools of the current run work in; tool calls made in worker threads see it
+# because asyncio.to_thread copies the context. Falls back to ``output_dir`` outside a run.
+_workspace: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "saa_workspace", default=None
+)
+
+
+def workspace_dir() -> str:
+    return _workspace.get() or output_dir
+
+
+@contextmanager
+def workspace_scope(path: str) -> Iterator[str]:
+    """Point the file tools at ``path`` for the code run inside the block."""
+    token = _workspace.set(path)
+    try:
+        yield path
+    finally:
+        _workspace.reset(token)
+
+
+_vertexai_initialized = False
+_vertexai_lock = threading.Lock()
+
+
+def init_vertexai():
+    """Initialize Vertex AI once per process, the first time a Gemini model is used."""
+    global _vertexai_initialized
+    with _vertexai_lock:
+        if _vertexai_initialized:
+            return
+        import vertexai
+
+        try:
+            vertexai.init(project=settings.PROJECT_ID, location=settings.LOCATION)
+        except Exception as e:
+            logger.error(f"Error initializing VertexAI: {str(e)}")
+        _vertexai_initialized = True
 
 
 def create_file(file_path: str, content: str):
-    full_path = os.path.join(output_dir, file_path)
+    full_path = os.path.join(workspace_dir(), file_path)
     os.makedirs(os.path.dirname(full_path), exist_ok=True)
     with open(full_path, "w") as f:
         f.write(content)
@@ -35,7 +90,7 @@ def create_file(file_path: str, content: str):
 
 
 def read_file(file_path: str):
-    full_path = os.path.join(output_dir, file_path)
+    full_path = os.path.join(workspace_dir(), file_path)
     if os.path.exists(full_path):
         with open(full_path, "r") as f:
             return f.read()
@@ -43,32 +98,174 @@ def read_file(file_path: str):
 
 
 def list_files(directory: str = ""):
-    full_path = os.path.join(output_dir, directory)
+    full_path = os.path.join(workspace_dir(), directory)
     if os.path.exists(full_path):
         files = os.listdir(full_path)
         return ", ".join(files) if files else "No files found"
     return f"Directory not found: {full_path}"
 
 
+class AssistantPool:
+    """Process-wide pool of assistants and the provider clients behind them.
+
+    phidata builds a new HTTP client for every Claude and OpenAI call unless one is passed in,
+    so clients are created once per provider and API key and shared by every LLM. Assistants
+    are keyed by name, model, description and tools and built on first use; callers get a
+    ``run_copy`` of the pooled one, so no state is shared between runs.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, Optional[str]], Any] = {}
+        self._tools: Dict[Optional[str], "TavilyTools"] = {}
+        self._assistants: Dict[Hashable, Assistant] = {}
+        self._lock = threading.RLock()
+
+    def client(
+        self, provider: str, api_key: Optional[str], factory: Callable[..., Any]
+    ) -> Optional[Any]:
+        # Without a key the LLM builds its own client and reports the missing key when called
+        if not api_key:
+            return None
+        with self._lock:
+            key = (provider, api_key)
+            if key not in self._clients:
+                self._clients[key] = factory(api_key=api_key)
+            return self._clients[key]
+
+    def create_llm(self, model: str) -> LLM:
+        # Provider SDKs are imported here so only the providers actually used get loaded
+        if model.startswith("gemini"):
+            return self._gemini_llm(model)
+        elif model.startswith("claude"):
+            return self._claude_llm(model)
+        elif model.startswith("gpt"):
+            return self._openai_llm(model)
+        raise ValueError(f"Unsupported model: {model}")
+
+    def _gemini_llm(self, model: str) -> LLM:
+        from src.llm.gemini import AsyncGemini
+
+        init_vertexai()
+        # The Vertex AI SDK already shares one channel per process
+        return AsyncGemini(model=model)
+
+    def _claude_llm(self, model: str) -> LLM:
+        from anthropic import Anthropic, AsyncAnthropic
+
+        from src.llm.claude import AsyncClaude
+
+        api_key = settings.ANTHROPIC_API_KEY
+        return AsyncClaude(
+            model=model,
+            api_key=api_key,
+            anthropic_client=self.client("anthropic", api_key, Anthropic),
+            async_anthropic_client=self.client("anthropic-async", api_key, AsyncAnthropic),
+        )
+
+    def _openai_llm(self, model: str) -> LLM:
+        from openai import AsyncOpenAI, OpenAI
+
+        from src.llm.openai import RateLimitedOpenAIChat
+
+        api_key = settings.OPENAI_API_KEY
+        return RateLimitedOpenAIChat(
+            model=model,
+            api_key=api_key,
+            client=self.client("openai", api_key, OpenAI),
+            async_client=self.client("openai-async", api_key, AsyncOpenAI),
+        )
+
+    def search_tools(self) -> "TavilyTools":
+        from phi.tools.tavily import TavilyTools
+
+        with self._lock:
+            api_key = settings.TAVILY_API_KEY
+            if api_key not in self._tools:
+                self._tools[api_key] = TavilyTools(api_key=api_key)
+            return self._tools[api_key]
+
+    def get(
+        self,
+        name: str,
+        model: str,
+        description: str = "You are a helpful assistant.",
+        additional_tools: Optional[List] = None,
+    ) -> Assistant:
+        key = (name, model, description, tuple(id(tool) for tool in additional_tools or ()))
+        with self._lock:
+            if key not in self._assistants:
+                self._assistants[key] = create_assistant(
+                    name, model, description, additional_tools=additional_tools, pool=self
+                )
+            template = self._assistants[key]
+        return run_copy(template)
+
+    def with_model(self, assistant: Assistant, model: str) -> Assistant:
+        """Copy of ``assistant`` backed by ``model``, used when failing over to that model."""
+        key = (
+            "failover",
+            assistant.name,
+            model,
+            assistant.description,
+            tuple(_tool_name(tool) for tool in assistant.tools or ()),
+        )
+        with self._lock:
+            if key not in self._assistants:
+                try:
+                    llm = self.create_llm(model)
+                except Exception as e:
+                    raise AssistantError(f"Error creating fallback model {model}: {str(e)}")
+                self._assistants[key] = assistant.model_copy(update={"llm": llm})
+            template = self._assistants[key]
+        return run_copy(template)
+
+    def clear(self):
+        with self._lock:
+            self._assistants.clear()
+            self._tools.clear()
+            self._clients.clear()
+
+
+assistant_pool = AssistantPool()
+
+
+def get_assistant(
+    name: str,
+    model: str,
+    description: str = "You are a helpful assistant.",
+    additional_tools: Optional[List] = None,
+) -> Assistant:
+    """Return a copy of the pooled assistant for these arguments, creating it on first use."""
+    return assistant_pool.get(name, model, description, additional_tools)
+
+
+def run_copy(assistant: Assistant) -> Assistant:
+    """Copy of a pooled ``assistant`` for one run, sharing its provider clients and tools.
+
+    The copy has its own LLM (so per-run settings such as an output cap never reach the pool),
+    empty memory and fresh metrics: phidata appends every message and response time to these,
+    which would otherwise grow without bound and carry prompts from one run into the next.
+    """
+    update: Dict[str, Any] = {"memory": AssistantMemory(), "output": None}
+    if assistant.llm is not None:
+        update["llm"] = assistant.llm.model_copy(update={"metrics": {}})
+    return assistant.model_copy(update=update)
+
+
 def create_assistant(
     name: str,
     model: str,
     description: str = "You are a helpful assistant.",
     additional_tools: Optional[List] = None,
+    pool: Optional[AssistantPool] = None,
     **kwargs: Any,
 ) -> Assistant:
+    pool = pool or assistant_pool
     try:
-        if model.startswith("gemini"):
-            llm = Gemini(model=model)
-        elif model.startswith("claude"):
-            llm = Claude(model=model, api_key=settings.ANTHROPIC_API_KEY)
-        elif model.startswith("gpt"):
-            llm = OpenAIChat(model=model, api_key=settings.OPENAI_API_KEY)
-        else:
-            raise ValueError(f"Unsupported model: {model}")
+        llm = pool.create_llm(model)
 
         tools = [
-            TavilyTools(api_key=settings.TAVILY_API_KEY),
+            pool.search_tools(),
             create_file,
             read_file,
             list_files,
@@ -92,23 +289,352 @@ def create_assistant(
         raise AssistantError(f"Error creating assistant {name} with model {model}: {str(e)}")
 
 
-def get_full_response(assistant: Assistant, prompt: str, max_retries=3, delay=2) -> str:
-    for attempt in range(max_retries):
+def _response_to_text(response: Any) -> str:
+    if isinstance(response, str):
+        return response
+    elif isinstance(response, list):
+        return " ".join(map(str, response))
+    else:
+        return str(response)
+
+
+def has_native_async(assistant: Assistant) -> bool:
+    llm = getattr(assistant, "llm", None)
+    return isinstance(llm, LLM) and type(llm).aresponse is not LLM.aresponse
+
+
+def _tool_name(tool: Any) -> str:
+    if isinstance(tool, dict):
+        return str(tool.get("name", tool))
+    return getattr(tool, "name", None) or getattr(tool, "__name__", type(tool).__name__)
+
+
+def response_cache_key(assistant: Assistant, prompt: str) -> str:
+    return make_cache_key(
+        model=str(getattr(assistant.llm, "model", "")),
+        description=str(assistant.description or ""),
+        tools=[_tool_name(tool) for tool in assistant.tools or []],
+        prompt=prompt,
+        # A capped response is cut short, so it must not answer an uncapped call
+        max_tokens=output_cap(assistant),
+    )
+
+
+def has_native_async_stream(assistant: Assistant) -> bool:
+    llm = getattr(assistant, "llm", None)
+    return isinstance(llm, LLM) and type(llm).aresponse_stream is not LLM.aresponse_stream
+
+
+async def _iterate_in_thread(run: Callable[[], Union[Iterator[str], str]]) -> AsyncIterator[str]:
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    def produce():
         try:
-            response = assistant.run(prompt, stream=False)
-            if isinstance(response, str):
-                return response
-            elif isinstance(response, list):
-                return " ".join(map(str, response))
-            else:
-                return str(response)
+            response = run()
+            for chunk in [response] if isinstance(response, str) else response:
+                loop.call_soon_threadsafe(queue.put_nowait, chunk)
         except Exception as e:
-            logger.error(f"Attempt {attempt + 1} failed: {str(e)}")
-            if attempt < max_retries - 1:
-                time.sleep(delay)
-            else:
-                raise AssistantError(
-                    f"Max retries reached. Could not get a response from the assistant: {str(e)}"
-                )
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    producer = asyncio.ensure_future(asyncio.to_thread(produce))
+    while True:
+        item = await queue.get()
+        if item is done:
+            break
+        if isinstance(item, Exception):
+            raise item
+        yield item
+    await producer
+
+
+def _call_policy(
+    assistant: Assistant,
+    stage: Optional[str],
+    max_retries: Optional[int],
+    delay: Optional[float],
+) -> RetryPolicy:
+    policy = retry_policy(stage, getattr(assistant.llm, "model", None))
+    overrides = {}
+    if max_retries is not None:
+        overrides["max_attempts"] = max_retries
+    if delay is not None:
+        overrides["base_delay"] = delay
+    return policy.model_copy(update=overrides) if overrides else policy
+
+
+def _failover_chain(
+    assistant: Assistant, stage: Optional[str]
+) -> Iterator[Tuple[Assistant, Optional[CircuitBreaker]]]:
+    """Yield the assistant, then copies on the stage's fallback models, with their breakers."""
+    model = getattr(assistant.llm, "model", None)
+    if not isinstance(model, str):
+        yield assistant, None
+        return
+    yield assistant, get_circuit_breaker(model)
+    for fallback in fallback_models(stage, model):
+        if expired():
+            return
+        try:
+            candidate = assistant_pool.with_model(assistant, fallback)
+        except AssistantError as e:
+            logger.error(str(e))
+            continue
+        logger.warning(f"Failing over from {model} to {fallback}")
+        yield candidate, get_circuit_breaker(fallback)
+
+
+@contextmanager
+def _admitted(breaker: Optional[CircuitBreaker]) -> Iterator[None]:
+    """Admit a call through ``breaker``; a half-open probe is released on every exit path.
+
+    A probe that recorded its outcome is already settled, so releasing it is a no-op; one that
+    was cancelled or never sent (deadline spent) would otherwise keep the circuit half-open.
+    """
+    if breaker is None:
+        yield
+        return
+    probe = breaker.admit()
+    if probe is None:
+        # CircuitOpenError is not retryable, so an open circuit moves on to the next model at once
+        raise CircuitOpenError(f"Circuit for {breaker.name} is open")
+    try:
+        yield
+    finally:
+        if probe:
+            breaker.release(probe)
+
+
+def _record(breaker: Optional[CircuitBreaker], success: bool, started: float):
+    if breaker is not None:
+        breaker.record(success, time.monotonic() - started)
+
+
+def _is_outage(error: Exception) -> bool:
+    """Whether ``error`` says the model is unhealthy rather than the request or the run.
+
+    A bad request would fail on every model, and a timeout cut short by the run's deadline
+    says nothing about the model, so neither counts against its circuit.
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)) and expired():
+        return False
+    return is_retryable(error)
+
+
+def _timeout(stage: Optional[str], model: Any) -> Optional[float]:
+    timeout = call_timeout(stage)
+    if timeout is not None and timeout <= 0:
+        raise asyncio.TimeoutError(f"Deadline exceeded before calling {model}")
+    return timeout
+
+
+async def _call_with_timeout(awaitable: Awaitable[Any], timeout: Optional[float], model: Any):
+    # Cancelling the awaitable aborts the provider's in-flight HTTP request
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise asyncio.TimeoutError(f"{model} did not respond within {timeout:.1f}s")
+
+
+async def _stream_with_timeout(
+    stream: AsyncIterator[Any], timeout: Optional[float], model: Any
+) -> AsyncIterator[Any]:
+    """Iterate ``stream`` until ``timeout`` seconds have passed for the whole response."""
+    if timeout is None:
+        async for chunk in stream:
+            yield chunk
+        return
+    call_deadline = time.monotonic() + timeout
+    iterator = stream.__aiter__()
+    while True:
+        left = max(call_deadline - time.monotonic(), 0.0)
+        try:
+            chunk = await asyncio.wait_for(iterator.__anext__(), left)
+        except StopAsyncIteration:
+            return
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError(f"{model} did not finish streaming within {timeout:.1f}s")
+        yield chunk
+
+
+def _charge_response(
+    limiter: Optional[ProviderLimiter],
+    assistant: Assistant,
+    stage: Optional[str],
+    prompt: str,
+    response: str,
+):
+    model = getattr(assistant.llm, "model", None)
+    output_tokens = estimate_tokens(response, model)
+    record_tokens(stage, model, estimate_tokens(prompt, model), output_tokens)
+    # Output tokens count against the provider's tokens-per-minute quota too
+    if limiter is not None:
+        limiter.charge(output_tokens)
+
+
+def _assistant_error(error: Exception) -> AssistantError:
+    if is_retryable(error):
+        return AssistantError(
+            f"Max retries reached. Could not get a response from the assistant: {str(error)}"
+        )
+    return AssistantError(f"Could not get a response from the assistant: {str(error)}")
+
+
+# A call adapter sends ``prompt`` to ``assistant`` within ``timeout`` seconds and yields the
+# response text; a non-streamed call yields it as a single chunk
+CallAdapter = Callable[[Assistant, str, Optional[float]], AsyncIterator[str]]
+
+
+async def _request(
+    assistant: Assistant, prompt: str, timeout: Optional[float]
+) -> AsyncIterator[str]:
+    # LLMs without an async client run in a thread so the loop is never blocked; on timeout such
+    # a thread is abandoned rather than interrupted
+    model = getattr(assistant.llm, "model", None)
+    if has_native_async(assistant):
+        request = assistant.arun(prompt, stream=False)
+    else:
+        request = asyncio.to_thread(assistant.run, prompt, stream=False)
+    yield _response_to_text(await _call_with_timeout(request, timeout, model))
+
+
+async def _request_sync(
+    assistant: Assistant, prompt: str, timeout: Optional[float]
+) -> AsyncIterator[str]:
+    # The pooled async clients belong to the callers' event loops, so a call made from sync code
+    # always goes through phidata's sync client
+    model = getattr(assistant.llm, "model", None)
+    request = asyncio.to_thread(assistant.run, prompt, stream=False)
+    yield _response_to_text(await _call_with_timeout(request, timeout, model))
+
+
+async def _request_stream(
+    assistant: Assistant, prompt: str, timeout: Optional[float]
+) -> AsyncIterator[str]:
+    model = getattr(assistant.llm, "model", None)
+    if has_native_async_stream(assistant):
+        stream = await _call_with_timeout(assistant.arun(prompt, stream=True), timeout, model)
+    else:
+        stream = _iterate_in_thread(lambda: assistant.run(prompt, stream=True))
+    async for chunk in _stream_with_timeout(stream, timeout, model):
+        yield _response_to_text(chunk)
+
+
+async def _respond(
+    assistant: Assistant,
+    prompt: str,
+    call: CallAdapter,
+    max_retries: Optional[int],
+    delay: Optional[float],
+    stage: Optional[str],
+) -> AsyncIterator[str]:
+    """Answer ``prompt`` from the cache, or by walking the failover chain with ``call``.
+
+    Retrying or failing over is only safe until the first chunk has reached the caller.
+    """
+    prompt = fit_prompt(prompt, stage, getattr(assistant.llm, "model", None))
+    cache = get_response_cache()
+    cache_key = response_cache_key(assistant, prompt) if cache else None
+    if cache:
+        cached = await cache.aget(cache_key)
+        record_cache_lookup(stage, cached is not None)
+        if cached is not None:
+            yield cached
+            return
+
+    error: Optional[Exception] = None
+    for candidate, breaker in _failover_chain(assistant, stage):
+        model = getattr(candidate.llm, "model", None)
+        policy = _call_policy(candidate, stage, max_retries, delay)
+        candidate_prompt = fit_prompt(prompt, stage, model)
+        started = time.monotonic()
+        for attempt in range(policy.max_attempts):
+            chunks: List[str] = []
+            attempt_started = time.monotonic()
+            try:
+                with _admitted(breaker):
+                    _timeout(stage, model)
+                    # The bulkhead slot is held until the whole response has been consumed
+                    async with provider_slot(model) as limiter:
+                        timeout = _timeout(stage, model)
+                        attempt_started = time.monotonic()
+                        try:
+                            with observe_llm_call(stage, model):
+                                async for chunk in call(candidate, candidate_prompt, timeout):
+                                    chunks.append(chunk)
+                                    yield chunk
+                        except Exception as e:
+                            if _is_outage(e):
+                                _record(breaker, False, attempt_started)
+                            raise
+                        _record(breaker, True, attempt_started)
+            except Exception as e:
+                logger.error(f"Attempt {attempt + 1} failed: {str(e)}")
+                error = e
+                if chunks:
+                    raise AssistantError(
+                        f"Could not stream a response from the assistant: {str(e)}"
+                    )
+                wait = next_delay(policy, e, attempt, started)
+                if wait is None:
+                    break
+                record_retry(stage, model)
+                await asyncio.sleep(wait)
+                continue
+            response = "".join(chunks)
+            _charge_response(limiter, candidate, stage, candidate_prompt, response)
+            if cache:
+                await cache.aset(cache_key, response)
+            return
+        # Only an open circuit or an outage moves on to the next model
+        if not isinstance(error, CircuitOpenError) and not is_retryable(error):
+            break
+    raise _assistant_error(error)
+
+
+async def stream_full_response(
+    assistant: Assistant,
+    prompt: str,
+    max_retries: Optional[int] = None,
+    delay: Optional[float] = None,
+    stage: Optional[str] = None,
+) -> AsyncIterator[str]:
+    async for chunk in _respond(assistant, prompt, _request_stream, max_retries, delay, stage):
+        yield chunk
+
+
+async def _collect(chunks: AsyncIterator[str]) -> str:
+    return "".join([chunk async for chunk in chunks])
+
+
+def get_full_response(
+    assistant: Assistant,
+    prompt: str,
+    max_retries: Optional[int] = None,
+    delay: Optional[float] = None,
+    stage: Optional[str] = None,
+) -> str:
+    """Blocking ``get_full_response_async`` for sync callers; must not be called on a running loop."""
+    # A private loop rather than asyncio.run: closing it does not wait for a call thread that
+    # was abandoned on timeout
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(
+            _collect(_respond(assistant, prompt, _request_sync, max_retries, delay, stage))
+        )
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
 
-    raise AssistantError("Max retries reached. Could not get a response from the assistant.")
+async def get_full_response_async(
+    assistant: Assistant,
+    prompt: str,
+    max_retries: Optional[int] = None,
+    delay: Optional[float] = None,
+    stage: Optional[str] = None,
+) -> str:
+    return await _collect(_respond(assistant, prompt, _request, max_retries, delay, stage))
@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from pydantic import BaseModel, ValidationError
+
+from src.orchestrator import Orchestrator, OrchestratorSettings
+from src.utils.exceptions import ConfigurationError
+from src.utils.logging import setup_logging
+
+logger = setup_logging()
+
+
+class BatchItem(BaseModel):
+    id: str
+    objective: str
+    plugin: Optional[str] = None
+    main_model: Optional[str] = None
+    sub_model: Optional[str] = None
+    refiner_model: Optional[str] = None
+
+
+class BatchResult(BaseModel):
+    id: str
+    objective: str
+    plugin: Optional[str] = None
+    status: str
+    output: Optional[str] = None
+    error: Optional[str] = None
+    duration: float
+
+
+def _default_id(record: Dict[str, Any]) -> str:
+    payload = json.dumps([record.get("objective"), record.get("plugin")])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def read_batch_items(lines: Iterable[str]) -> List[BatchItem]:
+    """Parse and validate every JSONL objective; items without an ``id`` get one derived from
+    their content.
+
+    The whole input is checked before any workflow starts, and every invalid line is reported
+    in one ``ConfigurationError``.
+    """
+    items: List[BatchItem] = []
+    errors: List[str] = []
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"objective": record}
+            record.setdefault("id", _default_id(record))
+            items.append(BatchItem(**{**record, "id": str(record["id"])}))
+        except (json.JSONDecodeError, AttributeError, TypeError, ValidationError) as e:
+            errors.append(f"Invalid batch item on line {line_number}: {str(e)}")
+    if errors:
+        raise ConfigurationError("\n".join(errors))
+    return items
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """IDs whose latest result in ``output_path`` succeeded; a truncated final line is ignored.
+
+    Failed items are retried on the next run and their new result is appended, so only the last
+    line of each ID counts.
+    """
+    if not os.path.exists(output_path):
+        return set()
+    statuses: Dict[str, Any] = {}
+    with open(output_path) as output_file:
+        for line in output_file:
+            try:
+                record = json.loads(line)
+                statuses[str(record["id"])] = record.get("status")
+            except (json.JSONDecodeError, AttributeError, KeyError, TypeError):
+                logger.warning(f"Skipping unreadable line in {output_path}")
+    return {item_id for item_id, status in statuses.items() if status == "ok"}
+
+
+def _item_output_dir(output_root: str, item_id: str) -> str:
+    return os.path.join(output_root, re.sub(r"[^\w.-]", "_", item_id))
+
+
+async def run_item(
+    item: BatchItem, base_settings: OrchestratorSettings, output_root: str
+) -> BatchResult:
+    overrides = {
+        "main_assistant_model": item.main_model,
+        "sub_assistant_model": item.sub_model,
+        "refiner_assistant_model": item.refiner_model,
+    }
+    item_settings = base_settings.model_copy(
+        update={key: value for key, value in overrides.items() if value is not None}
+    )
+    start = time.perf_counter()
+    try:
+        orchestrator = Orchestrator(
+            settings=item_settings, output_dir=_item_output_dir(output_root, item.id)
+        )
+        output = await orchestrator.run_workflow(item.objective, use_case=item.plugin)
+        status, error = "ok", None
+    except Exception as e:
+        logger.error(f"Batch item {item.id} failed: {str(e)}")
+        output, status, error = None, "error", str(e)
+    return BatchResult(
+        id=item.id,
+        objective=item.objective,
+        plugin=item.plugin,
+        status=status,
+        output=output,
+        error=error,
+        duration=round(time.perf_counter() - start, 3),
+    )
+
+
+async def run_batch(
+    items: Iterable[BatchItem],
+    output_file: IO[str],
+    concurrency: int,
+    base_settings: Optional[OrchestratorSettings] = None,
+    output_root: Optional[str] = None,
+    skip_ids: Optional[Set[str]] = None,
+) -> List[BatchResult]:
+    """Run ``items`` with at most ``concurrency`` workflows in flight.
+
+    Each result is appended to ``output_file`` as soon as its workflow finishes, so an
+    interrupted batch can be resumed by passing the IDs that already succeeded as ``skip_ids``.
+    """
+    if concurrency < 1:
+        raise ConfigurationError("concurrency must be at least 1")
+    base_settings = base_settings or OrchestratorSettings()
+    output_root = output_root or os.path.join(os.getcwd(), "output", "batch")
+    skip_ids = set(skip_ids or ())
+    results: List[BatchResult] = []
+
+    def pending() -> Iterator[BatchItem]:
+        for item in items:
+            if item.id in skip_ids:
+                logger.info(f"Skipping batch item {item.id}: already in the output")
+                continue
+            # Duplicate IDs in the input would otherwise be written twice
+            skip_ids.add(item.id)
+            yield item
+
+    queue = pending()
+
+    async def consume():
+        for item in queue:
+            result = await run_item(item, base_settings, output_root)
+            output_file.write(result.model_dump_json() + "\n")
+            output_file.flush()
+            results.append(result)
+
+    await asyncio.gather(*(consume() for _ in range(concurrency)))
+    return results
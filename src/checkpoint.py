@@ -0,0 +1,150 @@
+import os
+import re
+import uuid
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from src.serialization import JsonlWriter, loads
+from src.utils.exceptions import WorkflowError
+from src.utils.logging import setup_logging
+from src.workers import PlanResponse, WorkerTask
+
+logger = setup_logging()
+
+
+# Run IDs name files and directories, so they must not contain separators or start with a dot
+RUN_ID_PATTERN = r"^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,127}$"
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def validate_run_id(run_id: str) -> str:
+    """Return ``run_id`` if it is safe to use in paths; raises ``WorkflowError`` otherwise."""
+    if not re.match(RUN_ID_PATTERN, run_id):
+        raise WorkflowError(
+            f"Invalid run ID {run_id!r}: use letters, digits, '_', '-' and '.' (not first)"
+        )
+    return run_id
+
+
+def checkpoint_path(directory: str, run_id: str) -> str:
+    return os.path.join(directory, re.sub(r"[^\w.-]", "_", run_id) + ".jsonl")
+
+
+class RunCheckpoint:
+    """Append-only JSONL record of one workflow run, written as each stage completes.
+
+    Records are ``run`` (objective, plugin and settings), ``plan``, one ``task`` per finished
+    worker task (by its index in the plan) and ``final``. Reopening the file of an interrupted
+    run restores them, so a resumed run skips everything that already completed.
+
+    Task records always follow the plan their indices refer to: results of tasks dispatched
+    while the plan was still streaming are held until ``save_plan``. Failed tasks are not
+    recorded, so a resumed run retries them. Records are written by a background
+    ``JsonlWriter``; ``close`` waits for them.
+    """
+
+    def __init__(self, directory: str, run_id: str):
+        self.run_id = run_id
+        self.path = checkpoint_path(directory, run_id)
+        self.objective: Optional[str] = None
+        self.use_case: Optional[str] = None
+        self.settings: Dict[str, Any] = {}
+        self.plan: Optional[PlanResponse] = None
+        self.results: Dict[int, str] = {}
+        self.final_output: Optional[str] = None
+        self._pending: Dict[int, str] = {}
+        self._writer = JsonlWriter(self.path, name=f"checkpoint-{os.path.basename(self.path)}")
+
+        if os.path.exists(self.path):
+            self._load()
+
+    @property
+    def exists(self) -> bool:
+        return self.objective is not None
+
+    def _load(self):
+        with open(self.path, "rb") as checkpoint_file:
+            for line in checkpoint_file:
+                try:
+                    record = loads(line)
+                    kind = record["type"]
+                    if kind == "run":
+                        self.objective = record["objective"]
+                        self.use_case = record.get("use_case")
+                        self.settings = record.get("settings", {})
+                    elif kind == "plan":
+                        self.plan = PlanResponse(**record["plan"])
+                    elif kind == "task":
+                        if self.plan is None:
+                            logger.warning(f"Skipping task record without a plan in {self.path}")
+                            continue
+                        self.results[int(record["index"])] = record["result"]
+                    elif kind == "final":
+                        self.final_output = record["output"]
+                except (KeyError, TypeError, ValueError, ValidationError):
+                    # Typically the last line of a run that died mid-write
+                    logger.warning(f"Skipping unreadable line in {self.path}")
+
+    def _append(self, record: Dict[str, Any]):
+        self._writer.append(record)
+
+    def start(self, objective: str, use_case: Optional[str], settings: Dict[str, Any]):
+        """Record a new run, or check that a resumed run has the same objective."""
+        if self.exists:
+            if objective != self.objective or use_case != self.use_case:
+                raise WorkflowError(
+                    f"Run {self.run_id} was started with a different objective or plugin"
+                )
+            return
+        self.objective, self.use_case, self.settings = objective, use_case, settings
+        self._append(
+            {"type": "run", "objective": objective, "use_case": use_case, "settings": settings}
+        )
+
+    def save_plan(self, plan: PlanResponse):
+        self.plan = plan
+        # Results are recorded separately, once they are known to belong to this plan
+        dumped = plan.model_dump(mode="json", exclude={"tasks": {"__all__": {"result", "failed"}}})
+        self._append({"type": "plan", "plan": dumped})
+        pending, self._pending = self._pending, {}
+        for index, result in pending.items():
+            self._save_result(index, result)
+
+    def save_task(self, index: int, task: WorkerTask):
+        if task.failed:
+            return
+        if self.plan is None:
+            self._pending[index] = task.result
+            return
+        self._save_result(index, task.result)
+
+    def _save_result(self, index: int, result: str):
+        self.results[index] = result
+        self._append({"type": "task", "index": index, "result": result})
+
+    def save_final(self, output: str):
+        self.final_output = output
+        self._append({"type": "final", "output": output})
+
+    def restored_tasks(self) -> List[WorkerTask]:
+        """The checkpointed plan's tasks, with the results of those that already finished."""
+        tasks = [task.model_copy() for task in (self.plan.tasks or [])] if self.plan else []
+        for index, task in enumerate(tasks):
+            task.result = self.results.get(index)
+        return tasks
+
+    def close(self):
+        """Wait for every record to be written."""
+        self._writer.close()
+
+
+def load_checkpoint(directory: str, run_id: str) -> RunCheckpoint:
+    """The checkpoint of an earlier run; raises ``WorkflowError`` if there is none."""
+    checkpoint = RunCheckpoint(directory, run_id)
+    if not checkpoint.exists:
+        raise WorkflowError(f"No checkpoint found for run {run_id} in {directory}")
+    return checkpoint
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
@@ -45,12 +45,116 @@ class Settings(BaseSettings):
     # Fallback models
     FALLBACK_MODEL_1: str = "gpt-3.5-turbo"
     FALLBACK_MODEL_2: str = "gpt-3.5-turbo"
+    # Per-stage failover chains tried after the stage's own model, e.g. {"refiner":
+    # ["claude-3-5-sonnet-20240620", "gpt-4o"]}; stages not listed use the two models above
+    FALLBACK_CHAINS: Dict[str, List[str]] = {}
+
+    # Circuit breakers per model: open when the error rate or the rate of calls slower than
+    # CIRCUIT_BREAKER_SLOW_CALL_SECONDS crosses its threshold over the last WINDOW calls, then
+    # send a single probe after COOLDOWN seconds
+    CIRCUIT_BREAKER_WINDOW: int = 20
+    CIRCUIT_BREAKER_MIN_CALLS: int = 5
+    CIRCUIT_BREAKER_ERROR_RATE: float = 0.5
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS: float = 60.0
+    CIRCUIT_BREAKER_SLOW_CALL_RATE: float = 0.5
+    CIRCUIT_BREAKER_COOLDOWN: float = 30.0
 
     # Tools
     TAVILY_API_KEY: Optional[str] = os.getenv("TAVILY_API_KEY")
 
     # New setting for SAAsWorkers
     NUM_WORKERS: int = 3
+    # Tasks each worker assistant may run at the same time
+    WORKER_CONCURRENCY: int = 1
+    # Upper bound on in-flight tasks per run (defaults to NUM_WORKERS * WORKER_CONCURRENCY)
+    MAX_CONCURRENT_TASKS: Optional[int] = None
+    # Fold worker results into a running summary as they complete instead of after all finish
+    PROGRESSIVE_REFINEMENT: bool = False
+
+    # Hierarchical summarization: results that do not fit one refiner prompt are reduced in a tree
+    SUMMARY_CHUNK_TOKENS: int = 30_000
+    SUMMARY_FAN_IN: int = 8
+    SUMMARY_MAX_DEPTH: int = 3
+    # Per-model overrides keyed by model name prefix, e.g. {"gemini-1.5": {"chunk_tokens": 200000}}
+    SUMMARY_MODEL_LIMITS: Dict[str, Dict[str, int]] = {}
+
+    # Token budgets (estimated locally): prompt limits per stage and an optional per-workflow
+    # budget from which per-task output caps are derived
+    STAGE_INPUT_TOKEN_LIMITS: Dict[str, int] = {
+        "planner": 30_000,
+        "worker": 30_000,
+        "refiner": 180_000,
+    }
+    WORKFLOW_TOKEN_BUDGET: Optional[int] = None
+    MIN_TASK_OUTPUT_TOKENS: int = 256
+    MAX_TASK_OUTPUT_TOKENS: int = 4096
+
+    # Response cache (opt-in): in-memory LRU in front of a shared SQLite file
+    RESPONSE_CACHE_ENABLED: bool = False
+    RESPONSE_CACHE_DIR: str = ".saa_cache"
+    RESPONSE_CACHE_TTL: int = 7 * 24 * 3600
+    RESPONSE_CACHE_MEMORY_ENTRIES: int = 256
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10_000
+    RESPONSE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # Plan cache: exact matches plus TF-IDF similarity for near-duplicate objectives
+    PLAN_CACHE_ENABLED: bool = False
+    PLAN_CACHE_MAX_ENTRIES: int = 512
+    PLAN_CACHE_SIMILARITY_THRESHOLD: float = 0.9
+
+    # Checkpoints (opt-in): each run's plan, task results and final output are appended to
+    # CHECKPOINT_DIR/<run-id>.jsonl (default: the run's output directory's "runs" folder) as they
+    # complete, so an interrupted run can be resumed with `resume <run-id>`
+    CHECKPOINTS_ENABLED: bool = False
+    CHECKPOINT_DIR: Optional[str] = None
+    # Exchange logs: one JSONL file per run, <EXCHANGE_LOG_DIR>/<run-id>.jsonl (default: the
+    # output directory's "exchange_logs" folder), rendered to Markdown with `show-log <run-id>`
+    EXCHANGE_LOG_DIR: Optional[str] = None
+
+    # Retries: exponential backoff with full jitter (or the provider's Retry-After) until the
+    # attempts or the per-call time budget run out. Overrides are keyed by stage ("planner",
+    # "worker", "refiner") or model name prefix, e.g. {"refiner": {"total_budget": 120}}
+    RETRY_MAX_ATTEMPTS: int = 3
+    RETRY_BASE_DELAY: float = 1.0
+    RETRY_MAX_DELAY: float = 30.0
+    RETRY_TOTAL_BUDGET: float = 60.0
+    RETRY_POLICY_OVERRIDES: Dict[str, Dict[str, float]] = {}
+
+    # Timeouts: an optional deadline for the whole workflow, of which REFINER_RESERVE_SECONDS are
+    # kept for the refiner, and per-call timeouts by stage (cut to whatever the deadline leaves).
+    # With PARTIAL_RESULTS_POLICY "refine" the refiner runs on the tasks that finished in time;
+    # "fail" fails the workflow instead
+    WORKFLOW_TIMEOUT: Optional[float] = None
+    REFINER_RESERVE_SECONDS: float = 60.0
+    CALL_TIMEOUTS: Dict[str, float] = {"planner": 120.0, "worker": 300.0, "refiner": 300.0}
+    DEFAULT_CALL_TIMEOUT: Optional[float] = 300.0
+    PARTIAL_RESULTS_POLICY: Literal["refine", "fail"] = "refine"
+
+    # Provider rate limits, shared by every call in the process and kept per provider ("anthropic",
+    # "openai", "vertexai") and API key, e.g. {"anthropic": {"rpm": 50, "tpm": 40000}}. Buckets
+    # are filled to RATE_LIMIT_HEADROOM of the quota so bursts stay just under it
+    PROVIDER_RATE_LIMITS: Dict[str, Dict[str, int]] = {}
+    RATE_LIMIT_HEADROOM: float = 0.9
+    # Bulkheads: calls in flight per provider, so a slow provider cannot starve the others
+    PROVIDER_CONCURRENCY: Dict[str, int] = {"anthropic": 16, "openai": 16, "vertexai": 16}
+
+    # Recursive decomposition: tasks the planner marks "decomposable" are planned again as
+    # sub-workflows up to DECOMPOSITION_MAX_DEPTH levels (0, the default, disables it; it costs
+    # a planning and a summarizing call per decomposed task). A run creates at most
+    # DECOMPOSITION_MAX_TASKS subtasks in total and keeps at most DECOMPOSITION_MAX_CONCURRENCY
+    # calls in flight across all levels (default: the worker pool's capacity)
+    DECOMPOSITION_MAX_DEPTH: int = 0
+    DECOMPOSITION_MAX_TASKS: int = 24
+    DECOMPOSITION_MAX_CONCURRENCY: Optional[int] = None
+
+    # Plugins: names and descriptions are read from a manifest cache; modules are only imported
+    # when a plugin is selected, and changed files are picked up at most every interval seconds
+    PLUGIN_MANIFEST_FILE: str = ".saa_cache/plugin_manifest.json"
+    PLUGIN_RELOAD_INTERVAL: float = 2.0
+
+    # Metrics: upper bounds (seconds) of the latency histogram buckets for LLM calls and worker
+    # tasks, served at /metrics in service mode and written with --metrics-file by the CLI
+    METRICS_LATENCY_BUCKETS: List[float] = [0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300]
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,58 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from src.config import settings
+
+# Absolute ``time.monotonic()`` deadline of the workflow (or phase) the current task belongs to.
+# Tasks created with asyncio.create_task inherit it, so it reaches every worker and refiner call.
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "saa_deadline", default=None
+)
+
+
+def current_deadline() -> Optional[float]:
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None when there is none."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+@contextmanager
+def deadline_scope(
+    timeout: Optional[float] = None, deadline: Optional[float] = None
+) -> Iterator[Optional[float]]:
+    """Run the block under a deadline ``timeout`` seconds from now (or at ``deadline``).
+
+    A scope can only tighten an enclosing deadline, never extend it.
+    """
+    candidates = [d for d in (_deadline.get(), deadline) if d is not None]
+    if timeout is not None:
+        candidates.append(time.monotonic() + timeout)
+    effective = min(candidates) if candidates else None
+    token = _deadline.set(effective)
+    try:
+        yield effective
+    finally:
+        _deadline.reset(token)
+
+
+def call_timeout(stage: Optional[str] = None) -> Optional[float]:
+    """Timeout of one LLM call: the stage's ``CALL_TIMEOUTS`` entry, cut to the deadline."""
+    limits = [settings.CALL_TIMEOUTS.get(stage or "", settings.DEFAULT_CALL_TIMEOUT)]
+    left = remaining()
+    if left is not None:
+        limits.append(left)
+    limits = [limit for limit in limits if limit is not None]
+    return min(limits) if limits else None
@@ -0,0 +1,65 @@
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.serialization import JsonlWriter, loads
+from src.utils.logging import setup_logging
+
+logger = setup_logging()
+
+
+def exchange_log_path(directory: str, run_id: str) -> str:
+    return os.path.join(directory, f"{run_id}.jsonl")
+
+
+class ExchangeLog:
+    """Append-only JSONL log of one run's exchanges, written by a background ``JsonlWriter``."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._writer = JsonlWriter(path, name=f"exchange-log-{os.path.basename(path)}")
+
+    def append(self, role: str, content: str):
+        self._write({"type": "exchange", "role": role, "content": content})
+
+    def append_final(self, content: str):
+        self._write({"type": "final", "content": content})
+
+    def _write(self, record: Dict[str, Any]):
+        record["time"] = time.time()
+        self._writer.append(record)
+
+    def close(self):
+        """Wait for every queued record to be written."""
+        self._writer.close()
+
+
+def read_exchange_log(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "rb") as log_file:
+        for line in log_file:
+            try:
+                yield loads(line)
+            except ValueError:
+                # Invalid JSON or a UTF-8 sequence cut off by a crash mid-write
+                logger.warning(f"Skipping unreadable line in {path}")
+
+
+def render_markdown(path: str) -> str:
+    """Render an exchange log as the Markdown report of its run."""
+    objective: Optional[str] = None
+    parts: List[str] = []
+    final_output: Optional[str] = None
+    for record in read_exchange_log(path):
+        if record.get("type") == "final":
+            final_output = record.get("content", "")
+            continue
+        role, content = record.get("role", ""), record.get("content", "")
+        if objective is None and role == "user":
+            objective = content
+        parts.append(f"### {role.capitalize()}\n{content}\n\n")
+
+    header = "# SAA Orchestrator Exchange Log\n\n"
+    header += f"## Objective\n{objective or ''}\n\n"
+    header += "## Task Breakdown and Execution\n\n"
+    footer = f"## Final Output\n{final_output}\n" if final_output is not None else ""
+    return header + "".join(parts) + footer
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from src.config import settings
+from src.utils.logging import setup_logging
+
+logger = setup_logging()
+
+
+class CircuitBreaker:
+    """Tracks the recent error rate and slow-call rate of one model.
+
+    The circuit opens when either rate crosses its threshold over the last ``window`` calls.
+    While open, calls are rejected so the caller moves on to its next model; after
+    ``cooldown`` seconds a single half-open probe is let through, and its outcome closes or
+    re-opens the circuit. A probe that ends without an outcome (it was cancelled, or the
+    deadline ran out before the request was sent) must be handed back with ``release``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window: int = settings.CIRCUIT_BREAKER_WINDOW,
+        min_calls: int = settings.CIRCUIT_BREAKER_MIN_CALLS,
+        error_rate: float = settings.CIRCUIT_BREAKER_ERROR_RATE,
+        slow_call_seconds: float = settings.CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+        slow_call_rate: float = settings.CIRCUIT_BREAKER_SLOW_CALL_RATE,
+        cooldown: float = settings.CIRCUIT_BREAKER_COOLDOWN,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self._calls: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def admit(self) -> Optional[int]:
+        """None if the call is rejected; otherwise 0, or the probe's number for a half-open probe."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self._probes += 1
+                logger.info(f"Circuit for {self.name} is half-open; sending a probe")
+                return self._probes
+            return None
+
+    def release(self, probe: int):
+        """Let another call probe if probe ``probe`` is still in flight without an outcome."""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._probe_in_flight and self._probes == probe:
+                self._probe_in_flight = False
+
+    def record(self, success: bool, latency: float):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if success and latency < self.slow_call_seconds:
+                    self.state = self.CLOSED
+                    self._calls.clear()
+                    logger.info(f"Circuit for {self.name} closed after a successful probe")
+                else:
+                    self._open()
+                return
+
+            self._calls.append((success, latency))
+            if self.state == self.CLOSED and len(self._calls) >= self.min_calls:
+                failures = sum(1 for ok, _ in self._calls if not ok)
+                slow = sum(1 for _, seconds in self._calls if seconds >= self.slow_call_seconds)
+                if (
+                    failures / len(self._calls) >= self.error_rate
+                    or slow / len(self._calls) >= self.slow_call_rate
+                ):
+                    self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        logger.warning(f"Circuit for {self.name} opened for {self.cooldown}s")
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(model: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if model not in _breakers:
+            _breakers[model] = CircuitBreaker(model)
+        return _breakers[model]
+
+
+def reset_circuit_breakers():
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def fallback_models(stage: Optional[str], primary: str) -> List[str]:
+    """Models to try after ``primary`` for ``stage``, without duplicates.
+
+    ``FALLBACK_CHAINS`` may set a chain per stage; otherwise FALLBACK_MODEL_1/2 are used.
+    Calls outside a workflow stage have no chain.
+    """
+    if stage is None:
+        return []
+    chain = settings.FALLBACK_CHAINS.get(
+        stage, [settings.FALLBACK_MODEL_1, settings.FALLBACK_MODEL_2]
+    )
+    models: List[str] = []
+    for model in chain:
+        if model and model != primary and model not in models:
+            models.append(model)
+    return models
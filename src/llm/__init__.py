@@ -0,0 +1,23 @@
+"""Async-capable phidata LLM adapters.
+
+Each adapter lives in its own module so a provider's SDK is only imported when that provider
+is used; the names below are resolved on first access.
+"""
+
+import importlib
+
+from src.llm.base import NativeAsyncMixin, RateLimitedMixin
+
+_ADAPTERS = {
+    "AsyncClaude": "src.llm.claude",
+    "AsyncGemini": "src.llm.gemini",
+    "RateLimitedOpenAIChat": "src.llm.openai",
+}
+
+__all__ = ["NativeAsyncMixin", "RateLimitedMixin", *_ADAPTERS]
+
+
+def __getattr__(name: str):
+    if name in _ADAPTERS:
+        return getattr(importlib.import_module(_ADAPTERS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,129 @@
+import asyncio
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, List, Optional
+
+from phi.llm.message import Message
+
+from src.rate_limit import await_quota, wait_for_quota
+
+# Response (or replayable stream) fetched by the async client and handed to phidata's synchronous
+# parser via ``invoke`` or ``invoke_stream``
+_prefetched_response: ContextVar[Optional[Any]] = ContextVar("_prefetched_response", default=None)
+
+
+def _request_text(messages: List[Message]) -> str:
+    return "\n".join(message.get_content_string() for message in messages)
+
+
+class RateLimitedMixin:
+    """Waits for the provider's request and token quota before every request the LLM sends.
+
+    phidata sends a follow-up request after each tool call from inside ``response``, so the
+    quota is charged here rather than once per assistant call.
+    """
+
+    def invoke(self, messages: List[Message]) -> Any:
+        wait_for_quota(self.model, _request_text(messages))
+        return super().invoke(messages=messages)
+
+    def invoke_stream(self, messages: List[Message]) -> Any:
+        wait_for_quota(self.model, _request_text(messages))
+        return super().invoke_stream(messages=messages)
+
+    async def ainvoke(self, messages: List[Message]) -> Any:
+        await await_quota(self.model, _request_text(messages))
+        return await super().ainvoke(messages=messages)
+
+    async def ainvoke_stream(self, messages: List[Message]) -> AsyncIterator[Any]:
+        await await_quota(self.model, _request_text(messages))
+        async for chunk in super().ainvoke_stream(messages=messages):
+            yield chunk
+
+
+class NativeAsyncMixin(RateLimitedMixin, ABC):
+    """Adds a native ``aresponse`` and ``aresponse_stream`` to phidata LLMs that only implement
+    the sync path.
+
+    The model call goes through the provider's async client; parsing reuses phidata's
+    ``response`` and ``response_stream`` so both paths return identical output. Tool-call
+    follow-ups are rare in our prompts and finish on a worker thread. Adapters' ``ainvoke`` and
+    ``ainvoke_stream`` only talk to the provider, so the quota is awaited here before them.
+    """
+
+    @abstractmethod
+    async def ainvoke(self, messages: List[Message]) -> Any:
+        """The provider's response to ``messages``, from its async client."""
+
+    @abstractmethod
+    def ainvoke_stream(self, messages: List[Message]) -> AsyncIterator[Any]:
+        """The provider's streamed chunks for ``messages``, from its async client."""
+
+    @abstractmethod
+    def has_tool_calls(self, response: Any) -> bool:
+        """Whether phidata's parser runs tools for this response."""
+
+    @abstractmethod
+    def starts_tool_call(self, chunk: Any) -> bool:
+        """Whether phidata's stream parser stops yielding text at this chunk."""
+
+    @abstractmethod
+    def chunk_text(self, chunk: Any) -> Optional[str]:
+        """Text phidata's stream parser yields for this chunk, if any."""
+
+    @abstractmethod
+    def replay_stream(self, chunks: List[Any]) -> Any:
+        """The streamed chunks in the shape the sync ``invoke_stream`` returns."""
+
+    def invoke(self, messages: List[Message]) -> Any:
+        response = _prefetched_response.get()
+        if response is not None:
+            _prefetched_response.set(None)
+            return response
+        return super().invoke(messages=messages)
+
+    def invoke_stream(self, messages: List[Message]) -> Any:
+        stream = _prefetched_response.get()
+        if stream is not None:
+            _prefetched_response.set(None)
+            return stream
+        return super().invoke_stream(messages=messages)
+
+    async def aresponse(self, messages: List[Message]) -> str:
+        await await_quota(self.model, _request_text(messages))
+        response = await self.ainvoke(messages=messages)
+        token = _prefetched_response.set(response)
+        try:
+            if self.has_tool_calls(response):
+                return await asyncio.to_thread(self.response, messages)
+            return self.response(messages)
+        finally:
+            _prefetched_response.reset(token)
+
+    async def aresponse_stream(self, messages: List[Message]) -> AsyncIterator[str]:
+        # Text is yielded as it arrives until the model starts a tool call. The chunks are then
+        # replayed through phidata's parser, which records the assistant message and runs any
+        # tools; its first ``streamed`` chunks are the ones already yielded here
+        chunks: List[Any] = []
+        streamed = 0
+        calls_tools = False
+        await await_quota(self.model, _request_text(messages))
+        async for chunk in self.ainvoke_stream(messages=messages):
+            chunks.append(chunk)
+            calls_tools = calls_tools or self.starts_tool_call(chunk)
+            text = None if calls_tools else self.chunk_text(chunk)
+            if text is not None:
+                streamed += 1
+                yield text
+
+        token = _prefetched_response.set(self.replay_stream(chunks))
+        try:
+            if not calls_tools:
+                for _ in self.response_stream(messages):
+                    pass
+                return
+            parsed = await asyncio.to_thread(list, self.response_stream(messages))
+        finally:
+            _prefetched_response.reset(token)
+        for text in parsed[streamed:]:
+            yield text
@@ -0,0 +1,67 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from anthropic import AsyncAnthropic
+from phi.llm.anthropic import Claude
+from phi.llm.message import Message
+
+from src.llm.base import NativeAsyncMixin
+
+
+class _TextStreamReplay:
+    """Stands in for the ``MessageStreamManager`` phidata's ``response_stream`` iterates."""
+
+    def __init__(self, deltas: List[str]):
+        self.text_stream = deltas
+
+    def __enter__(self) -> "_TextStreamReplay":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+class AsyncClaude(NativeAsyncMixin, Claude):
+    async_anthropic_client: Optional[AsyncAnthropic] = None
+
+    @property
+    def async_client(self) -> AsyncAnthropic:
+        if self.async_anthropic_client is None:
+            client_params = {"api_key": self.api_key} if self.api_key else {}
+            self.async_anthropic_client = AsyncAnthropic(**client_params)
+        return self.async_anthropic_client
+
+    def _api_request(self, messages: List[Message]) -> Tuple[Dict[str, Any], List[dict]]:
+        api_kwargs = self.api_kwargs
+        api_messages = []
+        for m in messages:
+            if m.role == "system":
+                api_kwargs["system"] = m.content
+            else:
+                api_messages.append({"role": m.role, "content": m.content or ""})
+        return api_kwargs, api_messages
+
+    async def ainvoke(self, messages: List[Message]) -> Any:
+        api_kwargs, api_messages = self._api_request(messages)
+        return await self.async_client.messages.create(
+            model=self.model, messages=api_messages, **api_kwargs
+        )
+
+    async def ainvoke_stream(self, messages: List[Message]) -> AsyncIterator[str]:
+        api_kwargs, api_messages = self._api_request(messages)
+        async with self.async_client.messages.stream(
+            model=self.model, messages=api_messages, **api_kwargs
+        ) as stream:
+            async for delta in stream.text_stream:
+                yield delta
+
+    def has_tool_calls(self, response: Any) -> bool:
+        return "<function_calls>" in (response.content[0].text or "")
+
+    def starts_tool_call(self, chunk: str) -> bool:
+        return "<function" in chunk or "<invoke" in chunk
+
+    def chunk_text(self, chunk: str) -> Optional[str]:
+        return chunk
+
+    def replay_stream(self, chunks: List[str]) -> _TextStreamReplay:
+        return _TextStreamReplay(chunks)
@@ -0,0 +1,38 @@
+from typing import Any, AsyncIterator, List, Optional
+
+from phi.llm.gemini import Gemini
+from phi.llm.message import Message
+
+from src.llm.base import NativeAsyncMixin
+
+
+def _first_part(chunk: Any) -> dict:
+    # phidata's stream parser only looks at the first part of each chunk
+    return chunk.candidates[0].content.parts[0].to_dict()
+
+
+class AsyncGemini(NativeAsyncMixin, Gemini):
+    async def ainvoke(self, messages: List[Message]) -> Any:
+        return await self.client.generate_content_async(
+            contents=self.convert_messages_to_contents(messages)
+        )
+
+    async def ainvoke_stream(self, messages: List[Message]) -> AsyncIterator[Any]:
+        responses = await self.client.generate_content_async(
+            contents=self.convert_messages_to_contents(messages), stream=True
+        )
+        async for response in responses:
+            yield response
+
+    def has_tool_calls(self, response: Any) -> bool:
+        parts = response.candidates[0].content.parts
+        return any("function_call" in part.to_dict() for part in parts)
+
+    def starts_tool_call(self, chunk: Any) -> bool:
+        return "function_call" in _first_part(chunk)
+
+    def chunk_text(self, chunk: Any) -> Optional[str]:
+        return _first_part(chunk).get("text")
+
+    def replay_stream(self, chunks: List[Any]) -> List[Any]:
+        return chunks
@@ -0,0 +1,7 @@
+from phi.llm.openai import OpenAIChat
+
+from src.llm.base import RateLimitedMixin
+
+
+class RateLimitedOpenAIChat(RateLimitedMixin, OpenAIChat):
+    """phidata's OpenAIChat, which already has an async client, with the shared rate limiter."""
@@ -1,29 +1,110 @@
 import asyncio
 import os
+import sys
+from typing import Dict, Optional
 
 import typer
 from rich import print as rprint
-from rich.console import Console
+from rich.console import Console, Group
+from rich.live import Live
+from rich.panel import Panel
 from rich.table import Table
+from rich.text import Text
 
+from src.batch import completed_ids, read_batch_items, run_batch
+from src.cache import configure_response_cache
+from src.checkpoint import load_checkpoint, new_run_id
 from src.config import settings
-from src.orchestrator import Orchestrator, OrchestratorSettings
+from src.exchange_log import exchange_log_path, render_markdown
+from src.metrics import REGISTRY
+from src.orchestrator import Orchestrator, OrchestratorSettings, WorkflowEvent
 from src.plugin_manager import plugin_manager
 
 app = typer.Typer()
 
-# Define and create plugin folder
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 plugin_folder = os.path.join(project_root, "plugins")
-os.makedirs(plugin_folder, exist_ok=True)
 
 
-# Load plugins
-try:
-    plugin_manager.load_plugins(plugin_folder)
-except Exception as e:
-    rprint(f"[bold red]Error loading plugins: {str(e)}[/bold red]")
+def load_plugins():
+    """Index plugins for the commands that use them, keeping `import src.main` cheap."""
+    try:
+        plugin_manager.load_plugins(plugin_folder)
+        plugin_manager.discover_entry_points()
+    except Exception as e:
+        rprint(f"[bold red]Error loading plugins: {str(e)}[/bold red]")
+
+
+# Only the tail of each stream is rendered so long outputs do not flood the terminal
+STREAM_PANEL_CHARS = 1500
+
+
+def _render_streams(streams: Dict[str, str], titles: Dict[str, str]) -> Group:
+    return Group(
+        *[
+            Panel(Text(text[-STREAM_PANEL_CHARS:]), title=titles.get(source, source))
+            for source, text in streams.items()
+        ]
+    )
+
+
+def _add_task_panel(streams: Dict[str, str], titles: Dict[str, str], index: int, task: str):
+    # Streamed plans dispatch tasks before the plan event, which must not reset their panels
+    titles.setdefault(f"task-{index}", f"Worker task {index + 1}: {task}")
+    streams.setdefault(f"task-{index}", "")
+
+
+async def _stream_workflow(
+    orchestrator: Orchestrator,
+    objective: str,
+    plugin: Optional[str],
+    output_path: str,
+    run_id: Optional[str] = None,
+) -> str:
+    streams: Dict[str, str] = {}
+    titles: Dict[str, str] = {"refiner": "Refiner"}
+    final_output = ""
+    streamed_to_file = False
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w") as output_file, Live(
+        _render_streams(streams, titles), refresh_per_second=8
+    ) as live:
+        event: WorkflowEvent
+        async for event in orchestrator.stream_workflow(objective, use_case=plugin, run_id=run_id):
+            if event.type == "plan":
+                for index, task in enumerate(event.data.get("tasks", [])):
+                    _add_task_panel(streams, titles, index, task)
+            elif event.type == "task_dispatched":
+                _add_task_panel(streams, titles, event.data["index"], event.data["task"])
+            elif event.type == "token":
+                streams[event.source] = streams.get(event.source, "") + event.content
+                if event.source == "refiner":
+                    output_file.write(event.content)
+                    output_file.flush()
+                    streamed_to_file = True
+            elif event.type == "task_completed":
+                streams[event.source] = event.content
+                titles[event.source] = f"{titles.get(event.source, event.source)} [green]done"
+            elif event.type == "final":
+                final_output = event.content
+                if not streamed_to_file:
+                    output_file.write(final_output)
+            live.update(_render_streams(streams, titles))
+
+    return final_output
+
+
+def _write_metrics(path: Optional[str]):
+    """Dump the process's metrics in the Prometheus text format, e.g. for a node exporter."""
+    if not path:
+        return
+    try:
+        REGISTRY.write(path)
+        rprint(f"[dim]Metrics written to '{path}'[/dim]")
+    except OSError as e:
+        rprint(f"[bold red]Could not write metrics:[/bold red] {str(e)}")
 
 
 @app.command()
@@ -37,6 +118,21 @@ def run_workflow(
     num_workers: int = typer.Option(
         settings.NUM_WORKERS, "--workers", "-w", help="Number of workers for parallel processing."
     ),
+    worker_concurrency: int = typer.Option(
+        settings.WORKER_CONCURRENCY,
+        "--worker-concurrency",
+        help="Number of tasks each worker may run at the same time.",
+    ),
+    max_concurrent_tasks: int = typer.Option(
+        settings.MAX_CONCURRENT_TASKS,
+        "--max-concurrent-tasks",
+        help="Upper bound on tasks in flight for the run.",
+    ),
+    progressive: bool = typer.Option(
+        settings.PROGRESSIVE_REFINEMENT,
+        "--progressive/--no-progressive",
+        help="Refine worker results as they complete instead of after all workers finish.",
+    ),
     main_model: str = typer.Option(
         settings.MAIN_ASSISTANT, "--main-model", help="Model for the main assistant."
     ),
@@ -49,13 +145,41 @@ def run_workflow(
     custom_prompt_template: str = typer.Option(
         None, "--custom-prompt", help="Custom prompt template to use for the main assistant."
     ),
+    stream: bool = typer.Option(
+        False, "--stream", help="Stream worker and refiner output live as it is generated."
+    ),
+    output_file: str = typer.Option(
+        None, "--output-file", help="File the streamed final output is written to."
+    ),
+    cache: Optional[bool] = typer.Option(
+        None, "--cache/--no-cache", help="Reuse cached LLM responses for identical prompts."
+    ),
+    cache_dir: str = typer.Option(
+        None, "--cache-dir", help="Directory of the on-disk response cache (enables caching)."
+    ),
+    timeout: Optional[float] = typer.Option(
+        settings.WORKFLOW_TIMEOUT,
+        "--timeout",
+        help="Workflow deadline in seconds; the refiner runs on the tasks finished by then.",
+    ),
+    metrics_file: str = typer.Option(
+        None, "--metrics-file", help="File the run's metrics are written to when it ends."
+    ),
+    checkpoint: bool = typer.Option(
+        settings.CHECKPOINTS_ENABLED,
+        "--checkpoint/--no-checkpoint",
+        help="Save the plan and task results as they complete so the run can be resumed.",
+    ),
 ):
     """
     Run the SAA Orchestrator workflow with the given objective.
     """
     full_objective = " ".join(objective)
+    load_plugins()
+    run_id = new_run_id()
     try:
         rprint("[bold]Starting SAA Orchestrator[/bold]")
+        rprint(f"[dim]Run ID: {run_id}[/dim]")
         if plugin:
             rprint(f"[bold yellow]Using plugin: {plugin}[/bold yellow]")
         if custom_prompt_template:
@@ -65,19 +189,251 @@ def run_workflow(
             sub_assistant_model=sub_model,
             refiner_assistant_model=refiner_model,
             num_workers=num_workers,
+            worker_concurrency=worker_concurrency,
+            max_concurrent_tasks=max_concurrent_tasks,
+            progressive_refinement=progressive,
             custom_prompt_template=custom_prompt_template,
+            workflow_timeout=timeout,
+            checkpoints_enabled=checkpoint,
         )
 
+        if cache is None:
+            cache = settings.RESPONSE_CACHE_ENABLED or cache_dir is not None
+        response_cache = configure_response_cache(enabled=cache, cache_dir=cache_dir)
+
         orchestrator = Orchestrator(settings=orchestrator_settings)
 
-        result = asyncio.run(orchestrator.run_workflow(full_objective, use_case=plugin))
+        if stream:
+            output_path = output_file or os.path.join(os.getcwd(), "output", "final_output.md")
+            result = asyncio.run(
+                _stream_workflow(orchestrator, full_objective, plugin, output_path, run_id=run_id)
+            )
+        else:
+            result = asyncio.run(
+                orchestrator.run_workflow(full_objective, use_case=plugin, run_id=run_id)
+            )
+
+        rprint("\n[bold green]Workflow completed![/bold green]")
+        rprint("\n[bold]Final Output:[/bold]")
+        rprint(result)
+        rprint(
+            f"\n[bold blue]Exchange log saved to '{orchestrator.exchange_log_file(run_id)}'"
+            f"[/bold blue] (render it with: show-log {run_id})"
+        )
+        if response_cache:
+            stats = response_cache.stats()
+            rprint(f"[dim]Response cache: {stats['hits']} hits, {stats['misses']} misses[/dim]")
+    except Exception as e:
+        rprint(f"[bold red]An error occurred:[/bold red] {str(e)}")
+        if checkpoint:
+            rprint(f"[bold yellow]Resume the run with:[/bold yellow] resume {run_id}")
+    finally:
+        _write_metrics(metrics_file)
+
+
+@app.command()
+def resume(
+    run_id: str = typer.Argument(..., help="ID of the run to resume."),
+    checkpoint_dir: str = typer.Option(
+        None, "--checkpoint-dir", help="Directory holding the run's checkpoint."
+    ),
+    timeout: Optional[float] = typer.Option(
+        None, "--timeout", help="New workflow deadline in seconds (default: the run's own)."
+    ),
+    metrics_file: str = typer.Option(
+        None, "--metrics-file", help="File the run's metrics are written to when it ends."
+    ),
+):
+    """
+    Resume an interrupted run, skipping its planning and the tasks that already finished.
+    """
+    load_plugins()
+    try:
+        directory = (
+            checkpoint_dir or settings.CHECKPOINT_DIR or os.path.join(os.getcwd(), "output", "runs")
+        )
+        checkpoint = load_checkpoint(directory, run_id)
+        rprint(
+            f"[bold]Resuming run {run_id}:[/bold] {len(checkpoint.results)} finished tasks, "
+            f"plan {'restored' if checkpoint.plan else 'not yet saved'}"
+        )
+        overrides = {"checkpoint_dir": directory}
+        if timeout is not None:
+            overrides["workflow_timeout"] = timeout
+        orchestrator = Orchestrator(
+            settings=OrchestratorSettings(**{**checkpoint.settings, **overrides})
+        )
+        result = asyncio.run(orchestrator.resume_workflow(run_id))
 
         rprint("\n[bold green]Workflow completed![/bold green]")
         rprint("\n[bold]Final Output:[/bold]")
         rprint(result)
-        rprint("\n[bold blue]Exchange log saved to 'exchange_log.md'[/bold blue]")
     except Exception as e:
         rprint(f"[bold red]An error occurred:[/bold red] {str(e)}")
+    finally:
+        _write_metrics(metrics_file)
+
+
+@app.command("run-batch")
+def run_batch_command(
+    input_file: str = typer.Argument(
+        ..., help="JSONL file of objectives, or '-' to read them from stdin."
+    ),
+    output_file: str = typer.Option(
+        ..., "--output", "-o", help="JSONL file results are appended to as workflows finish."
+    ),
+    concurrency: int = typer.Option(
+        4, "--concurrency", "-c", help="Maximum number of workflows running at the same time."
+    ),
+    num_workers: int = typer.Option(
+        settings.NUM_WORKERS, "--workers", "-w", help="Number of workers for each workflow."
+    ),
+    main_model: str = typer.Option(
+        settings.MAIN_ASSISTANT, "--main-model", help="Default model for the main assistant."
+    ),
+    sub_model: str = typer.Option(
+        settings.SUB_ASSISTANT, "--sub-model", help="Default model for the sub assistants."
+    ),
+    refiner_model: str = typer.Option(
+        settings.REFINER_ASSISTANT,
+        "--refiner-model",
+        help="Default model for the refiner assistant.",
+    ),
+    cache: Optional[bool] = typer.Option(
+        None, "--cache/--no-cache", help="Reuse cached LLM responses for identical prompts."
+    ),
+    timeout: Optional[float] = typer.Option(
+        settings.WORKFLOW_TIMEOUT, "--timeout", help="Deadline in seconds for each workflow."
+    ),
+    metrics_file: str = typer.Option(
+        None, "--metrics-file", help="File the batch's metrics are written to when it ends."
+    ),
+):
+    """
+    Run many objectives from a JSONL file, skipping IDs already present in the output.
+
+    Each line is an object with an "objective" and optional "id", "plugin", "main_model",
+    "sub_model" and "refiner_model" fields.
+    """
+    load_plugins()
+    try:
+        skip_ids = completed_ids(output_file)
+        if skip_ids:
+            rprint(f"[bold yellow]Resuming: {len(skip_ids)} items already done[/bold yellow]")
+
+        if cache is None:
+            cache = settings.RESPONSE_CACHE_ENABLED
+        configure_response_cache(enabled=cache)
+
+        base_settings = OrchestratorSettings(
+            main_assistant_model=main_model,
+            sub_assistant_model=sub_model,
+            refiner_assistant_model=refiner_model,
+            num_workers=num_workers,
+            workflow_timeout=timeout,
+        )
+        output_dir = os.path.dirname(os.path.abspath(output_file))
+        os.makedirs(output_dir, exist_ok=True)
+
+        input_stream = sys.stdin if input_file == "-" else open(input_file)
+        try:
+            # A malformed line fails the batch here, before any workflow has started
+            items = read_batch_items(input_stream)
+        finally:
+            if input_stream is not sys.stdin:
+                input_stream.close()
+
+        with open(output_file, "a") as output:
+            results = asyncio.run(
+                run_batch(
+                    items, output, concurrency, base_settings=base_settings, skip_ids=skip_ids
+                )
+            )
+
+        failed = sum(1 for result in results if result.status != "ok")
+        rprint(
+            f"\n[bold green]Batch completed:[/bold green] {len(results) - failed} succeeded, "
+            f"{failed} failed, {len(skip_ids)} skipped"
+        )
+    except Exception as e:
+        rprint(f"[bold red]An error occurred:[/bold red] {str(e)}")
+    finally:
+        _write_metrics(metrics_file)
+
+
+@app.command("show-log")
+def show_log(
+    run_id: str = typer.Argument(..., help="ID of the run whose exchange log to render."),
+    log_dir: str = typer.Option(
+        None, "--log-dir", help="Directory holding the run's exchange log."
+    ),
+    output_file: str = typer.Option(
+        None, "--output-file", help="Write the Markdown to this file instead of printing it."
+    ),
+):
+    """
+    Render a run's exchange log as Markdown.
+    """
+    directory = (
+        log_dir or settings.EXCHANGE_LOG_DIR or os.path.join(os.getcwd(), "output", "exchange_logs")
+    )
+    path = exchange_log_path(directory, run_id)
+    if not os.path.exists(path):
+        rprint(f"[bold red]No exchange log found for run {run_id} in {directory}[/bold red]")
+        raise typer.Exit(code=1)
+
+    markdown = render_markdown(path)
+    if output_file:
+        with open(output_file, "w") as output:
+            output.write(markdown)
+        rprint(f"[bold blue]Exchange log written to '{output_file}'[/bold blue]")
+    else:
+        from rich.markdown import Markdown
+
+        Console().print(Markdown(markdown))
+
+
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", "--host", help="Interface to bind."),
+    port: int = typer.Option(8000, "--port", help="Port to listen on."),
+    num_workers: int = typer.Option(
+        settings.NUM_WORKERS, "--workers", "-w", help="Number of workers for each workflow."
+    ),
+    main_model: str = typer.Option(
+        settings.MAIN_ASSISTANT, "--main-model", help="Model for the main assistant."
+    ),
+    sub_model: str = typer.Option(
+        settings.SUB_ASSISTANT, "--sub-model", help="Model for the sub assistants."
+    ),
+    refiner_model: str = typer.Option(
+        settings.REFINER_ASSISTANT, "--refiner-model", help="Model for the refiner assistant."
+    ),
+):
+    """
+    Serve workflows over HTTP, streaming their events as Server-Sent Events.
+    """
+    try:
+        import uvicorn
+
+        from src.server import create_app
+    except ImportError:
+        rprint(
+            "[bold red]Serve mode needs the server extras:[/bold red] "
+            "pip install 'smart-autonomous-assistants[server]'"
+        )
+        raise typer.Exit(code=1)
+
+    load_plugins()
+    orchestrator = Orchestrator(
+        settings=OrchestratorSettings(
+            main_assistant_model=main_model,
+            sub_assistant_model=sub_model,
+            refiner_assistant_model=refiner_model,
+            num_workers=num_workers,
+        )
+    )
+    uvicorn.run(create_app(orchestrator), host=host, port=port)
 
 
 @app.command()
@@ -88,6 +444,7 @@ def list_plugins():
     console = Console()
 
     rprint(f"[bold]Plugin folder:[/bold] {plugin_folder}")
+    load_plugins()
 
     plugins = plugin_manager.get_use_case_prompts()
 
@@ -0,0 +1,297 @@
+import contextvars
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.config import settings
+
+# Plugin of the workflow the current task belongs to, added as the "plugin" label
+_plugin: contextvars.ContextVar[str] = contextvars.ContextVar("saa_metrics_plugin", default="")
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """A metric family with one value per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    @abstractmethod
+    def reset(self):
+        """Drop every recorded value."""
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, Sequence[str], Sequence[str], float]]:
+        """(sample name, label names, label values, value) of every exposed sample."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, labelnames, values, value in self.samples():
+            lines.append(f"{name}{_format_labels(labelnames, values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, self.labelnames, key, value) for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: Any):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels: Any) -> Iterator[None]:
+        """Count the block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = (),
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label values: a count per bucket (not cumulative), the sum and the count
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels: Any) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        with self._lock:
+            items = sorted(
+                (key, (list(counts), total, count))
+                for key, (counts, total, count) in self._values.items()
+            )
+        samples = []
+        bucket_labels = self.labelnames + ("le",)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                values = key + (_format_value(bound),)
+                samples.append((f"{self.name}_bucket", bucket_labels, values, cumulative))
+            samples.append((f"{self.name}_sum", self.labelnames, key, total))
+            samples.append((f"{self.name}_count", self.labelnames, key, count))
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        return "".join(metric.render() for metric in self.metrics)
+
+    def write(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as metrics_file:
+            metrics_file.write(self.render())
+
+    def reset(self):
+        for metric in self.metrics:
+            metric.reset()
+
+
+REGISTRY = MetricsRegistry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LLM_CALLS = REGISTRY.register(
+    Counter(
+        "saa_llm_calls_total",
+        "LLM calls by stage, model, plugin and outcome (success or error).",
+        ("stage", "model", "plugin", "outcome"),
+    )
+)
+LLM_CALL_SECONDS = REGISTRY.register(
+    Histogram(
+        "saa_llm_call_duration_seconds",
+        "Latency of LLM calls, including streaming the whole response.",
+        ("stage", "model", "plugin"),
+        buckets=settings.METRICS_LATENCY_BUCKETS,
+    )
+)
+LLM_TOKENS = REGISTRY.register(
+    Counter(
+        "saa_llm_tokens_total",
+        "Estimated tokens of successful LLM calls by direction (input or output).",
+        ("stage", "model", "plugin", "direction"),
+    )
+)
+LLM_RETRIES = REGISTRY.register(
+    Counter(
+        "saa_llm_retries_total",
+        "LLM call attempts that were retried after a transient error.",
+        ("stage", "model", "plugin"),
+    )
+)
+LLM_IN_FLIGHT = REGISTRY.register(
+    Gauge("saa_llm_in_flight_requests", "LLM calls currently in flight.", ("stage", "model"))
+)
+CACHE_REQUESTS = REGISTRY.register(
+    Counter(
+        "saa_response_cache_requests_total",
+        "Response cache lookups by stage and result (hit or miss).",
+        ("stage", "plugin", "result"),
+    )
+)
+WORKER_QUEUE_DEPTH = REGISTRY.register(
+    Gauge("saa_worker_queue_depth", "Worker tasks queued and ready to run.")
+)
+WORKER_TASKS_IN_FLIGHT = REGISTRY.register(
+    Gauge("saa_worker_tasks_in_flight", "Worker tasks currently running.")
+)
+WORKER_TASKS = REGISTRY.register(
+    Counter(
+        "saa_worker_tasks_total",
+        "Finished worker tasks by plugin and outcome (success or error).",
+        ("plugin", "outcome"),
+    )
+)
+WORKER_TASK_SECONDS = REGISTRY.register(
+    Histogram(
+        "saa_worker_task_duration_seconds",
+        "Time from a worker picking up a task to its result.",
+        ("plugin",),
+        buckets=settings.METRICS_LATENCY_BUCKETS,
+    )
+)
+
+
+def current_plugin() -> str:
+    return _plugin.get()
+
+
+@contextmanager
+def plugin_scope(plugin: Optional[str]) -> Iterator[None]:
+    """Label the metrics recorded inside the block with ``plugin``."""
+    token = _plugin.set(plugin or "")
+    try:
+        yield
+    finally:
+        _plugin.reset(token)
+
+
+def _model_label(model: Any) -> str:
+    return model if isinstance(model, str) else "unknown"
+
+
+@contextmanager
+def observe_llm_call(stage: Optional[str], model: Any) -> Iterator[None]:
+    """Record one LLM call: in-flight gauge, latency histogram and outcome counter."""
+    labels = {"stage": stage or "", "model": _model_label(model), "plugin": current_plugin()}
+    started = time.monotonic()
+    outcome = "error"
+    try:
+        with LLM_IN_FLIGHT.track(stage=labels["stage"], model=labels["model"]):
+            yield
+        outcome = "success"
+    finally:
+        LLM_CALL_SECONDS.observe(time.monotonic() - started, **labels)
+        LLM_CALLS.inc(outcome=outcome, **labels)
+
+
+def record_tokens(stage: Optional[str], model: Any, input_tokens: int, output_tokens: int):
+    labels = {"stage": stage or "", "model": _model_label(model), "plugin": current_plugin()}
+    LLM_TOKENS.inc(input_tokens, direction="input", **labels)
+    LLM_TOKENS.inc(output_tokens, direction="output", **labels)
+
+
+def record_retry(stage: Optional[str], model: Any):
+    LLM_RETRIES.inc(stage=stage or "", model=_model_label(model), plugin=current_plugin())
+
+
+def record_cache_lookup(stage: Optional[str], hit: bool):
+    CACHE_REQUESTS.inc(stage=stage or "", plugin=current_plugin(), result="hit" if hit else "miss")
+
+
+def reset_metrics():
+    REGISTRY.reset()
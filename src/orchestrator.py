@@ -1,14 +1,23 @@
+import asyncio
+import hashlib
 import os
-from typing import Any, Callable, Dict, List, Literal, Optional
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Literal, Optional, Tuple, Union
 
 from pydantic import BaseModel, ConfigDict, Field
 
-from .assistants import create_assistant
+from .assistants import get_assistant, workspace_scope
+from .checkpoint import RunCheckpoint, load_checkpoint, new_run_id, validate_run_id
 from .config import settings
-from .plugin_manager import plugin_manager
-from .utils.exceptions import AssistantError, WorkflowError
+from .deadline import current_deadline, deadline_scope, remaining
+from .exchange_log import ExchangeLog, exchange_log_path
+from .metrics import plugin_scope
+from .plan_cache import PlanCache
+from .plugin_manager import PluginManager, plugin_manager
+from .token_budget import estimate_tokens, task_output_cap
+from .utils.exceptions import AssistantError, WorkerError, WorkflowError, WorkflowTimeoutError
 from .utils.logging import setup_logging
-from .workers import PlanResponse, SAAsWorkers
+from .workers import PlanResponse, SAAsWorkers, TaskStream, WorkerTask
 
 logger = setup_logging()
 
@@ -18,13 +27,23 @@ class TaskExchange(BaseModel):
     content: str = Field(...)
 
 
+class WorkflowEvent(BaseModel):
+    type: Literal["plan", "task_dispatched", "token", "task_completed", "final"]
+    source: str = Field("", description="Emitter: 'planner', 'task-<index>' or 'refiner'")
+    content: str = ""
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+
+EventHandler = Callable[[WorkflowEvent], None]
+
+
 class Task(BaseModel):
     task: str
     prompt: str
     result: str
 
     def to_dict(self) -> Dict[str, Any]:
-        return {"task": str(self.task), "prompt": str(self.prompt), "result": str(self.result)}
+        return {"task": self.task, "prompt": self.prompt, "result": self.result}
 
 
 class State(BaseModel):
@@ -33,94 +52,353 @@ class State(BaseModel):
 
     def to_dict(self) -> Dict[str, Any]:
         return {
-            "task_exchanges": [exchange.model_dump() for exchange in self.task_exchanges],
+            "task_exchanges": [
+                {"role": exchange.role, "content": exchange.content}
+                for exchange in self.task_exchanges
+            ],
             "tasks": [task.to_dict() for task in self.tasks],
         }
 
 
+class RunRecords:
+    """Compact record of one run's exchanges and task results, appended without validation.
+
+    A task's result is kept once, in ``tasks``; its ``sub_assistant`` exchange holds the task's
+    index instead. ``to_state`` builds the public ``State`` when it is needed.
+    """
+
+    __slots__ = ("exchanges", "tasks")
+
+    def __init__(self):
+        self.exchanges: List[Tuple[str, Union[str, int]]] = []
+        self.tasks: List[Tuple[str, str, str]] = []
+
+    def add_exchange(self, role: str, content: str):
+        self.exchanges.append((role, content))
+
+    def add_task(self, task: str, prompt: str, result: str):
+        self.exchanges.append(("sub_assistant", len(self.tasks)))
+        self.tasks.append((task, prompt, result))
+
+    def _content(self, content: Union[str, int]) -> str:
+        return self.tasks[content][2] if isinstance(content, int) else content
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Same shape as ``State.to_dict``."""
+        return {
+            "task_exchanges": [
+                {"role": role, "content": self._content(content)}
+                for role, content in self.exchanges
+            ],
+            "tasks": [
+                {"task": task, "prompt": prompt, "result": result}
+                for task, prompt, result in self.tasks
+            ],
+        }
+
+    def to_state(self) -> State:
+        # The records were built from validated values, so construct without validating again
+        return State.model_construct(
+            task_exchanges=[
+                TaskExchange.model_construct(role=role, content=self._content(content))
+                for role, content in self.exchanges
+            ],
+            tasks=[
+                Task.model_construct(task=task, prompt=prompt, result=result)
+                for task, prompt, result in self.tasks
+            ],
+        )
+
+
 class OrchestratorSettings(BaseModel):
     main_assistant_model: str = settings.MAIN_ASSISTANT
     sub_assistant_model: str = settings.SUB_ASSISTANT
     refiner_assistant_model: str = settings.REFINER_ASSISTANT
     num_workers: int = settings.NUM_WORKERS
+    worker_concurrency: int = settings.WORKER_CONCURRENCY
+    max_concurrent_tasks: Optional[int] = settings.MAX_CONCURRENT_TASKS
+    progressive_refinement: bool = settings.PROGRESSIVE_REFINEMENT
+    workflow_token_budget: Optional[int] = settings.WORKFLOW_TOKEN_BUDGET
+    workflow_timeout: Optional[float] = settings.WORKFLOW_TIMEOUT
+    refiner_reserve_seconds: float = settings.REFINER_RESERVE_SECONDS
+    partial_results_policy: Literal["refine", "fail"] = settings.PARTIAL_RESULTS_POLICY
+    decomposition_max_depth: int = settings.DECOMPOSITION_MAX_DEPTH
+    decomposition_max_tasks: int = settings.DECOMPOSITION_MAX_TASKS
+    decomposition_max_concurrency: Optional[int] = settings.DECOMPOSITION_MAX_CONCURRENCY
     additional_tools: Optional[List] = None
     custom_prompt_template: Optional[str] = None
+    plan_cache_enabled: bool = settings.PLAN_CACHE_ENABLED
+    plan_cache_similarity_threshold: float = settings.PLAN_CACHE_SIMILARITY_THRESHOLD
+    checkpoints_enabled: bool = settings.CHECKPOINTS_ENABLED
+    checkpoint_dir: Optional[str] = settings.CHECKPOINT_DIR
+    exchange_log_dir: Optional[str] = settings.EXCHANGE_LOG_DIR
+
+
+class DecompositionBudget:
+    """Limits shared by a run's sub-workflows at every level of decomposition."""
+
+    def __init__(self, max_depth: int, max_tasks: int, concurrency: int):
+        self.max_depth = max_depth
+        self.remaining_tasks = max_tasks
+        self.slots = asyncio.Semaphore(concurrency)
+
+    def reserve(self, count: int) -> bool:
+        """Take ``count`` subtasks from the fan-out budget, if that many are left."""
+        if count > self.remaining_tasks:
+            return False
+        self.remaining_tasks -= count
+        return True
+
+
+class RunContext:
+    """Everything one ``run_workflow`` call owns, so concurrent runs on one Orchestrator stay apart.
+
+    The run records its exchanges in its own ``records`` and exchange log, checkpoints through
+    its own ``checkpoint`` and gives the file tools its own ``workspace`` directory.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        workspace: str,
+        exchange_log: ExchangeLog,
+        checkpoint: Optional[RunCheckpoint] = None,
+        on_event: Optional[EventHandler] = None,
+        stream_tokens: bool = True,
+    ):
+        self.run_id = run_id
+        self.records = RunRecords()
+        self.workspace = workspace
+        self.exchange_log = exchange_log
+        self.checkpoint = checkpoint
+        self.emit: EventHandler = on_event or (lambda event: None)
+        # LLM calls are only streamed when someone consumes the tokens
+        self.streaming = on_event is not None and stream_tokens
+
+    def log_exchange(self, role: str, content: str):
+        self.records.add_exchange(role, content)
+        self.exchange_log.append(role, content)
+
+    async def close(self):
+        if self.checkpoint is not None:
+            await asyncio.to_thread(self.checkpoint.close)
+        await asyncio.to_thread(self.exchange_log.close)
 
 
 class Orchestrator(BaseModel):
+    # State of the most recently finished run; runs record into their own RunContext
     state: State = State()
     output_dir: str = Field(default_factory=lambda: os.path.join(os.getcwd(), "output"))
-    workers: SAAsWorkers = Field(default_factory=lambda: SAAsWorkers(settings.NUM_WORKERS))
+    workers: Optional[SAAsWorkers] = None
     settings: OrchestratorSettings = Field(default_factory=OrchestratorSettings)
+    plan_cache: Optional[PlanCache] = None
 
+    # Plugins are looked up in ``plugins`` when a run starts, so plugins added or changed since
+    # the Orchestrator was built are used; ``use_case_prompts`` adds prompts of its own on top
+    plugins: PluginManager = Field(default_factory=lambda: plugin_manager)
     use_case_prompts: Dict[str, Callable] = Field(default_factory=dict)
+    active_runs: Dict[str, RunContext] = Field(default_factory=dict)
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     def __init__(self, **data):
         super().__init__(**data)
+        if self.workers is None:
+            self.workers = SAAsWorkers(
+                self.settings.num_workers,
+                worker_concurrency=self.settings.worker_concurrency,
+                max_concurrent_tasks=self.settings.max_concurrent_tasks,
+                model=self.settings.sub_assistant_model,
+            )
+        if self.plan_cache is None and self.settings.plan_cache_enabled:
+            self.plan_cache = PlanCache(
+                similarity_threshold=self.settings.plan_cache_similarity_threshold
+            )
         os.makedirs(self.output_dir, exist_ok=True)
-        self.use_case_prompts = plugin_manager.get_use_case_prompts()
 
-    async def run_workflow(self, objective: str, use_case: Optional[str] = None) -> str:
-        logger.info(f"Starting workflow with objective: {objective}")
-        self.state.task_exchanges.append(TaskExchange(role="user", content=objective))
+    def get_use_case_prompts(self) -> Dict[str, Callable]:
+        return {**self.plugins.get_use_case_prompts(), **self.use_case_prompts}
+
+    async def run_workflow(
+        self,
+        objective: str,
+        use_case: Optional[str] = None,
+        on_event: Optional[EventHandler] = None,
+        run_id: Optional[str] = None,
+        stream_tokens: bool = True,
+    ) -> str:
+        """Run a workflow in its own ``RunContext``, reporting its events to ``on_event``."""
+        # Run IDs can come from HTTP requests and name the run's log, checkpoint and workspace
+        run_id = validate_run_id(run_id) if run_id is not None else new_run_id()
+        checkpoint = None
+        if self.settings.checkpoints_enabled:
+            checkpoint = RunCheckpoint(self._checkpoint_dir(), run_id)
+        return await self._start_run(
+            objective, use_case, run_id, checkpoint, on_event=on_event, stream_tokens=stream_tokens
+        )
+
+    async def resume_workflow(self, run_id: str, on_event: Optional[EventHandler] = None) -> str:
+        """Resume the checkpointed run ``run_id`` with its original objective and plugin."""
+        checkpoint = load_checkpoint(self._checkpoint_dir(), validate_run_id(run_id))
+        return await self._start_run(
+            checkpoint.objective, checkpoint.use_case, run_id, checkpoint, on_event=on_event
+        )
+
+    async def _start_run(
+        self,
+        objective: str,
+        use_case: Optional[str],
+        run_id: str,
+        checkpoint: Optional[RunCheckpoint],
+        on_event: Optional[EventHandler] = None,
+        stream_tokens: bool = True,
+    ) -> str:
+        if run_id in self.active_runs:
+            raise WorkflowError(f"Run {run_id} is already running")
+        run = RunContext(
+            run_id,
+            os.path.join(self.output_dir, "workspaces", run_id),
+            ExchangeLog(self.exchange_log_file(run_id)),
+            checkpoint=checkpoint,
+            on_event=on_event,
+            stream_tokens=stream_tokens,
+        )
+        self.active_runs[run_id] = run
+        try:
+            with deadline_scope(self.settings.workflow_timeout), workspace_scope(
+                run.workspace
+            ), plugin_scope(use_case):
+                return await self._run_workflow(objective, use_case, run)
+        finally:
+            del self.active_runs[run_id]
+            self.state = run.records.to_state()
+            await run.close()
+
+    async def _run_workflow(self, objective: str, use_case: Optional[str], run: RunContext) -> str:
+        emit, checkpoint = run.emit, run.checkpoint
+        logger.info(f"Starting workflow {run.run_id} with objective: {objective}")
+
+        if checkpoint is not None:
+            checkpoint.start(objective, use_case, self._checkpoint_settings())
+            logger.info(f"Checkpointing run {checkpoint.run_id} to {checkpoint.path}")
+            if checkpoint.final_output is not None:
+                logger.info(f"Run {checkpoint.run_id} already completed")
+                emit(WorkflowEvent(type="final", content=checkpoint.final_output))
+                return checkpoint.final_output
+        run.log_exchange("user", objective)
 
         try:
-            main_assistant = create_assistant(
+            main_assistant = get_assistant(
                 "MainAssistant",
                 self.settings.main_assistant_model,
                 "You are an expert task coordinator and synthesizer.",
                 additional_tools=self.settings.additional_tools,
             )
-            refiner_assistant = create_assistant(
-                "RefinerAssistant",
-                self.settings.refiner_assistant_model,
-                "You are an expert at synthesizing and refining task results.",
-                additional_tools=self.settings.additional_tools,
-            )
 
             if use_case:
-                if use_case not in self.use_case_prompts:
+                use_case_prompts = self.get_use_case_prompts()
+                if use_case not in use_case_prompts:
                     raise WorkflowError(f"Plugin '{use_case}' not found")
-                prompt = self.use_case_prompts[use_case](objective)
+                prompt = use_case_prompts[use_case](objective)
             else:
                 prompt = self._generate_main_prompt(objective)
 
-            plan_result: PlanResponse = await self.workers.plan_tasks(prompt, main_assistant)
-
-            if plan_result.objective_completion:
-                final_output = plan_result.explanation
-                self.state.task_exchanges.append(
-                    TaskExchange(role="main_assistant", content=final_output)
-                )
-            else:
-                tasks = plan_result.tasks if plan_result.tasks else []
-                self.state.task_exchanges.append(
-                    TaskExchange(role="main_assistant", content="\n".join([t.task for t in tasks]))
+            # Tasks go to the workers as soon as the planner has written them, unless a token
+            # budget needs the whole plan to size each task's output cap
+            stream: Optional[TaskStream] = None
+            execution: Optional[asyncio.Task] = None
+
+            def announce(index: int, task: WorkerTask):
+                # Streamed tasks start before the plan event, so each one is announced first
+                emit(
+                    WorkflowEvent(
+                        type="task_dispatched",
+                        source=f"task-{index}",
+                        data={"index": index, "task": task.task},
+                    )
                 )
 
-                results = await self.workers.process_tasks(tasks)
-                for result in results:
-                    self.state.tasks.append(
-                        Task(task=result.task, prompt=result.prompt, result=result.result)
+            def dispatch(task: WorkerTask):
+                nonlocal stream, execution
+                if execution is None:
+                    stream = TaskStream()
+                    execution = asyncio.create_task(
+                        self._execute_and_refine(objective, stream, self._refiner_assistant(), run)
                     )
-                    self.state.task_exchanges.append(
-                        TaskExchange(role="sub_assistant", content=result.result)
+                announce(len(stream.tasks), task)
+                stream.put(task)
+
+            on_task = dispatch if self.settings.workflow_token_budget is None else None
+            try:
+                if checkpoint is not None and checkpoint.plan is not None:
+                    logger.info(f"Resuming run {checkpoint.run_id} from its checkpointed plan")
+                    plan_result = checkpoint.plan.model_copy(
+                        update={"tasks": checkpoint.restored_tasks() or None}
+                    )
+                else:
+                    plan_result = await self._plan(
+                        objective, use_case, prompt, main_assistant, on_task=on_task
                     )
 
-                final_output = await self.workers.summarize_results(
-                    objective, results, refiner_assistant
-                )
-                self.state.task_exchanges.append(
-                    TaskExchange(role="refiner_assistant", content=final_output)
-                )
-
-            self._save_exchange_log(objective, final_output)
-            logger.info("Workflow completed and exchange log saved")
+                if plan_result.objective_completion:
+                    if execution is not None:
+                        logger.info("Plan completes the objective; cancelling dispatched tasks")
+                        execution.cancel()
+                    final_output = plan_result.explanation
+                    emit(WorkflowEvent(type="plan", source="planner", content=final_output))
+                    run.log_exchange("main_assistant", final_output)
+                else:
+                    tasks = plan_result.tasks if plan_result.tasks else []
+                    if stream is not None:
+                        # Streamed tasks are a prefix of the plan; dispatch whatever is left
+                        for task in tasks[len(stream.tasks) :]:
+                            dispatch(task)
+                        stream.close()
+                        tasks = plan_result.tasks = list(stream.tasks)
+                    if checkpoint is not None and checkpoint.plan is None:
+                        checkpoint.save_plan(plan_result)
+                    emit(
+                        WorkflowEvent(
+                            type="plan",
+                            source="planner",
+                            content=plan_result.explanation,
+                            data={"tasks": [t.task for t in tasks]},
+                        )
+                    )
+                    run.log_exchange("main_assistant", "\n".join([t.task for t in tasks]))
+
+                    if execution is not None:
+                        results, final_output = await execution
+                    else:
+                        for index, task in enumerate(tasks):
+                            announce(index, task)
+                        max_output_tokens = self._task_output_cap(prompt, plan_result, tasks)
+                        results, final_output = await self._execute_and_refine(
+                            objective,
+                            tasks,
+                            self._refiner_assistant(),
+                            run,
+                            max_output_tokens=max_output_tokens,
+                        )
+                    # Task results were written to the exchange log as each task finished
+                    for result in results:
+                        run.records.add_task(result.task, result.prompt, result.result)
+
+                    run.log_exchange("refiner_assistant", final_output)
+            finally:
+                if execution is not None and not execution.done():
+                    execution.cancel()
+
+            if checkpoint is not None:
+                checkpoint.save_final(final_output)
+            run.exchange_log.append_final(final_output)
+            logger.info(f"Workflow completed; exchange log at {run.exchange_log.path}")
+            emit(WorkflowEvent(type="final", content=final_output))
 
             return final_output
 
+        except WorkflowTimeoutError:
+            raise
         except AssistantError as e:
             logger.error(f"Assistant error: {str(e)}")
             raise WorkflowError(f"Workflow failed due to assistant error: {str(e)}")
@@ -128,6 +406,247 @@ class Orchestrator(BaseModel):
             logger.exception("Unexpected error in workflow execution")
             raise WorkflowError(f"Unexpected error in workflow execution: {str(e)}")
 
+    async def _execute_and_refine(
+        self,
+        objective: str,
+        tasks: Union[List[WorkerTask], TaskStream],
+        refiner_assistant,
+        run: RunContext,
+        max_output_tokens: Optional[int] = None,
+    ) -> Tuple[List[WorkerTask], str]:
+        on_token = self._task_token_handler(run.emit) if run.streaming else None
+        refiner_on_token = self._refiner_token_handler(run.emit) if run.streaming else None
+        completed: Optional[asyncio.Queue] = None
+        if self.settings.progressive_refinement and tasks:
+            completed = asyncio.Queue()
+            # Tasks restored from a checkpoint do not run again but still need to be folded in
+            if isinstance(tasks, list):
+                for task in tasks:
+                    if task.result is not None:
+                        completed.put_nowait(task)
+
+        def on_complete(index: int, task: WorkerTask):
+            if run.checkpoint is not None:
+                run.checkpoint.save_task(index, task)
+            run.exchange_log.append("sub_assistant", task.result)
+            run.emit(
+                WorkflowEvent(
+                    type="task_completed",
+                    source=f"task-{index}",
+                    content=task.result,
+                    data={"task": task.task},
+                )
+            )
+            if completed is not None:
+                completed.put_nowait(task)
+
+        budget = self._decomposition_budget()
+
+        async def process_tasks() -> Tuple[List[WorkerTask], int]:
+            with deadline_scope(deadline=self._worker_deadline()):
+                results = await self.workers.process_tasks(
+                    tasks,
+                    on_token=on_token,
+                    on_complete=on_complete,
+                    max_output_tokens=max_output_tokens,
+                    decompose=partial(self._decompose, depth=1, budget=budget) if budget else None,
+                    slots=budget.slots if budget else None,
+                )
+            finished = self._finished_tasks(results)
+            return finished, len(results) - len(finished)
+
+        if completed is None:
+            results, _ = await process_tasks()
+            final_output = await self.workers.summarize_results(
+                objective, results, refiner_assistant, on_token=refiner_on_token
+            )
+            return results, final_output
+
+        async def summarize_progressively() -> str:
+            # A streamed plan's size is only known once the planner has finished
+            total = await tasks.wait_closed() if isinstance(tasks, TaskStream) else len(tasks)
+            return await self.workers.summarize_progressively(
+                objective, completed, total, refiner_assistant, on_token=refiner_on_token
+            )
+
+        summary = asyncio.create_task(summarize_progressively())
+        try:
+            results, unfinished = await process_tasks()
+            # Tasks that will not finish still count towards the progressive summary's total
+            for _ in range(unfinished):
+                completed.put_nowait(None)
+            return results, await summary
+        finally:
+            if not summary.done():
+                summary.cancel()
+
+    def _checkpoint_dir(self) -> str:
+        return self.settings.checkpoint_dir or os.path.join(self.output_dir, "runs")
+
+    def _exchange_log_dir(self) -> str:
+        return self.settings.exchange_log_dir or os.path.join(self.output_dir, "exchange_logs")
+
+    def _checkpoint_settings(self) -> Dict[str, Any]:
+        # Tools are objects and cannot be restored from JSON
+        return self.settings.model_dump(mode="json", exclude={"additional_tools"})
+
+    def _decomposition_budget(self) -> Optional[DecompositionBudget]:
+        if self.settings.decomposition_max_depth <= 0:
+            return None
+        return DecompositionBudget(
+            self.settings.decomposition_max_depth,
+            self.settings.decomposition_max_tasks,
+            self.settings.decomposition_max_concurrency or self.workers.capacity,
+        )
+
+    async def _decompose(
+        self, task: WorkerTask, depth: int, budget: DecompositionBudget
+    ) -> Optional[str]:
+        """Run ``task`` as a sub-workflow on the shared worker pool.
+
+        Returns None, so the task runs directly, once the depth or fan-out budget is used up or
+        the sub-plan has fewer than two tasks.
+        """
+        if depth > budget.max_depth or budget.remaining_tasks < 2:
+            return None
+
+        main_assistant = get_assistant(
+            "MainAssistant",
+            self.settings.main_assistant_model,
+            "You are an expert task coordinator and synthesizer.",
+            additional_tools=self.settings.additional_tools,
+        )
+        async with budget.slots:
+            plan_result = await self.workers.plan_tasks(task.prompt, main_assistant)
+        if plan_result.objective_completion:
+            return plan_result.explanation
+        subtasks = plan_result.tasks or []
+        if len(subtasks) < 2 or not budget.reserve(len(subtasks)):
+            return None
+
+        logger.info(f"Decomposed '{task.task}' into {len(subtasks)} subtasks at depth {depth}")
+        results = await self.workers.process_tasks(
+            subtasks,
+            decompose=partial(self._decompose, depth=depth + 1, budget=budget),
+            slots=budget.slots,
+        )
+        finished = [subtask for subtask in results if subtask.result is not None]
+        if not finished:
+            raise WorkerError(f"No subtask of '{task.task}' finished")
+        async with budget.slots:
+            return await self.workers.summarize_results(
+                task.prompt, finished, self._refiner_assistant()
+            )
+
+    def _refiner_assistant(self):
+        return get_assistant(
+            "RefinerAssistant",
+            self.settings.refiner_assistant_model,
+            "You are an expert at synthesizing and refining task results.",
+            additional_tools=self.settings.additional_tools,
+        )
+
+    def _worker_deadline(self) -> Optional[float]:
+        """Deadline for the worker phase, leaving time for the refiner to run on the results."""
+        deadline = current_deadline()
+        if deadline is None:
+            return None
+        return deadline - min(self.settings.refiner_reserve_seconds, remaining() / 2)
+
+    def _finished_tasks(self, results: List[WorkerTask]) -> List[WorkerTask]:
+        finished = [task for task in results if task.result is not None]
+        if len(finished) == len(results):
+            return finished
+        unfinished = len(results) - len(finished)
+        if self.settings.partial_results_policy == "fail" or not finished:
+            raise WorkflowTimeoutError(
+                f"{unfinished} of {len(results)} tasks did not finish before the deadline"
+            )
+        logger.warning(f"Refining the {len(finished)} tasks that finished; {unfinished} timed out")
+        return finished
+
+    def _task_output_cap(
+        self, plan_prompt: str, plan_result: PlanResponse, tasks: List[WorkerTask]
+    ) -> Optional[int]:
+        if self.settings.workflow_token_budget is None:
+            return None
+
+        planner_model = self.settings.main_assistant_model
+        worker_model = self.settings.sub_assistant_model
+        spent = estimate_tokens(plan_prompt, planner_model) + estimate_tokens(
+            plan_result.model_dump_json(), planner_model
+        )
+        task_inputs = sum(estimate_tokens(task.prompt, worker_model) for task in tasks)
+        cap = task_output_cap(
+            len(tasks), spent, task_inputs, budget=self.settings.workflow_token_budget
+        )
+        logger.info(f"Capping worker output at {cap} tokens per task")
+        return cap
+
+    async def stream_workflow(
+        self,
+        objective: str,
+        use_case: Optional[str] = None,
+        run_id: Optional[str] = None,
+        stream_tokens: bool = True,
+    ) -> AsyncIterator[WorkflowEvent]:
+        queue: asyncio.Queue = asyncio.Queue()
+        run = asyncio.create_task(
+            self.run_workflow(
+                objective,
+                use_case,
+                on_event=queue.put_nowait,
+                run_id=run_id,
+                stream_tokens=stream_tokens,
+            )
+        )
+        run.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+            await run
+        finally:
+            if not run.done():
+                run.cancel()
+
+    @staticmethod
+    def _task_token_handler(emit: EventHandler) -> Callable[[int, str], None]:
+        return lambda index, chunk: emit(
+            WorkflowEvent(type="token", source=f"task-{index}", content=chunk)
+        )
+
+    @staticmethod
+    def _refiner_token_handler(emit: EventHandler) -> Callable[[str], None]:
+        return lambda chunk: emit(WorkflowEvent(type="token", source="refiner", content=chunk))
+
+    def _plan_cache_namespace(self, use_case: Optional[str]) -> str:
+        namespace = use_case or ""
+        if self.settings.custom_prompt_template:
+            template = self.settings.custom_prompt_template.encode("utf-8")
+            namespace += f"#template:{hashlib.sha256(template).hexdigest()[:12]}"
+        return namespace
+
+    async def _plan(
+        self,
+        objective: str,
+        use_case: Optional[str],
+        prompt: str,
+        main_assistant,
+        on_task: Optional[Callable[[WorkerTask], None]] = None,
+    ) -> PlanResponse:
+        if self.plan_cache is None:
+            return await self.workers.plan_tasks(prompt, main_assistant, on_task=on_task)
+
+        namespace = self._plan_cache_namespace(use_case)
+        plan_result = self.plan_cache.get(objective, namespace)
+        if plan_result is None:
+            plan_result = await self.workers.plan_tasks(prompt, main_assistant, on_task=on_task)
+            self.plan_cache.put(objective, plan_result, namespace)
+        return plan_result
+
     def _generate_main_prompt(self, objective: str) -> str:
         if self.settings.custom_prompt_template:
             return self.settings.custom_prompt_template.format(objective=objective)
@@ -148,17 +667,5 @@ class Orchestrator(BaseModel):
         Your response will be used to guide the task execution, so be thorough and specific.
         """
 
-    def _save_exchange_log(self, objective: str, final_output: str):
-        log_content = "# SAA Orchestrator Exchange Log\n\n"
-        log_content += f"## Objective\n{objective}\n\n"
-        log_content += "## Task Breakdown and Execution\n\n"
-
-        for exchange in self.state.task_exchanges:
-            log_content += f"### {exchange.role.capitalize()}\n{exchange.content}\n\n"
-
-        log_content += f"## Final Output\n{final_output}\n"
-
-        log_file_path = os.path.join(self.output_dir, "exchange_log.md")
-        with open(log_file_path, "w") as f:
-            f.write(log_content)
-        logger.info(f"Exchange log saved to: {log_file_path}")
+    def exchange_log_file(self, run_id: str) -> str:
+        return exchange_log_path(self._exchange_log_dir(), run_id)
@@ -0,0 +1,147 @@
+import math
+import re
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.config import settings
+from src.utils.logging import setup_logging
+from src.workers import PlanResponse
+
+logger = setup_logging()
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize_objective(objective: str) -> str:
+    return " ".join(_TOKEN_RE.findall(objective.lower()))
+
+
+class _TfidfIndex:
+    """TF-IDF vectors for the cached objectives of one namespace."""
+
+    def __init__(self):
+        self.keys: List[str] = []
+        self._docs: List[Counter] = []
+        self._vocabulary: Dict[str, int] = {}
+        self._idf: Optional[np.ndarray] = None
+        self._matrix: Optional[np.ndarray] = None
+
+    def add(self, key: str):
+        self.keys.append(key)
+        self._docs.append(Counter(key.split()))
+        self._matrix = None
+
+    def remove(self, key: str):
+        index = self.keys.index(key)
+        del self.keys[index]
+        del self._docs[index]
+        self._matrix = None
+
+    def _build(self):
+        document_frequency: Counter = Counter()
+        for doc in self._docs:
+            document_frequency.update(doc.keys())
+        self._vocabulary = {term: i for i, term in enumerate(document_frequency)}
+        n_docs = len(self._docs)
+        self._idf = np.array(
+            [
+                math.log((1 + n_docs) / (1 + document_frequency[term])) + 1
+                for term in self._vocabulary
+            ]
+        )
+        matrix = np.zeros((n_docs, len(self._vocabulary)))
+        for row, doc in enumerate(self._docs):
+            for term, count in doc.items():
+                matrix[row, self._vocabulary[term]] = count
+        matrix *= self._idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self._matrix = matrix / np.where(norms == 0, 1, norms)
+
+    def most_similar(self, key: str) -> Optional[Tuple[str, float]]:
+        if not self.keys:
+            return None
+        if self._matrix is None:
+            self._build()
+
+        query = np.zeros(len(self._vocabulary))
+        # Terms unseen in the index still count towards the query norm
+        oov_weight = math.log(1 + len(self._docs)) + 1
+        oov_norm = 0.0
+        for term, count in Counter(key.split()).items():
+            index = self._vocabulary.get(term)
+            if index is None:
+                oov_norm += (count * oov_weight) ** 2
+            else:
+                query[index] = count * self._idf[index]
+        norm = math.sqrt(float(query @ query) + oov_norm)
+        if norm == 0:
+            return None
+
+        scores = self._matrix @ (query / norm)
+        best = int(np.argmax(scores))
+        return self.keys[best], float(scores[best])
+
+
+class PlanCache:
+    def __init__(
+        self,
+        max_entries: int = settings.PLAN_CACHE_MAX_ENTRIES,
+        similarity_threshold: float = settings.PLAN_CACHE_SIMILARITY_THRESHOLD,
+    ):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._plans: "OrderedDict[Tuple[str, str], PlanResponse]" = OrderedDict()
+        self._indexes: Dict[str, _TfidfIndex] = {}
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        return (self.exact_hits + self.similar_hits) / lookups if lookups else 0.0
+
+    def get(self, objective: str, namespace: str = "") -> Optional[PlanResponse]:
+        key = normalize_objective(objective)
+        plan = self._plans.get((namespace, key))
+        if plan is not None:
+            self.exact_hits += 1
+            self._plans.move_to_end((namespace, key))
+            logger.info(f"Plan cache exact hit (hit rate {self.hit_rate:.0%})")
+            return plan.model_copy(deep=True)
+
+        index = self._indexes.get(namespace)
+        match = index.most_similar(key) if index else None
+        if match is not None and match[1] >= self.similarity_threshold:
+            self.similar_hits += 1
+            self._plans.move_to_end((namespace, match[0]))
+            logger.info(
+                f"Plan cache similarity hit: score {match[1]:.3f} for '{match[0]}' "
+                f"(hit rate {self.hit_rate:.0%})"
+            )
+            return self._plans[(namespace, match[0])].model_copy(deep=True)
+
+        self.misses += 1
+        if match is not None:
+            logger.info(
+                f"Plan cache miss: best similarity {match[1]:.3f} is below "
+                f"{self.similarity_threshold} (hit rate {self.hit_rate:.0%})"
+            )
+        return None
+
+    def put(self, objective: str, plan: PlanResponse, namespace: str = ""):
+        key = normalize_objective(objective)
+        if (namespace, key) not in self._plans:
+            self._indexes.setdefault(namespace, _TfidfIndex()).add(key)
+        self._plans[(namespace, key)] = plan.model_copy(deep=True)
+        self._plans.move_to_end((namespace, key))
+
+        while len(self._plans) > self.max_entries:
+            (evicted_namespace, evicted_key), _ = self._plans.popitem(last=False)
+            self._indexes[evicted_namespace].remove(evicted_key)
+            logger.info(f"Plan cache evicted '{evicted_key}' ({evicted_namespace or 'default'})")
+
+    def __len__(self) -> int:
+        return len(self._plans)
@@ -0,0 +1,131 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from src.utils.logging import setup_logging
+
+logger = setup_logging()
+
+_FENCE = re.compile(r"```[\w-]*\s*(.*?)```", re.DOTALL)
+
+
+def strip_trailing_commas(text: str) -> str:
+    """Drop commas directly before a closing ``}`` or ``]``, leaving string contents alone."""
+    out = []
+    in_string = escape = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == ",":
+            following = index + 1
+            while following < len(text) and text[following].isspace():
+                following += 1
+            if following < len(text) and text[following] in "}]":
+                continue
+        out.append(char)
+    return "".join(out)
+
+
+def repair_json(text: str) -> str:
+    """Undo the usual ways LLMs wrap JSON: code fences, surrounding prose, trailing commas."""
+    fenced = _FENCE.search(text)
+    if fenced and "{" in fenced.group(1):
+        text = fenced.group(1)
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        text = text[start : end + 1]
+    return strip_trailing_commas(text)
+
+
+def load_json(text: str) -> Any:
+    """``json.loads``, retrying once on the repaired text; raises ``json.JSONDecodeError``."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(repair_json(text))
+
+
+class PlanStreamParser:
+    """Incrementally scans a planner response and returns each task object once it closes.
+
+    Only the structure is tracked (object depth, strings and the ``"tasks"`` key of the top-level
+    object), so prose or fences around the JSON are skipped. Once a task fails to parse no more
+    are returned, keeping the streamed tasks a prefix of the fully parsed plan.
+    """
+
+    def __init__(self, tasks_key: str = "tasks"):
+        self.tasks_key = tasks_key
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key: Optional[str] = None
+        self._in_tasks = False
+        self._task_start: Optional[int] = None
+        self._broken = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self.text += chunk
+        closed = []
+        text = self.text
+        while self._pos < len(text):
+            char = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = text[self._string_start + 1 : self._pos]
+            elif self._depth == 0:
+                # Prose before the plan object
+                if char == "{":
+                    self._depth = 1
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif char in "{[":
+                self._depth += 1
+                if char == "[" and self._depth == 2 and self._last_key == self.tasks_key:
+                    self._in_tasks = True
+                elif char == "{" and self._in_tasks and self._depth == 3:
+                    self._task_start = self._pos
+            elif char in "}]":
+                if char == "}" and self._depth == 3 and self._task_start is not None:
+                    task = self._parse_task(text[self._task_start : self._pos + 1])
+                    if task is not None:
+                        closed.append(task)
+                    self._task_start = None
+                elif char == "]" and self._depth == 2:
+                    self._in_tasks = False
+                self._depth -= 1
+            self._pos += 1
+        return closed
+
+    def _parse_task(self, text: str) -> Optional[Dict[str, Any]]:
+        if self._broken:
+            return None
+        try:
+            task = json.loads(strip_trailing_commas(text))
+        except json.JSONDecodeError:
+            task = None
+        if not isinstance(task, dict):
+            logger.warning("Could not parse a streamed plan task; waiting for the full plan")
+            self.stop()
+            return None
+        return task
+
+    def stop(self):
+        """Stop returning tasks, e.g. after the caller rejected one."""
+        self._broken = True
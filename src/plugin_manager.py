@@ -1,12 +1,37 @@
+import ast
+import hashlib
+import importlib
 import importlib.util
+import json
 import os
-from typing import Callable, Dict
+import sys
+import threading
+import time
+from importlib.metadata import entry_points
+from typing import Any, Callable, Dict, List, Optional
 
 import pluggy
+from pydantic import BaseModel
+
+from src.config import settings
+from src.utils.exceptions import PluginError
+from src.utils.logging import setup_logging
+
+logger = setup_logging()
 
 hookspec = pluggy.HookspecMarker("saa_orchestrator")
 hookimpl = pluggy.HookimplMarker("saa_orchestrator")
 
+# Installed packages expose plugins as ``name = "package.module:PluginClass"`` in this group
+ENTRY_POINT_GROUP = "saa_orchestrator.plugins"
+
+
+def _entry_points(group: str):
+    # ``entry_points(group=...)`` only exists from Python 3.10
+    if sys.version_info >= (3, 10):
+        return entry_points(group=group)
+    return entry_points().get(group, [])
+
 
 class PluginSpec:
     @hookspec
@@ -14,40 +39,261 @@ class PluginSpec:
         """Generate a prompt for a specific use case."""
 
 
+class PluginManifestEntry(BaseModel):
+    name: str
+    description: str = ""
+    path: Optional[str] = None
+    entry_point: Optional[str] = None
+    sha256: str = ""
+
+
+def scan_plugin_source(source: bytes, filename: str = "<plugin>") -> Dict[str, str]:
+    """Map each ``*Plugin`` class defined in ``source`` to its description, without executing it.
+
+    The description is the docstring of ``get_use_case_prompt``, falling back to the class
+    docstring.
+    """
+    plugins = {}
+    for node in ast.parse(source, filename=filename).body:
+        if not isinstance(node, ast.ClassDef) or not node.name.endswith("Plugin"):
+            continue
+        description = ""
+        for item in node.body:
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                if item.name == "get_use_case_prompt":
+                    description = ast.get_docstring(item) or ""
+        plugins[node.name] = description or ast.get_docstring(node) or ""
+    return plugins
+
+
+class LazyUseCasePrompt:
+    """Use-case prompt callable that imports its plugin the first time it is called."""
+
+    def __init__(self, manager: "PluginManager", name: str, description: str):
+        self.manager = manager
+        self.name = name
+        self.__doc__ = description
+
+    def __call__(self, objective: str) -> str:
+        return self.manager.get_plugin(self.name).get_use_case_prompt(objective=objective)
+
+
 class PluginManager:
-    def __init__(self):
+    def __init__(
+        self,
+        manifest_file: Optional[str] = settings.PLUGIN_MANIFEST_FILE,
+        reload_interval: float = settings.PLUGIN_RELOAD_INTERVAL,
+    ):
         self.manager = pluggy.PluginManager("saa_orchestrator")
         self.manager.add_hookspecs(PluginSpec)
+        self.manifest_file = manifest_file
+        self.reload_interval = reload_interval
+        self.plugin_folders: List[str] = []
+
+        # Manifest cache: path -> {"mtime_ns", "sha256", "plugins": {name: description}}
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+        self._manifest_loaded = False
+        self._manifest_dirty = False
+        self._entries: Dict[str, PluginManifestEntry] = {}
+        self._loaded: Dict[str, Any] = {}
+        self._prompts: Optional[Dict[str, Callable]] = None
+        self._last_refresh: Optional[float] = None
+        self._lock = threading.RLock()
 
     def register_plugin(self, plugin):
         self.manager.register(plugin)
 
     def load_plugins(self, plugin_folder: str):
-        if not os.path.exists(plugin_folder):
-            return
+        """Index the ``*_plugin.py`` files in ``plugin_folder``; modules are imported on selection."""
+        folder = os.path.abspath(plugin_folder)
+        with self._lock:
+            if folder not in self.plugin_folders:
+                self.plugin_folders.append(folder)
+            self.refresh(force=True)
+
+    def discover_entry_points(self, group: str = ENTRY_POINT_GROUP):
+        """Index plugins advertised by installed packages under the ``group`` entry point."""
+        with self._lock:
+            self._load_manifest()
+            for entry_point in _entry_points(group):
+                module_name, _, attribute = entry_point.value.partition(":")
+                name = attribute.split(".")[-1] or entry_point.name
+                self._entries[name] = PluginManifestEntry(
+                    name=name,
+                    description=self._entry_point_description(module_name, name),
+                    entry_point=entry_point.value,
+                )
+            self._prompts = None
+            self._save_manifest()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Re-index plugin files whose mtime changed; returns whether any plugin changed.
 
-        for filename in os.listdir(plugin_folder):
-            if filename.endswith("_plugin.py"):
-                module_name = filename[:-3]  # Remove '.py'
-                module_path = os.path.join(plugin_folder, filename)
-                try:
-                    spec = importlib.util.spec_from_file_location(module_name, module_path)
-                    module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(module)
-                    for item_name in dir(module):
-                        item = getattr(module, item_name)
-                        if isinstance(item, type) and item_name.endswith("Plugin"):
-                            plugin_instance = item()
-                            self.register_plugin(plugin_instance)
-                except Exception:
-                    pass  # Silently ignore any loading errors
+        Unless ``force`` is set this runs at most once per ``reload_interval`` seconds. Changed
+        or deleted plugins are unregistered so the next selection imports the new code.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                not force
+                and self._last_refresh is not None
+                and now - self._last_refresh < self.reload_interval
+            ):
+                return False
+            self._last_refresh = now
+            self._load_manifest()
+
+            found: Dict[str, PluginManifestEntry] = {}
+            for folder in self.plugin_folders:
+                if not os.path.isdir(folder):
+                    continue
+                for filename in sorted(os.listdir(folder)):
+                    if not filename.endswith("_plugin.py"):
+                        continue
+                    path = os.path.join(folder, filename)
+                    record = self._scan_file(path)
+                    if record is None:
+                        continue
+                    for name, description in record["plugins"].items():
+                        found[name] = PluginManifestEntry(
+                            name=name, description=description, path=path, sha256=record["sha256"]
+                        )
+
+            changed = False
+            for name, entry in list(self._entries.items()):
+                if entry.path is None:
+                    continue
+                if name not in found or found[name].sha256 != entry.sha256:
+                    self._unload(name)
+                    del self._entries[name]
+                    changed = True
+            for name, entry in found.items():
+                if name not in self._entries:
+                    self._entries[name] = entry
+                    changed = True
+
+            if changed:
+                self._prompts = None
+            self._save_manifest()
+            return changed
+
+    def get_plugin(self, name: str) -> Any:
+        """Return the plugin instance for ``name``, importing its module on first use."""
+        self.refresh()
+        with self._lock:
+            plugin = self._loaded.get(name)
+            if plugin is not None:
+                return plugin
+            entry = self._entries.get(name)
+            if entry is None:
+                raise PluginError(f"Plugin '{name}' not found")
+
+            plugin = self._import(entry)
+            self.manager.register(plugin, name=f"{name}-{entry.sha256[:12]}")
+            self._loaded[name] = plugin
+            logger.info(f"Loaded plugin {name}")
+            return plugin
 
     def get_use_case_prompts(self) -> Dict[str, Callable]:
-        prompts = {}
+        self.refresh()
+        with self._lock:
+            if self._prompts is None:
+                self._prompts = {
+                    name: LazyUseCasePrompt(self, name, entry.description)
+                    for name, entry in self._entries.items()
+                }
+            prompts = dict(self._prompts)
+
+        # Plugins registered directly rather than discovered from files or entry points
         for hook_impl in self.manager.hook.get_use_case_prompt.get_hookimpls():
             plugin_name = hook_impl.plugin.__class__.__name__
-            prompts[plugin_name] = hook_impl.function
+            prompts.setdefault(plugin_name, hook_impl.function)
         return prompts
 
+    def _scan_file(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+            record = self._manifest.get(path)
+            if record is not None and record["mtime_ns"] == mtime_ns:
+                return record
+
+            with open(path, "rb") as plugin_file:
+                source = plugin_file.read()
+            sha256 = hashlib.sha256(source).hexdigest()
+            if record is None or record["sha256"] != sha256:
+                record = {"sha256": sha256, "plugins": scan_plugin_source(source, path)}
+            record["mtime_ns"] = mtime_ns
+        except (OSError, SyntaxError, ValueError) as e:
+            logger.error(f"Skipping plugin file {path}: {str(e)}")
+            self._manifest.pop(path, None)
+            return None
+
+        self._manifest[path] = record
+        self._manifest_dirty = True
+        return record
+
+    def _entry_point_description(self, module_name: str, name: str) -> str:
+        try:
+            spec = importlib.util.find_spec(module_name)
+        except (ImportError, ValueError) as e:
+            logger.error(f"Cannot locate plugin module {module_name}: {str(e)}")
+            return ""
+        if spec is None or not spec.origin or not spec.origin.endswith(".py"):
+            return ""
+        record = self._scan_file(spec.origin)
+        return record["plugins"].get(name, "") if record else ""
+
+    def _import(self, entry: PluginManifestEntry) -> Any:
+        try:
+            if entry.entry_point is not None:
+                module_name, _, attribute = entry.entry_point.partition(":")
+                item = importlib.import_module(module_name)
+                for part in attribute.split("."):
+                    item = getattr(item, part)
+            else:
+                module_name = f"saa_plugin_{entry.name}_{entry.sha256[:12]}"
+                spec = importlib.util.spec_from_file_location(module_name, entry.path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                item = getattr(module, entry.name)
+            return item() if isinstance(item, type) else item
+        except Exception as e:
+            source = entry.entry_point or entry.path
+            logger.error(f"Error loading plugin {entry.name} from {source}: {str(e)}")
+            raise PluginError(f"Error loading plugin '{entry.name}' from {source}: {str(e)}")
+
+    def _unload(self, name: str):
+        plugin = self._loaded.pop(name, None)
+        if plugin is not None:
+            self.manager.unregister(plugin)
+            logger.info(f"Plugin {name} changed on disk and will be reloaded")
+
+    def _load_manifest(self):
+        if self._manifest_loaded:
+            return
+        self._manifest_loaded = True
+        if not self.manifest_file or not os.path.exists(self.manifest_file):
+            return
+        try:
+            with open(self.manifest_file) as manifest:
+                self._manifest = json.load(manifest)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable plugin manifest {self.manifest_file}: {str(e)}")
+
+    def _save_manifest(self):
+        if not self.manifest_file or not self._manifest_dirty:
+            return
+        try:
+            directory = os.path.dirname(self.manifest_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temporary = f"{self.manifest_file}.tmp"
+            with open(temporary, "w") as manifest:
+                json.dump(self._manifest, manifest)
+            os.replace(temporary, self.manifest_file)
+            self._manifest_dirty = False
+        except OSError as e:
+            logger.warning(f"Could not write plugin manifest {self.manifest_file}: {str(e)}")
+
 
 plugin_manager = PluginManager()
@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+from src.config import settings
+from src.token_budget import estimate_tokens
+from src.utils.logging import setup_logging
+
+logger = setup_logging()
+
+# Model name prefix -> provider whose quota the model draws from
+PROVIDERS = {"claude": "anthropic", "gpt": "openai", "gemini": "vertexai"}
+
+
+class TokenBucket:
+    """Continuously refilled bucket holding up to one minute of ``per_minute`` units.
+
+    ``reserve`` takes units immediately and returns how long the caller must wait before using
+    them; the bucket may go into debt, so concurrent callers are served in arrival order.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            self._refill()
+            # A single request larger than the bucket waits for a full bucket, not forever
+            self.level -= min(amount, self.capacity)
+            return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def charge(self, amount: float):
+        """Take units that were used without a reservation, e.g. tokens of a response."""
+        with self._lock:
+            self._refill()
+            self.level -= amount
+
+
+# A coroutine waiting for a full bulkhead checks it this often; it cannot block on a thread lock
+BULKHEAD_POLL_SECONDS = 0.02
+
+
+class Bulkhead:
+    """Process-wide cap on calls in flight, shared by threads and every event loop.
+
+    Threads wait on a condition; coroutines poll, so a waiting call never blocks its loop and
+    holds nothing when it is cancelled.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._condition:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire_sync(self):
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+
+    async def acquire(self):
+        while not self.try_acquire():
+            await asyncio.sleep(BULKHEAD_POLL_SECONDS)
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+
+class ProviderLimiter:
+    """Requests-per-minute and tokens-per-minute buckets plus a concurrency bulkhead."""
+
+    def __init__(
+        self,
+        name: str,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.concurrency = concurrency
+        # One bulkhead for sync and async callers alike, whichever thread or loop they run on
+        self.bulkhead = Bulkhead(concurrency) if concurrency else None
+
+    def _wait_time(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(tokens))
+        if wait > 0:
+            logger.info(f"Rate limit for {self.name}: waiting {wait:.2f}s")
+        return wait
+
+    async def wait(self, tokens: int):
+        """Wait until the rate budget has room for one request of about ``tokens`` tokens."""
+        wait = self._wait_time(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def wait_sync(self, tokens: int):
+        wait = self._wait_time(tokens)
+        if wait:
+            time.sleep(wait)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a bulkhead slot for the duration of the block."""
+        if self.bulkhead is not None:
+            await self.bulkhead.acquire()
+        try:
+            yield
+        finally:
+            if self.bulkhead is not None:
+                self.bulkhead.release()
+
+    @contextmanager
+    def slot_sync(self) -> Iterator[None]:
+        if self.bulkhead is not None:
+            self.bulkhead.acquire_sync()
+        try:
+            yield
+        finally:
+            if self.bulkhead is not None:
+                self.bulkhead.release()
+
+    def charge(self, tokens: int):
+        if self.tokens is not None:
+            self.tokens.charge(tokens)
+
+
+def provider_for(model: Any) -> Optional[str]:
+    if isinstance(model, str):
+        for prefix, provider in PROVIDERS.items():
+            if model.startswith(prefix):
+                return provider
+    return None
+
+
+def _api_key(provider: str) -> Optional[str]:
+    if provider == "anthropic":
+        return settings.ANTHROPIC_API_KEY
+    if provider == "openai":
+        return settings.OPENAI_API_KEY
+    return settings.PROJECT_ID
+
+
+_limiters: Dict[Tuple[str, str], ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: Any) -> Optional[ProviderLimiter]:
+    """The limiter shared by every call to ``model``'s provider with the current API key."""
+    provider = provider_for(model)
+    if provider is None:
+        return None
+    # Keys are only kept as a digest; they just need to tell quotas apart
+    key = hashlib.sha256(str(_api_key(provider)).encode("utf-8")).hexdigest()[:12]
+    with _limiters_lock:
+        if (provider, key) not in _limiters:
+            limits = settings.PROVIDER_RATE_LIMITS.get(provider, {})
+            headroom = settings.RATE_LIMIT_HEADROOM
+            _limiters[(provider, key)] = ProviderLimiter(
+                f"{provider}:{key}",
+                rpm=limits.get("rpm", 0) * headroom,
+                tpm=limits.get("tpm", 0) * headroom,
+                concurrency=settings.PROVIDER_CONCURRENCY.get(provider),
+            )
+        return _limiters[(provider, key)]
+
+
+@asynccontextmanager
+async def provider_slot(model: Any) -> AsyncIterator[Optional[ProviderLimiter]]:
+    """Hold a bulkhead slot of ``model``'s provider; yields its limiter, if any.
+
+    One slot covers a whole assistant call: its requests and tool calls run one after another.
+    """
+    limiter = get_rate_limiter(model)
+    if limiter is None:
+        yield None
+        return
+    async with limiter.slot():
+        yield limiter
+
+
+@contextmanager
+def provider_slot_sync(model: Any) -> Iterator[Optional[ProviderLimiter]]:
+    limiter = get_rate_limiter(model)
+    if limiter is None:
+        yield None
+        return
+    with limiter.slot_sync():
+        yield limiter
+
+
+async def await_quota(model: Any, prompt: str):
+    """Wait for ``model``'s provider to have room for one request sending ``prompt``."""
+    limiter = get_rate_limiter(model)
+    if limiter is not None:
+        await limiter.wait(estimate_tokens(prompt, model))
+
+
+def wait_for_quota(model: Any, prompt: str):
+    limiter = get_rate_limiter(model)
+    if limiter is not None:
+        limiter.wait_sync(estimate_tokens(prompt, model))
+
+
+def reset_rate_limiters():
+    with _limiters_lock:
+        _limiters.clear()
@@ -0,0 +1,189 @@
+import asyncio
+import email.utils
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from pydantic import BaseModel, Field
+
+from src.config import settings
+from src.deadline import remaining
+from src.utils.exceptions import CircuitOpenError
+from src.utils.logging import setup_logging
+
+logger = setup_logging()
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+# SDK error classes matched by name so no provider SDK has to be imported to classify them
+RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "RateLimitError",
+    "InternalServerError",
+    "OverloadedError",
+    "ServiceUnavailable",
+    "ResourceExhausted",
+    "DeadlineExceeded",
+    "TooManyRequests",
+}
+NON_RETRYABLE_ERRORS = (
+    CircuitOpenError,
+    AttributeError,
+    KeyError,
+    NotImplementedError,
+    TypeError,
+    ValueError,
+)
+
+
+class RetryPolicy(BaseModel):
+    max_attempts: int = Field(3, ge=1)
+    base_delay: float = Field(1.0, ge=0, description="Backoff ceiling of the first retry")
+    max_delay: float = Field(30.0, ge=0, description="Upper bound of a single wait")
+    total_budget: float = Field(60.0, ge=0, description="Seconds a call may spend retrying")
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: a uniform wait below the exponential ceiling for ``attempt`` (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def delay_for(self, error: BaseException, attempt: int) -> float:
+        delay = retry_after(error)
+        if delay is None:
+            return self.backoff(attempt)
+        return min(delay, self.max_delay)
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    if code is None:
+        # google.api_core exceptions carry the HTTP status as ``code``
+        code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether ``error`` is transient: timeouts, connection errors, 429s and 5xx responses."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    if isinstance(error, NON_RETRYABLE_ERRORS):
+        return False
+    if error.__cause__ is not None:
+        return is_retryable(error.__cause__)
+    return True
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from ``Retry-After(-ms)`` response headers."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        milliseconds = headers.get("retry-after-ms")
+        if milliseconds is not None:
+            return max(float(milliseconds) / 1000, 0.0)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            retry_at = email.utils.parsedate_to_datetime(value).timestamp()
+            return max(retry_at - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_policy(stage: Optional[str] = None, model: Any = None) -> RetryPolicy:
+    """Policy for a call: the defaults, then the stage override, then the model override.
+
+    ``RETRY_POLICY_OVERRIDES`` keys are stage names or model name prefixes (longest wins).
+    """
+    policy = {
+        "max_attempts": settings.RETRY_MAX_ATTEMPTS,
+        "base_delay": settings.RETRY_BASE_DELAY,
+        "max_delay": settings.RETRY_MAX_DELAY,
+        "total_budget": settings.RETRY_TOTAL_BUDGET,
+    }
+    overrides = settings.RETRY_POLICY_OVERRIDES
+    if stage in overrides:
+        policy.update(overrides[stage])
+    if isinstance(model, str):
+        prefixes = [key for key in overrides if key != stage and model.startswith(key)]
+        if prefixes:
+            policy.update(overrides[max(prefixes, key=len)])
+    return RetryPolicy(**policy)
+
+
+def next_delay(
+    policy: RetryPolicy, error: BaseException, attempt: int, started: float
+) -> Optional[float]:
+    """Seconds to wait before retrying after failed ``attempt``, or None to give up."""
+    if attempt + 1 >= policy.max_attempts or not is_retryable(error):
+        return None
+    delay = policy.delay_for(error, attempt)
+    if time.monotonic() - started + delay > policy.total_budget:
+        return None
+    # No point waiting for a retry that would start after the workflow deadline
+    left = remaining()
+    if left is not None and delay >= left:
+        return None
+    return delay
+
+
+async def retry_async(
+    call: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+    on_retry: Optional[Callable[[BaseException], None]] = None,
+) -> T:
+    """Await ``call()`` until it succeeds or ``policy`` gives up, re-raising the last error.
+
+    ``on_retry`` is called with the error before each retry.
+    """
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except Exception as e:
+            delay = next_delay(policy, e, attempt, started)
+            logger.error(f"Attempt {attempt + 1} failed: {str(e)}")
+            if delay is None:
+                raise
+            logger.info(f"Retrying in {delay:.2f}s")
+            if on_retry is not None:
+                on_retry(e)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+def retry_sync(
+    call: Callable[[], T],
+    policy: RetryPolicy,
+    on_retry: Optional[Callable[[BaseException], None]] = None,
+) -> T:
+    """Blocking counterpart of ``retry_async`` for synchronous callers."""
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except Exception as e:
+            delay = next_delay(policy, e, attempt, started)
+            logger.error(f"Attempt {attempt + 1} failed: {str(e)}")
+            if delay is None:
+                raise
+            logger.info(f"Retrying in {delay:.2f}s")
+            if on_retry is not None:
+                on_retry(e)
+            time.sleep(delay)
+            attempt += 1
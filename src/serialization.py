@@ -0,0 +1,80 @@
+import json
+import os
+import queue
+import threading
+from typing import Any, Dict, Iterable, Optional, Union
+
+from src.utils.logging import setup_logging
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library covers the same records
+    orjson = None
+
+logger = setup_logging()
+
+
+def dumps(record: Any) -> bytes:
+    """Serialize ``record`` to compact UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON; raises ``json.JSONDecodeError`` (orjson's error subclasses it) on bad input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_lines(records: Iterable[Any]) -> bytes:
+    """JSONL encoding of ``records``: one serialized record per line."""
+    return b"".join(dumps(record) + b"\n" for record in records)
+
+
+class JsonlWriter:
+    """Appends records to a JSONL file from a background thread.
+
+    ``append`` only queues the record, so the event loop never waits on the disk. The writer
+    drains whatever has queued up, writes it in one go and flushes, so the file survives a crash
+    of the run and nothing is kept in memory once written.
+    """
+
+    def __init__(self, path: str, name: str):
+        self.path = path
+        self.name = name
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    def append(self, record: Dict[str, Any]):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        self._queue.put(record)
+
+    def _run(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "ab") as jsonl_file:
+                while True:
+                    batch = [self._queue.get()]
+                    while True:
+                        try:
+                            batch.append(self._queue.get_nowait())
+                        except queue.Empty:
+                            break
+                    records = [record for record in batch if record is not None]
+                    jsonl_file.write(dumps_lines(records))
+                    jsonl_file.flush()
+                    if len(records) < len(batch):
+                        return
+        except OSError as e:
+            logger.error(f"Could not write {self.path}: {str(e)}")
+
+    def close(self):
+        """Wait for every queued record to be written."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
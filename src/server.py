@@ -0,0 +1,80 @@
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from src.checkpoint import RUN_ID_PATTERN
+from src.metrics import CONTENT_TYPE, REGISTRY
+from src.orchestrator import Orchestrator, OrchestratorSettings, WorkflowEvent
+from src.utils.exceptions import SAAOrchestratorError
+from src.utils.logging import setup_logging
+
+logger = setup_logging()
+
+
+class WorkflowRequest(BaseModel):
+    objective: str
+    plugin: Optional[str] = None
+    stream_tokens: bool = False
+    # With checkpoints enabled, posting the run ID of an interrupted run resumes it
+    run_id: Optional[str] = Field(None, pattern=RUN_ID_PATTERN)
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def create_app(orchestrator: Optional[Orchestrator] = None) -> FastAPI:
+    """Build the HTTP app around one warm Orchestrator shared by every request.
+
+    Each request runs in its own run context on a shallow copy, so the workers, their assistants,
+    the plan cache and the loaded plugins are created once per process instead of once per run,
+    while a finished run's state is not kept on the shared Orchestrator. Plugins added or changed
+    since startup are picked up when a request selects them.
+    """
+    app = FastAPI(title="SAA Orchestrator")
+    app.state.orchestrator = orchestrator or Orchestrator(settings=OrchestratorSettings())
+
+    def request_orchestrator() -> Orchestrator:
+        return app.state.orchestrator.model_copy()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    @app.get("/plugins")
+    async def list_plugins():
+        return {"plugins": sorted(app.state.orchestrator.get_use_case_prompts())}
+
+    @app.post("/workflows")
+    async def run_workflow(request: WorkflowRequest):
+        if request.plugin and request.plugin not in app.state.orchestrator.get_use_case_prompts():
+            raise HTTPException(status_code=404, detail=f"Plugin '{request.plugin}' not found")
+
+        async def events() -> AsyncIterator[str]:
+            event: WorkflowEvent
+            try:
+                async for event in request_orchestrator().stream_workflow(
+                    request.objective,
+                    use_case=request.plugin,
+                    run_id=request.run_id,
+                    stream_tokens=request.stream_tokens,
+                ):
+                    yield format_sse(event.type, event.model_dump())
+            except SAAOrchestratorError as e:
+                logger.error(f"Workflow request failed: {str(e)}")
+                yield format_sse("error", {"message": str(e)})
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    return app
@@ -0,0 +1,110 @@
+import math
+from functools import lru_cache
+from typing import Any, Optional
+
+from src.config import settings
+from src.utils.logging import setup_logging
+
+logger = setup_logging()
+
+# Average characters per token of each family's tokenizer on English prose. Estimates err on
+# the high side so a prompt that passes the guard also fits the real tokenizer.
+CHARS_PER_TOKEN = {
+    "claude": 3.5,
+    "gpt": 4.0,
+    "gemini": 4.0,
+}
+DEFAULT_CHARS_PER_TOKEN = 3.5
+
+
+def model_family(model: Any) -> str:
+    if isinstance(model, str):
+        for family in CHARS_PER_TOKEN:
+            if model.startswith(family):
+                return family
+    return "default"
+
+
+class TokenEstimator:
+    def __init__(self, chars_per_token: float):
+        self.chars_per_token = chars_per_token
+
+    def count(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Keep the head and tail of ``text`` within ``max_tokens``, marking the cut."""
+        if self.count(text) <= max_tokens:
+            return text
+        marker = "\n\n[... trimmed to fit the token budget ...]\n\n"
+        budget_chars = max(int(max_tokens * self.chars_per_token) - len(marker), 0)
+        head = int(budget_chars * 0.7)
+        tail = budget_chars - head
+        return text[:head] + marker + (text[-tail:] if tail else "")
+
+
+@lru_cache(maxsize=None)
+def get_estimator(family: str) -> TokenEstimator:
+    return TokenEstimator(CHARS_PER_TOKEN.get(family, DEFAULT_CHARS_PER_TOKEN))
+
+
+def estimate_tokens(text: str, model: Any = None) -> int:
+    return get_estimator(model_family(model)).count(text)
+
+
+def stage_input_limit(stage: str) -> Optional[int]:
+    return settings.STAGE_INPUT_TOKEN_LIMITS.get(stage)
+
+
+def fit_prompt(prompt: str, stage: Optional[str], model: Any = None) -> str:
+    limit = stage_input_limit(stage) if stage else None
+    if limit is None:
+        return prompt
+
+    estimator = get_estimator(model_family(model))
+    tokens = estimator.count(prompt)
+    if tokens <= limit:
+        return prompt
+    logger.warning(f"Trimming {stage} prompt from ~{tokens} to {limit} tokens")
+    return estimator.truncate(prompt, limit)
+
+
+def task_output_cap(
+    num_tasks: int, spent_tokens: int, task_input_tokens: int, budget: Optional[int] = None
+) -> Optional[int]:
+    """Output tokens each worker may produce so the workflow stays within ``budget``.
+
+    Each worker output is paid twice (as output, then as refiner input) and the refiner's own
+    answer is reserved one more share.
+    """
+    budget = budget if budget is not None else settings.WORKFLOW_TOKEN_BUDGET
+    if budget is None or num_tasks == 0:
+        return None
+
+    remaining = budget - spent_tokens - task_input_tokens
+    cap = remaining // (2 * num_tasks + 1)
+    return max(settings.MIN_TASK_OUTPUT_TOKENS, min(cap, settings.MAX_TASK_OUTPUT_TOKENS))
+
+
+def apply_output_cap(assistant: Any, max_tokens: Optional[int]):
+    llm = getattr(assistant, "llm", None)
+    if llm is None or max_tokens is None:
+        return
+    if model_family(getattr(llm, "model", None)) == "gemini":
+        generation_config = dict(getattr(llm, "generation_config", None) or {})
+        generation_config["max_output_tokens"] = max_tokens
+        llm.generation_config = generation_config
+        # The Vertex client bakes the generation config in when it is created
+        llm.generative_model = None
+    elif hasattr(llm, "max_tokens"):
+        llm.max_tokens = max_tokens
+
+
+def output_cap(assistant: Any) -> Optional[int]:
+    """The output token cap ``apply_output_cap`` left on ``assistant``'s LLM, if any."""
+    llm = getattr(assistant, "llm", None)
+    if model_family(getattr(llm, "model", None)) == "gemini":
+        max_tokens = (getattr(llm, "generation_config", None) or {}).get("max_output_tokens")
+    else:
+        max_tokens = getattr(llm, "max_tokens", None)
+    return max_tokens if isinstance(max_tokens, int) else None
@@ -6,10 +6,18 @@ class AssistantError(SAAOrchestratorError):
     """Raised when there's an error with an AI assistant"""
 
 
+class CircuitOpenError(AssistantError):
+    """Raised when a model's circuit breaker rejects a call"""
+
+
 class WorkflowError(SAAOrchestratorError):
     """Raised when there's an error in the workflow execution"""
 
 
+class WorkflowTimeoutError(WorkflowError):
+    """Raised when a workflow cannot produce a result before its deadline"""
+
+
 class ConfigurationError(SAAOrchestratorError):
     """Raised when there's an error in the configuration"""
 
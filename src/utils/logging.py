@@ -5,10 +5,19 @@ from logging.handlers import RotatingFileHandler
 from rich.logging import RichHandler
 
 
+class LazyRotatingFileHandler(RotatingFileHandler):
+    """Opens the log file, and creates its directory, on the first record rather than at import."""
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, delay=True, **kwargs)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
 def setup_logging(log_level=logging.INFO, log_file="saa_orchestrator.log"):
-    # Create logs directory if it doesn't exist
     logs_dir = os.path.join(os.getcwd(), "logs")
-    os.makedirs(logs_dir, exist_ok=True)
 
     # Configure root logger
     logging.basicConfig(
@@ -17,7 +26,7 @@ def setup_logging(log_level=logging.INFO, log_file="saa_orchestrator.log"):
         datefmt="%Y-%m-%d %H:%M:%S",
         handlers=[
             RichHandler(rich_tracebacks=True),
-            RotatingFileHandler(
+            LazyRotatingFileHandler(
                 os.path.join(logs_dir, log_file),
                 maxBytes=10_000_000,  # 10MB
                 backupCount=5,
@@ -1,22 +1,57 @@
 import asyncio
 import json
-from typing import List, Optional
+import time
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
 
 from phi.assistant import Assistant
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError, field_validator
 
-from src.assistants import create_assistant, get_full_response
+from src.assistants import get_assistant, get_full_response_async, run_copy, stream_full_response
 from src.config import settings
-from src.utils.exceptions import WorkerError
+from src.deadline import remaining
+from src.metrics import (
+    WORKER_QUEUE_DEPTH,
+    WORKER_TASK_SECONDS,
+    WORKER_TASKS,
+    WORKER_TASKS_IN_FLIGHT,
+    current_plugin,
+)
+from src.plan_parser import PlanStreamParser, load_json
+from src.token_budget import apply_output_cap, estimate_tokens, stage_input_limit
+from src.utils.exceptions import ConfigurationError, WorkerError
 from src.utils.logging import setup_logging
 
 logger = setup_logging()
 
 
 class WorkerTask(BaseModel):
+    id: Optional[str] = Field(None, description="Identifier other tasks refer to in depends_on")
     task: str = Field(..., description="Brief description of the task")
     prompt: str = Field(..., description="Detailed prompt for the worker to accomplish the task")
+    depends_on: List[str] = Field(
+        default_factory=list, description="IDs of tasks whose results this task needs"
+    )
+    decomposable: bool = Field(
+        False, description="Whether the task is large enough to be planned as a sub-workflow"
+    )
     result: Optional[str] = Field(None, description="Result of the task execution")
+    failed: bool = Field(False, description="Whether the result is the error the task failed with")
+
+    @field_validator("id", mode="before")
+    @classmethod
+    def _id_to_str(cls, value: Any) -> Optional[str]:
+        return None if value is None else str(value)
+
+    @field_validator("depends_on", mode="before")
+    @classmethod
+    def _depends_on_to_list(cls, value: Any) -> List[str]:
+        # Planners write null, a single ID or numeric IDs as often as a list of strings
+        if value is None:
+            return []
+        if isinstance(value, (str, int)):
+            value = [value]
+        return [str(item) for item in value]
 
 
 class PlanResponse(BaseModel):
@@ -31,40 +66,391 @@ class PlanResponse(BaseModel):
     )
 
 
+# Runs a decomposable task as a sub-workflow; None means execute it directly instead
+Decompose = Callable[[WorkerTask], Awaitable[Optional[str]]]
+
+
+class TaskStream:
+    """Tasks handed to the worker pool while the planner is still generating the plan."""
+
+    def __init__(self):
+        self.tasks: List[WorkerTask] = []
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._closed = asyncio.Event()
+
+    def put(self, task: WorkerTask):
+        self.tasks.append(task)
+        self._queue.put_nowait(task)
+
+    def close(self):
+        if not self._closed.is_set():
+            self._closed.set()
+            self._queue.put_nowait(None)
+
+    async def wait_closed(self) -> int:
+        """Wait until the plan is complete; returns the total number of tasks."""
+        await self._closed.wait()
+        return len(self.tasks)
+
+    async def __aiter__(self) -> AsyncIterator[WorkerTask]:
+        while True:
+            task = await self._queue.get()
+            if task is None:
+                return
+            yield task
+
+
+class TaskGraph:
+    """Releases tasks to the worker queue once the tasks they depend on have finished.
+
+    Tasks can be added while the plan is still streaming in; tasks that already have a result
+    count as finished without running again. Once ``close`` is called every task is known:
+    dependencies on unknown IDs are dropped, and a cycle makes the remaining tasks run without
+    ordering (flat execution).
+    """
+
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
+        self.tasks: List[WorkerTask] = []
+        self.ids: Dict[str, int] = {}
+        self.finished: Set[str] = set()
+        self.waiting: Dict[int, Set[str]] = {}
+        self.flat = False
+
+    def add(self, task: WorkerTask):
+        index = len(self.tasks)
+        self.tasks.append(task)
+        if task.id is not None:
+            if task.id in self.ids:
+                logger.warning(f"Duplicate task id {task.id}; dependents wait for the first one")
+            else:
+                self.ids[task.id] = index
+        if task.result is not None:
+            # Finished in an earlier attempt of the run (restored from a checkpoint)
+            self.complete(index)
+            return
+        unmet = {dependency for dependency in task.depends_on if dependency not in self.finished}
+        if unmet and not self.flat:
+            self.waiting[index] = unmet
+        else:
+            self._enqueue(index)
+
+    def complete(self, index: int):
+        task_id = self.tasks[index].id
+        if task_id is None or self.ids.get(task_id) != index:
+            return
+        self.finished.add(task_id)
+        for waiting_index, unmet in list(self.waiting.items()):
+            unmet.discard(task_id)
+            if not unmet:
+                self._release(waiting_index)
+
+    def close(self):
+        for index, unmet in list(self.waiting.items()):
+            unknown = {dependency for dependency in unmet if dependency not in self.ids}
+            if unknown:
+                logger.warning(f"Task {index} depends on unknown tasks {sorted(unknown)}")
+                unmet -= unknown
+            if not unmet:
+                self._release(index)
+        if self._has_cycle():
+            logger.warning("Task dependencies contain a cycle; running the tasks without ordering")
+            self.flat = True
+            for index in list(self.waiting):
+                self._release(index)
+
+    def _has_cycle(self) -> bool:
+        # Kahn's algorithm over the waiting tasks; tasks it cannot order are on or behind a cycle
+        waiting_ids = {self.tasks[index].id: index for index in self.waiting}
+        indegree = {
+            index: sum(1 for dependency in unmet if dependency in waiting_ids)
+            for index, unmet in self.waiting.items()
+        }
+        ready = [index for index, degree in indegree.items() if degree == 0]
+        ordered = 0
+        while ready:
+            task_id = self.tasks[ready.pop()].id
+            ordered += 1
+            for index, unmet in self.waiting.items():
+                if task_id in unmet:
+                    indegree[index] -= 1
+                    if indegree[index] == 0:
+                        ready.append(index)
+        return ordered < len(self.waiting)
+
+    def _release(self, index: int):
+        del self.waiting[index]
+        self._enqueue(index)
+
+    def _enqueue(self, index: int):
+        self.queue.put_nowait((index, self.tasks[index]))
+        WORKER_QUEUE_DEPTH.inc()
+
+    def prompt_for(self, task: WorkerTask) -> str:
+        """``task``'s prompt followed by the results of the tasks it depends on."""
+        upstream = [
+            self.tasks[self.ids[dependency]]
+            for dependency in task.depends_on
+            if dependency in self.ids and self.tasks[self.ids[dependency]].result is not None
+        ]
+        if not upstream:
+            return task.prompt
+        prompt = f"{task.prompt}\n\nResults of the tasks this task builds on:\n\n"
+        for dependency in upstream:
+            prompt += f"Task: {dependency.task}\nResult: {dependency.result}\n\n"
+        return prompt
+
+
+def parse_plan(response: str) -> PlanResponse:
+    """Parse a planner response, repairing fences, surrounding prose and trailing commas."""
+    try:
+        plan_dict = load_json(response)
+        return PlanResponse(**plan_dict)
+    except json.JSONDecodeError:
+        logger.error(f"Failed to parse JSON response: {response}")
+        raise WorkerError("Failed to parse plan response as JSON")
+    except (TypeError, ValueError) as e:
+        logger.error(f"Invalid plan response structure: {str(e)}")
+        raise WorkerError(f"Invalid plan response structure: {str(e)}")
+
+
+class ReduceLimits(BaseModel):
+    chunk_tokens: int = Field(..., description="Largest prompt body sent to the refiner at once")
+    fan_in: int = Field(..., description="Summaries merged by a single reduce call")
+    max_depth: int = Field(..., description="Reduce levels before a final merge is forced")
+
+
+def summary_limits(model: str) -> ReduceLimits:
+    limits = {
+        "chunk_tokens": settings.SUMMARY_CHUNK_TOKENS,
+        "fan_in": settings.SUMMARY_FAN_IN,
+        "max_depth": settings.SUMMARY_MAX_DEPTH,
+    }
+    if isinstance(model, str):
+        prefixes = [prefix for prefix in settings.SUMMARY_MODEL_LIMITS if model.startswith(prefix)]
+        if prefixes:
+            limits.update(settings.SUMMARY_MODEL_LIMITS[max(prefixes, key=len)])
+    refiner_limit = stage_input_limit("refiner")
+    if refiner_limit is not None:
+        limits["chunk_tokens"] = min(limits["chunk_tokens"], refiner_limit)
+    return ReduceLimits(**limits)
+
+
+def _group_sections(
+    sections: List[str], sizes: List[int], max_tokens: int, max_items: int
+) -> List[List[str]]:
+    groups: List[List[str]] = []
+    group_tokens = 0
+    for section, tokens in zip(sections, sizes):
+        if groups and group_tokens + tokens <= max_tokens and len(groups[-1]) < max_items:
+            groups[-1].append(section)
+            group_tokens += tokens
+        else:
+            groups.append([section])
+            group_tokens = tokens
+    return groups
+
+
 class SAAsWorkers:
-    def __init__(self, num_workers: int = 3):
+    def __init__(
+        self,
+        num_workers: int = 3,
+        worker_concurrency: int = settings.WORKER_CONCURRENCY,
+        max_concurrent_tasks: Optional[int] = settings.MAX_CONCURRENT_TASKS,
+        model: str = settings.SUB_ASSISTANT,
+    ):
+        if num_workers < 1 or worker_concurrency < 1:
+            raise ConfigurationError("num_workers and worker_concurrency must be at least 1")
+        if max_concurrent_tasks is not None and max_concurrent_tasks < 1:
+            raise ConfigurationError("max_concurrent_tasks must be at least 1")
+
         self.num_workers = num_workers
-        self.workers = [
-            create_assistant(f"Worker{i}", settings.SUB_ASSISTANT) for i in range(num_workers)
-        ]
+        self.worker_concurrency = worker_concurrency
+        self.max_concurrent_tasks = max_concurrent_tasks
+        self.model = model
+        self._workers: Optional[List[Assistant]] = None
+
+    @property
+    def workers(self) -> List[Assistant]:
+        """Worker assistants, taken from the assistant pool the first time tasks run."""
+        if self._workers is None:
+            self._workers = [
+                get_assistant(f"Worker{i}", self.model) for i in range(self.num_workers)
+            ]
+        return self._workers
 
-    async def execute_task(self, worker: Assistant, task: WorkerTask) -> str:
+    @property
+    def capacity(self) -> int:
+        """Maximum number of tasks a single run keeps in flight."""
+        slots = self.num_workers * self.worker_concurrency
+        if self.max_concurrent_tasks is not None:
+            slots = min(slots, self.max_concurrent_tasks)
+        return slots
+
+    async def execute_task(
+        self, worker: Assistant, task: WorkerTask, on_token: Optional[Callable[[str], None]] = None
+    ) -> str:
         try:
-            return await asyncio.to_thread(get_full_response, worker, task.prompt)
+            if on_token is None:
+                return await get_full_response_async(worker, task.prompt, stage="worker")
+            chunks = []
+            async for chunk in stream_full_response(worker, task.prompt, stage="worker"):
+                chunks.append(chunk)
+                on_token(chunk)
+            return "".join(chunks)
         except Exception as e:
             logger.error(f"Error executing task: {str(e)}")
             raise WorkerError(f"Error executing task: {str(e)}")
 
-    async def process_tasks(self, tasks: List[WorkerTask]) -> List[WorkerTask]:
-        worker_tasks = []
-        for task, worker in zip(tasks, self.workers):
-            worker_tasks.append(self.execute_task(worker, task))
+    async def _run_task(
+        self,
+        worker: Assistant,
+        index: int,
+        task: WorkerTask,
+        on_token: Optional[Callable[[int, str], None]],
+    ) -> Tuple[str, bool]:
+        """``task``'s result and whether it failed, in which case the result is the error."""
+        plugin = current_plugin()
+        started = time.monotonic()
+        outcome = "error"
+        try:
+            with WORKER_TASKS_IN_FLIGHT.track():
+                if on_token is None:
+                    result = await self.execute_task(worker, task)
+                else:
+                    result = await self.execute_task(
+                        worker, task, on_token=partial(on_token, index)
+                    )
+            outcome = "success"
+            return result, False
+        except Exception as e:
+            logger.error(f"Task failed: {task.task}. Error: {str(e)}")
+            return f"Error: {str(e)}", True
+        finally:
+            WORKER_TASK_SECONDS.observe(time.monotonic() - started, plugin=plugin)
+            WORKER_TASKS.inc(plugin=plugin, outcome=outcome)
 
-        results = await asyncio.gather(*worker_tasks, return_exceptions=True)
+    async def _consume(
+        self,
+        worker: Assistant,
+        queue: asyncio.Queue,
+        graph: TaskGraph,
+        on_token: Optional[Callable[[int, str], None]],
+        on_complete: Optional[Callable[[int, WorkerTask], None]],
+        decompose: Optional[Decompose] = None,
+        slots: Optional[asyncio.Semaphore] = None,
+    ):
+        while True:
+            index, task = await queue.get()
+            WORKER_QUEUE_DEPTH.dec()
+            try:
+                prompt = graph.prompt_for(task)
+                run = task if prompt == task.prompt else task.model_copy(update={"prompt": prompt})
+                result, failed = None, False
+                if decompose is not None and task.decomposable:
+                    try:
+                        result = await decompose(run)
+                    except Exception as e:
+                        logger.error(f"Sub-workflow failed: {task.task}. Error: {str(e)}")
+                        result, failed = f"Error: {str(e)}", True
+                if result is None:
+                    # Slots are shared with sub-workflows, bounding LLM calls across all levels
+                    if slots is not None:
+                        await slots.acquire()
+                    try:
+                        result, failed = await self._run_task(worker, index, run, on_token)
+                    finally:
+                        if slots is not None:
+                            slots.release()
+                task.result, task.failed = result, failed
+                if on_complete is not None:
+                    on_complete(index, task)
+                # Dependents are queued before task_done so the queue never looks drained early
+                graph.complete(index)
+            finally:
+                queue.task_done()
 
-        processed_tasks = []
-        for task, result in zip(tasks, results):
-            if isinstance(result, Exception):
-                logger.error(f"Task failed: {task.task}. Error: {str(result)}")
-                task.result = f"Error: {str(result)}"
-            else:
-                task.result = result
-            processed_tasks.append(task)
+    async def process_tasks(
+        self,
+        tasks: Union[List[WorkerTask], TaskStream],
+        on_token: Optional[Callable[[int, str], None]] = None,
+        on_complete: Optional[Callable[[int, WorkerTask], None]] = None,
+        max_output_tokens: Optional[int] = None,
+        decompose: Optional[Decompose] = None,
+        slots: Optional[asyncio.Semaphore] = None,
+    ) -> List[WorkerTask]:
+        """Run ``tasks`` on the worker pool; a ``TaskStream`` is consumed as tasks arrive.
+
+        Tasks marked ``decomposable`` are first offered to ``decompose``, which runs them as a
+        sub-workflow or returns None to have them executed directly. ``slots`` bounds the calls
+        in flight across this run and every sub-workflow sharing it.
+        """
+        stream = tasks if isinstance(tasks, TaskStream) else None
+        if stream is None and not tasks:
+            return []
+
+        # The workers are shared by every run of this pool, so each run works on its own copies
+        workers = [run_copy(worker) for worker in self.workers]
+        for worker in workers:
+            apply_output_cap(worker, max_output_tokens)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        graph = TaskGraph(queue)
+        if stream is None:
+            for task in tasks:
+                graph.add(task)
+            graph.close()
+        consumer_count = self.capacity if stream is not None else min(self.capacity, len(tasks))
+
+        # Slots are spread round-robin so no worker exceeds its own concurrency limit
+        consumers = [
+            asyncio.create_task(
+                self._consume(
+                    workers[slot % self.num_workers],
+                    queue,
+                    graph,
+                    on_token,
+                    on_complete,
+                    decompose=decompose,
+                    slots=slots,
+                )
+            )
+            for slot in range(consumer_count)
+        ]
 
-        return processed_tasks
+        async def drain():
+            if stream is not None:
+                async for task in stream:
+                    graph.add(task)
+                graph.close()
+            await queue.join()
+
+        try:
+            # Under a deadline, tasks still running when it passes are cancelled (aborting their
+            # requests) and left without a result
+            await asyncio.wait_for(drain(), remaining())
+        except asyncio.TimeoutError:
+            all_tasks = stream.tasks if stream is not None else tasks
+            unfinished = sum(1 for task in all_tasks if task.result is None)
+            logger.warning(
+                f"Deadline reached with {unfinished} of {len(all_tasks)} tasks unfinished"
+            )
+        finally:
+            for consumer in consumers:
+                consumer.cancel()
+            await asyncio.gather(*consumers, return_exceptions=True)
+            # Tasks left queued when the deadline passed will never run
+            WORKER_QUEUE_DEPTH.dec(queue.qsize())
+
+        return list(stream.tasks if stream is not None else tasks)
 
     @staticmethod
-    async def plan_tasks(objective: str, main_assistant: Assistant) -> PlanResponse:
+    async def plan_tasks(
+        objective: str,
+        main_assistant: Assistant,
+        on_task: Optional[Callable[[WorkerTask], None]] = None,
+    ) -> PlanResponse:
+        """Ask the planner for a plan; ``on_task`` receives tasks while the plan streams in."""
         plan_prompt = f"""
         Analyze the following objective and determine if it requires subtask decomposition:
 
@@ -77,8 +463,11 @@ class SAAsWorkers:
             "explanation": string,
             "tasks": [
                 {{
+                    "id": string,
                     "task": string,
-                    "prompt": string
+                    "prompt": string,
+                    "depends_on": [string, ...],
+                    "decomposable": boolean
                 }},
                 ...
             ]
@@ -94,6 +483,8 @@ class SAAsWorkers:
         - Provide a brief explanation in the "explanation" field
         - Break down the objective into {settings.NUM_WORKERS} subtasks in the "tasks" array
         - For each subtask, include a "task" field with a brief description and a "prompt" field with detailed instructions
+        - Give each subtask a short unique "id". If a subtask needs the results of other subtasks, list their ids in "depends_on" and their results will be appended to its prompt; leave "depends_on" empty for subtasks that can start right away, so independent work runs in parallel
+        - Set "decomposable" to true for a subtask that is itself too large for a single response and should be broken down further
 
         Remember, you are a skilled prompt engineer. Create prompts that are clear, specific, and actionable.
         """
@@ -104,25 +495,146 @@ class SAAsWorkers:
             description="You are a task planner that analyzes objectives and breaks them down into subtasks if necessary.",
         )
 
-        response = await asyncio.to_thread(get_full_response, planner, plan_prompt)
+        if on_task is None:
+            return parse_plan(await get_full_response_async(planner, plan_prompt, stage="planner"))
 
-        try:
-            plan_dict = json.loads(response)
-            return PlanResponse(**plan_dict)
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse JSON response: {response}")
-            raise WorkerError("Failed to parse plan response as JSON")
-        except ValueError as e:
-            logger.error(f"Invalid plan response structure: {str(e)}")
-            raise WorkerError(f"Invalid plan response structure: {str(e)}")
+        # Hand each task over as soon as its object closes in the token stream
+        parser = PlanStreamParser()
+        streamed = 0
+        async for chunk in stream_full_response(planner, plan_prompt, stage="planner"):
+            for task_dict in parser.feed(chunk):
+                try:
+                    task = WorkerTask(**task_dict)
+                except ValidationError as e:
+                    logger.warning(f"Skipping early dispatch of an invalid task: {str(e)}")
+                    parser.stop()
+                    break
+                on_task(task)
+                streamed += 1
+
+        plan = parse_plan(parser.text)
+        if streamed and plan.tasks:
+            logger.info(f"Dispatched {streamed} of {len(plan.tasks)} tasks while planning")
+        return plan
 
     @staticmethod
     async def summarize_results(
-        objective: str, results: List[WorkerTask], refiner_assistant: Assistant
+        objective: str,
+        results: List[WorkerTask],
+        refiner_assistant: Assistant,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        model = getattr(refiner_assistant.llm, "model", None)
+        limits = summary_limits(model)
+        sections = [f"Task: {task.task}\nResult: {task.result}\n\n" for task in results]
+        sizes = [estimate_tokens(section, model) for section in sections]
+
+        if sum(sizes) <= limits.chunk_tokens:
+            summary_prompt = f"Objective: {objective}\n\nTask results:\n" + "".join(sections)
+            summary_prompt += "Please summarize these results into a coherent final output that addresses the original objective."
+            return await SAAsWorkers._refine(refiner_assistant, summary_prompt, on_token)
+
+        # Map: summarize context-sized groups of results in parallel
+        groups = _group_sections(sections, sizes, limits.chunk_tokens, max_items=len(sections))
+        logger.info(f"Summarizing {len(results)} results in {len(groups)} groups")
+        summaries = await asyncio.gather(
+            *[
+                get_full_response_async(
+                    refiner_assistant,
+                    f"Objective: {objective}\n\nTask results (part {i + 1} of {len(groups)}):\n"
+                    + "".join(group)
+                    + "Summarize these results, keeping every detail relevant to the objective. The summary will be merged with summaries of the other parts.",
+                    stage="refiner",
+                )
+                for i, group in enumerate(groups)
+            ]
+        )
+
+        # Reduce: merge summaries fan_in at a time until one final merge fits
+        depth = 1
+        while True:
+            sections = [f"Partial summary:\n{summary}\n\n" for summary in summaries]
+            sizes = [estimate_tokens(section, model) for section in sections]
+            fits = len(sections) <= limits.fan_in and sum(sizes) <= limits.chunk_tokens
+            if fits or depth >= limits.max_depth:
+                final_prompt = f"Objective: {objective}\n\n" + "".join(sections)
+                final_prompt += "Please combine these partial summaries into a coherent final output that addresses the original objective."
+                return await SAAsWorkers._refine(refiner_assistant, final_prompt, on_token)
+
+            groups = _group_sections(sections, sizes, limits.chunk_tokens, max_items=limits.fan_in)
+            logger.info(
+                f"Merging {len(sections)} summaries in {len(groups)} groups (depth {depth})"
+            )
+            summaries = await asyncio.gather(
+                *[
+                    get_full_response_async(
+                        refiner_assistant,
+                        f"Objective: {objective}\n\n"
+                        + "".join(group)
+                        + "Merge these partial summaries into one, keeping every detail relevant to the objective.",
+                        stage="refiner",
+                    )
+                    for group in groups
+                ]
+            )
+            depth += 1
+
+    @staticmethod
+    async def summarize_progressively(
+        objective: str,
+        completed: asyncio.Queue,
+        total: int,
+        refiner_assistant: Assistant,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Fold task results into a running summary as they arrive on ``completed``.
+
+        Results that arrive while the refiner is busy are folded together, so only the
+        deltas left when the last task completes go through the final merge. A ``None`` on the
+        queue stands for a task that will not finish.
+        """
+        partial_summary = ""
+        folded = 0
+        while True:
+            batch = [await completed.get()]
+            while not completed.empty():
+                batch.append(completed.get_nowait())
+            arrived = len(batch)
+            batch = [task for task in batch if task is not None]
+
+            if folded + arrived >= total:
+                if not partial_summary:
+                    return await SAAsWorkers.summarize_results(
+                        objective, batch, refiner_assistant, on_token=on_token
+                    )
+                final_prompt = f"Objective: {objective}\n\nSummary of earlier task results:\n"
+                final_prompt += f"{partial_summary}\n\nRemaining task results:\n"
+                for task in batch:
+                    final_prompt += f"Task: {task.task}\nResult: {task.result}\n\n"
+                final_prompt += "Please merge the summary and the remaining results into a coherent final output that addresses the original objective."
+                return await SAAsWorkers._refine(refiner_assistant, final_prompt, on_token)
+
+            folded += arrived
+            if not batch:
+                continue
+            fold_prompt = f"Objective: {objective}\n\nCurrent partial summary:\n"
+            fold_prompt += f"{partial_summary or '(none yet)'}\n\nNew task results:\n"
+            for task in batch:
+                fold_prompt += f"Task: {task.task}\nResult: {task.result}\n\n"
+            fold_prompt += "Update the partial summary so it incorporates the new results. More results will follow, so keep every relevant detail rather than polishing the wording."
+            partial_summary = await get_full_response_async(
+                refiner_assistant, fold_prompt, stage="refiner"
+            )
+
+    @staticmethod
+    async def _refine(
+        refiner_assistant: Assistant, prompt: str, on_token: Optional[Callable[[str], None]]
     ) -> str:
-        summary_prompt = f"Objective: {objective}\n\nTask results:\n"
-        for task in results:
-            summary_prompt += f"Task: {task.task}\nResult: {task.result}\n\n"
-        summary_prompt += "Please summarize these results into a coherent final output that addresses the original objective."
+        if on_token is None:
+            return await get_full_response_async(refiner_assistant, prompt, stage="refiner")
 
-        return await asyncio.to_thread(get_full_response, refiner_assistant, summary_prompt)
+        chunks = []
+        async for chunk in stream_full_response(refiner_assistant, prompt, stage="refiner"):
+            chunks.append(chunk)
+            on_token(chunk)
+        return "".join(chunks)
@@ -1,11 +1,35 @@
-from unittest.mock import MagicMock, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
 
 import pytest
+from anthropic import AsyncAnthropic
+from phi.assistant import Assistant
+from phi.llm.base import LLM
+from phi.llm.message import Message
 
-from src.assistants import create_assistant, create_file, list_files, read_file
+from src.assistants import (
+    AssistantPool,
+    create_assistant,
+    create_file,
+    get_full_response_async,
+    has_native_async,
+    has_native_async_stream,
+    list_files,
+    read_file,
+    stream_full_response,
+    workspace_scope,
+)
+from src.config import settings
+from src.llm import AsyncClaude, AsyncGemini
+from src.llm.claude import _TextStreamReplay
 from src.utils.exceptions import AssistantError
 
 
+class FakeAsyncLLM(LLM):
+    async def aresponse(self, messages):
+        return f"async reply to: {messages[-1].content}"
+
+
 @pytest.fixture
 def mock_assistant():
     return MagicMock()
@@ -41,9 +65,23 @@ def test_list_files(tmp_path):
         assert list_files("nonexistent") == f"Directory not found: {test_dir}/nonexistent"
 
 
-@patch("src.assistants.Claude")
-@patch("src.assistants.Gemini")
-@patch("src.assistants.OpenAIChat")
+@pytest.mark.asyncio
+async def test_file_tools_use_the_workspace_of_the_current_run(tmp_path):
+    async def write(name):
+        with workspace_scope(str(tmp_path / name)):
+            await asyncio.sleep(0)
+            # Tool calls run in worker threads, which inherit the run's workspace
+            return await asyncio.to_thread(create_file, "notes.txt", name)
+
+    await asyncio.gather(write("run-1"), write("run-2"))
+
+    assert (tmp_path / "run-1" / "notes.txt").read_text() == "run-1"
+    assert (tmp_path / "run-2" / "notes.txt").read_text() == "run-2"
+
+
+@patch("src.assistants.AssistantPool._claude_llm")
+@patch("src.assistants.AssistantPool._gemini_llm")
+@patch("src.assistants.AssistantPool._openai_llm")
 @patch("src.assistants.Assistant")
 def test_create_assistant(mock_assistant_class, mock_openai, mock_gemini, mock_claude):
     mock_assistant_instance = MagicMock()
@@ -64,3 +102,230 @@ def test_create_assistant(mock_assistant_class, mock_openai, mock_gemini, mock_c
         match="Error creating assistant TestAssistant with model unsupported-model: Unsupported model: unsupported-model",
     ):
         create_assistant("TestAssistant", "unsupported-model")
+
+
+def test_assistant_pool_shares_clients_per_api_key():
+    pool = AssistantPool()
+    with patch.object(settings, "ANTHROPIC_API_KEY", "key-1"):
+        first = pool.create_llm("claude-3-haiku-20240307")
+        second = pool.create_llm("claude-3-5-sonnet-20240620")
+
+    assert first.anthropic_client is second.anthropic_client
+    assert first.async_anthropic_client is second.async_anthropic_client
+
+    with patch.object(settings, "ANTHROPIC_API_KEY", "key-2"):
+        other_key = pool.create_llm("claude-3-haiku-20240307")
+
+    assert other_key.anthropic_client is not first.anthropic_client
+
+
+def test_assistant_pool_builds_each_assistant_once():
+    pool = AssistantPool()
+    with patch("src.assistants.create_assistant") as mock_create:
+        mock_create.side_effect = lambda name, model, *args, **kwargs: MagicMock(name=name)
+
+        pool.get("Worker0", "claude-3-haiku-20240307")
+        pool.get("Worker0", "claude-3-haiku-20240307")
+        pool.get("Worker0", "gpt-4o")
+
+    assert mock_create.call_count == 2
+
+
+def test_pooled_assistants_do_not_share_memory_between_runs():
+    pool = AssistantPool()
+    template = Assistant(name="Worker0", llm=FakeAsyncLLM(model="fake"))
+    with patch("src.assistants.create_assistant", return_value=template):
+        first = pool.get("Worker0", "fake")
+        first.memory.add_chat_message(Message(role="user", content="secret prompt"))
+        first.llm.metrics["response_times"] = [1.0]
+
+        second = pool.get("Worker0", "fake")
+
+    assert second is not first
+    assert second.memory.chat_history == []
+    assert second.llm.metrics == {}
+    assert template.memory.chat_history == []
+
+
+@pytest.mark.asyncio
+async def test_get_full_response_async_uses_native_path():
+    assistant = Assistant(name="Async", llm=FakeAsyncLLM(model="fake"))
+    assert has_native_async(assistant)
+
+    with patch.object(Assistant, "run", side_effect=AssertionError("sync path used")):
+        result = await get_full_response_async(assistant, "hello")
+
+    assert result == "async reply to: hello"
+
+
+@pytest.mark.asyncio
+async def test_get_full_response_async_falls_back_to_thread(mock_assistant):
+    mock_assistant.run.return_value = ["part one", "part two"]
+    assert not has_native_async(mock_assistant)
+
+    result = await get_full_response_async(mock_assistant, "hello")
+
+    assert result == "part one part two"
+    mock_assistant.run.assert_called_once_with("hello", stream=False)
+
+
+@pytest.mark.asyncio
+async def test_get_full_response_async_retries_then_fails(mock_assistant):
+    mock_assistant.run.side_effect = Exception("boom")
+
+    with pytest.raises(AssistantError, match="Max retries reached"):
+        await get_full_response_async(mock_assistant, "hello", max_retries=2, delay=0)
+
+    assert mock_assistant.run.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_async_claude_parses_prefetched_response():
+    llm = AsyncClaude(model="claude-3-haiku-20240307", api_key="test")
+    response = MagicMock(role="assistant")
+    response.content = [MagicMock(text="Native answer")]
+
+    with patch.object(AsyncClaude, "ainvoke", AsyncMock(return_value=response)), patch(
+        "src.llm.claude.Claude.invoke", side_effect=AssertionError("sync client used")
+    ):
+        result = await llm.aresponse([])
+
+    assert result == "Native answer"
+
+
+class FakeStreamingLLM(FakeAsyncLLM):
+    async def aresponse_stream(self, messages):
+        for chunk in ["native ", "stream"]:
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_stream_full_response_uses_native_stream():
+    assistant = Assistant(name="Async", llm=FakeStreamingLLM(model="fake"))
+
+    chunks = [chunk async for chunk in stream_full_response(assistant, "hello")]
+
+    assert chunks == ["native ", "stream"]
+
+
+class FakeMessageStream:
+    def __init__(self, deltas):
+        self.deltas = deltas
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    @property
+    async def text_stream(self):
+        for delta in self.deltas:
+            yield delta
+
+
+def fake_anthropic_client(deltas):
+    client = MagicMock(spec=AsyncAnthropic)
+    client.messages = MagicMock()
+    client.messages.stream.return_value = FakeMessageStream(deltas)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_async_claude_streams_through_the_async_client():
+    llm = AsyncClaude(
+        model="claude-3-haiku-20240307",
+        api_key="test",
+        async_anthropic_client=fake_anthropic_client(["Native ", "stream"]),
+    )
+    assistant = Assistant(name="Async", llm=llm)
+    assert has_native_async_stream(assistant)
+    messages = [Message(role="system", content="Be brief."), Message(role="user", content="hi")]
+
+    with patch("src.llm.claude.Claude.invoke_stream", side_effect=AssertionError("sync client")):
+        chunks = [chunk async for chunk in llm.aresponse_stream(messages)]
+
+    assert chunks == ["Native ", "stream"]
+    assert messages[-1].role == "assistant"
+    assert messages[-1].content == "Native stream"
+    request = llm.async_client.messages.stream.call_args.kwargs
+    assert request["system"] == "Be brief."
+    assert request["messages"] == [{"role": "user", "content": "hi"}]
+
+
+@pytest.mark.asyncio
+async def test_async_claude_stream_runs_tool_calls():
+    def lookup(topic: str) -> str:
+        """Look up a topic."""
+        return f"{topic}: high at noon"
+
+    tool_call = (
+        "<function_calls>\n<invoke>\n<tool_name>lookup</tool_name>\n"
+        "<parameters>\n<topic>tides</topic>\n</parameters>\n</invoke>\n"
+    )
+    llm = AsyncClaude(
+        model="claude-3-haiku-20240307",
+        api_key="test",
+        async_anthropic_client=fake_anthropic_client(["Checking. ", tool_call]),
+    )
+    llm.add_tool(lookup)
+    messages = [Message(role="user", content="When is high tide?")]
+
+    with patch(
+        "src.llm.claude.Claude.invoke_stream",
+        return_value=_TextStreamReplay(["High tide ", "is at noon."]),
+    ) as follow_up:
+        chunks = [chunk async for chunk in llm.aresponse_stream(messages)]
+
+    assert chunks == ["Checking. ", "High tide ", "is at noon."]
+    follow_up.assert_called_once()
+    assert "tides: high at noon" in messages[2].content
+    assert messages[-1].content == "High tide is at noon."
+
+
+def gemini_chunk(part):
+    chunk = MagicMock()
+    chunk.candidates[0].content.role = "model"
+    chunk.candidates[0].content.parts[0].to_dict.return_value = part
+    return chunk
+
+
+async def async_chunks(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_async_gemini_streams_through_the_async_client():
+    llm = AsyncGemini(model="gemini-1.5-pro-preview-0409")
+    model = MagicMock()
+    chunks = [gemini_chunk({"text": "Native "}), gemini_chunk({"text": "stream"})]
+    model.generate_content_async = AsyncMock(return_value=async_chunks(chunks))
+    model.generate_content.side_effect = AssertionError("sync client used")
+    messages = [Message(role="user", content="hi")]
+
+    with patch.object(AsyncGemini, "client", new_callable=PropertyMock, return_value=model):
+        streamed = [chunk async for chunk in llm.aresponse_stream(messages)]
+
+    assert streamed == ["Native ", "stream"]
+    assert model.generate_content_async.call_args.kwargs["stream"] is True
+    assert messages[-1].content == "Native stream"
+
+
+@pytest.mark.asyncio
+async def test_stream_full_response_bridges_sync_iterator(mock_assistant):
+    mock_assistant.run.return_value = iter(["one ", "two"])
+
+    chunks = [chunk async for chunk in stream_full_response(mock_assistant, "hello")]
+
+    assert chunks == ["one ", "two"]
+    mock_assistant.run.assert_called_once_with("hello", stream=True)
+
+
+@pytest.mark.asyncio
+async def test_stream_full_response_retries_before_first_chunk(mock_assistant):
+    mock_assistant.run.side_effect = [Exception("boom"), iter(["recovered"])]
+
+    chunks = [chunk async for chunk in stream_full_response(mock_assistant, "hello", delay=0)]
+
+    assert chunks == ["recovered"]
@@ -0,0 +1,140 @@
+import asyncio
+import io
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.batch import BatchItem, completed_ids, read_batch_items, run_batch
+from src.orchestrator import OrchestratorSettings
+from src.utils.exceptions import ConfigurationError
+
+
+@pytest.fixture
+def fake_orchestrator():
+    created = []
+    in_flight = {"current": 0, "max": 0}
+
+    def make(settings, output_dir):
+        orchestrator = MagicMock(settings=settings, output_dir=output_dir)
+
+        async def run_workflow(objective, use_case=None):
+            in_flight["current"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["current"])
+            await asyncio.sleep(0.01)
+            in_flight["current"] -= 1
+            if objective == "fail":
+                raise RuntimeError("boom")
+            return f"done: {objective}"
+
+        orchestrator.run_workflow = run_workflow
+        created.append(orchestrator)
+        return orchestrator
+
+    with patch("src.batch.Orchestrator", side_effect=make):
+        yield created, in_flight
+
+
+def test_read_batch_items():
+    lines = [
+        '{"id": 1, "objective": "first", "plugin": "ComparativeAnalysisPlugin"}',
+        "",
+        '{"objective": "second", "sub_model": "gpt-4o"}',
+        '"third"',
+    ]
+
+    items = list(read_batch_items(lines))
+
+    assert [item.id for item in items[:1]] == ["1"]
+    assert items[0].plugin == "ComparativeAnalysisPlugin"
+    assert items[1].sub_model == "gpt-4o"
+    assert items[1].id == list(read_batch_items(['{"objective": "second"}']))[0].id
+    assert items[2].objective == "third"
+
+
+def test_read_batch_items_rejects_invalid_lines():
+    with pytest.raises(ConfigurationError, match="line 2"):
+        read_batch_items(['{"objective": "ok"}', '{"plugin": "missing objective"}'])
+
+
+def test_read_batch_items_reports_every_invalid_line():
+    lines = ['{"objective": "ok"}', "{not json", "42", '{"objective": "also ok"}']
+
+    with pytest.raises(ConfigurationError) as error:
+        read_batch_items(lines)
+
+    assert "line 2" in str(error.value)
+    assert "line 3" in str(error.value)
+
+
+def test_completed_ids_ignores_truncated_line(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text('{"id": "a", "status": "ok"}\n{"id": "b", "status": "ok"}\n{"id": "c", "sta')
+
+    assert completed_ids(str(output)) == {"a", "b"}
+    assert completed_ids(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_completed_ids_retries_failed_items(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text(
+        '{"id": "a", "status": "error"}\n{"id": "b", "status": "error"}\n'
+        '{"id": "a", "status": "ok"}\n'
+    )
+
+    assert completed_ids(str(output)) == {"a"}
+
+
+@pytest.mark.asyncio
+async def test_run_batch_limits_concurrency_and_streams_results(fake_orchestrator, tmp_path):
+    created, in_flight = fake_orchestrator
+    items = [BatchItem(id=str(i), objective=f"objective {i}") for i in range(6)]
+    items.append(BatchItem(id="bad", objective="fail"))
+    output = io.StringIO()
+
+    results = await run_batch(items, output, concurrency=2, output_root=str(tmp_path))
+
+    assert in_flight["max"] == 2
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert len(records) == len(results) == 7
+    assert {record["id"] for record in records} == {item.id for item in items}
+    failed = next(record for record in records if record["id"] == "bad")
+    assert failed["status"] == "error"
+    assert "boom" in failed["error"]
+    assert all(record["output"].startswith("done") for record in records if record["id"] != "bad")
+
+
+@pytest.mark.asyncio
+async def test_run_batch_skips_done_and_duplicate_ids(fake_orchestrator, tmp_path):
+    created, _ = fake_orchestrator
+    items = [
+        BatchItem(id="a", objective="already done"),
+        BatchItem(id="b", objective="new"),
+        BatchItem(id="b", objective="duplicate"),
+    ]
+
+    results = await run_batch(
+        items, io.StringIO(), concurrency=4, output_root=str(tmp_path), skip_ids={"a"}
+    )
+
+    assert [result.objective for result in results] == ["new"]
+    assert len(created) == 1
+
+
+@pytest.mark.asyncio
+async def test_run_batch_applies_model_overrides(fake_orchestrator, tmp_path):
+    created, _ = fake_orchestrator
+    base = OrchestratorSettings(sub_assistant_model="claude-3-haiku-20240307")
+    items = [
+        BatchItem(id="default", objective="one"),
+        BatchItem(id="override", objective="two", sub_model="gpt-4o"),
+    ]
+
+    await run_batch(items, io.StringIO(), 1, base_settings=base, output_root=str(tmp_path))
+
+    assert [o.settings.sub_assistant_model for o in created] == [
+        "claude-3-haiku-20240307",
+        "gpt-4o",
+    ]
+    assert created[1].output_dir == str(tmp_path / "override")
+    assert base.sub_assistant_model == "claude-3-haiku-20240307"
@@ -0,0 +1,120 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.assistants import get_full_response, get_full_response_async
+from src.cache import (
+    MemoryCache,
+    ResponseCache,
+    SQLiteCache,
+    configure_response_cache,
+    make_cache_key,
+)
+
+
+@pytest.fixture
+def response_cache(tmp_path):
+    cache = configure_response_cache(enabled=True, cache_dir=str(tmp_path / "cache"))
+    yield cache
+    configure_response_cache(enabled=False)
+
+
+def test_make_cache_key_is_content_addressed():
+    key = make_cache_key("claude", "helper", ["b", "a"], "prompt")
+    assert key == make_cache_key("claude", "helper", ["a", "b"], "prompt")
+    assert key != make_cache_key("gpt-4", "helper", ["a", "b"], "prompt")
+    assert key != make_cache_key("claude", "helper", ["a"], "prompt")
+    assert key != make_cache_key("claude", "helper", ["a", "b"], "other prompt")
+    assert key != make_cache_key("claude", "helper", ["a", "b"], "prompt", max_tokens=512)
+
+
+def test_memory_cache_lru_eviction():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_memory_cache_ttl():
+    cache = MemoryCache(max_entries=10, ttl=60)
+    with patch("src.cache.time.time", return_value=1000):
+        cache.set("a", "1")
+    with patch("src.cache.time.time", return_value=1030):
+        assert cache.get("a") == "1"
+    with patch("src.cache.time.time", return_value=1061):
+        assert cache.get("a") is None
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    SQLiteCache(path).set("key", "value")
+
+    assert SQLiteCache(path).get("key")[0] == "value"
+
+
+def test_sqlite_cache_size_based_eviction(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "responses.sqlite3"), max_entries=3, max_bytes=10)
+    for i, key in enumerate(["a", "b", "c", "d"]):
+        with patch("src.cache.time.time", return_value=1000 + i):
+            cache.set(key, "xxxx")
+
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.get("d")[0] == "xxxx"
+
+
+def test_response_cache_promotes_disk_hits(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    ResponseCache(MemoryCache(10), SQLiteCache(path)).set("key", "value")
+
+    cache = ResponseCache(MemoryCache(10), SQLiteCache(path))
+    assert cache.get("missing") is None
+    assert cache.get("key") == "value"
+    assert cache.get("key") == "value"
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_get_full_response_uses_cache(response_cache):
+    assistant = MagicMock(description="helper", tools=[])
+    assistant.llm.model = "claude-3-haiku-20240307"
+    assistant.run.return_value = "fresh answer"
+
+    assert get_full_response(assistant, "prompt") == "fresh answer"
+    assert get_full_response(assistant, "prompt") == "fresh answer"
+
+    assistant.run.assert_called_once()
+    assert response_cache.hits == 1
+    assert response_cache.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_get_full_response_async_uses_cache(response_cache):
+    assistant = MagicMock(description="helper", tools=[])
+    assistant.llm.model = "claude-3-haiku-20240307"
+    assistant.run.return_value = "fresh answer"
+
+    assert await get_full_response_async(assistant, "prompt") == "fresh answer"
+    assert await get_full_response_async(assistant, "prompt") == "fresh answer"
+    assistant.llm.model = "gpt-4"
+    assert await get_full_response_async(assistant, "prompt") == "fresh answer"
+
+    assert assistant.run.call_count == 2
+    assert response_cache.hits == 1
+
+
+def test_disabled_cache_skips_lookup():
+    configure_response_cache(enabled=False)
+    assistant = MagicMock()
+    assistant.run.return_value = "answer"
+
+    get_full_response(assistant, "prompt")
+    get_full_response(assistant, "prompt")
+
+    assert assistant.run.call_count == 2
@@ -0,0 +1,98 @@
+import pytest
+
+from src.checkpoint import RunCheckpoint, load_checkpoint
+from src.utils.exceptions import WorkflowError
+from src.workers import PlanResponse, WorkerTask
+
+
+def make_plan():
+    return PlanResponse(
+        objective_completion=False,
+        explanation="Two steps.",
+        tasks=[
+            WorkerTask(task="Subtask 1", prompt="Do subtask 1"),
+            WorkerTask(task="Subtask 2", prompt="Do subtask 2"),
+        ],
+    )
+
+
+def test_checkpoint_restores_plan_and_finished_tasks(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path), "run-1")
+    checkpoint.start("Objective", "Plugin", {"num_workers": 2})
+    checkpoint.save_plan(make_plan())
+    checkpoint.save_task(1, WorkerTask(task="Subtask 2", prompt="Do subtask 2", result="Result 2"))
+    checkpoint.close()
+
+    restored = load_checkpoint(str(tmp_path), "run-1")
+
+    assert (restored.objective, restored.use_case) == ("Objective", "Plugin")
+    assert restored.settings == {"num_workers": 2}
+    assert [task.result for task in restored.restored_tasks()] == [None, "Result 2"]
+    assert restored.final_output is None
+
+
+def test_checkpoint_does_not_record_failed_tasks(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path), "run-1")
+    checkpoint.start("Objective", None, {})
+    checkpoint.save_plan(make_plan())
+    failed = WorkerTask(task="Subtask 1", prompt="Do subtask 1", result="Error: boom", failed=True)
+    checkpoint.save_task(0, failed)
+    checkpoint.close()
+
+    restored = load_checkpoint(str(tmp_path), "run-1")
+
+    assert [task.result for task in restored.restored_tasks()] == [None, None]
+
+
+def test_checkpoint_holds_task_results_until_the_plan_is_saved(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path), "run-1")
+    checkpoint.start("Objective", None, {})
+    # Dispatched while the plan was still streaming
+    checkpoint.save_task(0, WorkerTask(task="Subtask 1", prompt="Do subtask 1", result="Result 1"))
+    assert RunCheckpoint(str(tmp_path), "run-1").results == {}
+
+    plan = make_plan()
+    plan.tasks[0].result = "Result 1"
+    checkpoint.save_plan(plan)
+    checkpoint.close()
+
+    restored = load_checkpoint(str(tmp_path), "run-1")
+    assert restored.plan.tasks[0].result is None
+    assert [task.result for task in restored.restored_tasks()] == ["Result 1", None]
+
+
+def test_checkpoint_ignores_task_records_before_the_plan(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path), "run-1")
+    checkpoint.start("Objective", None, {})
+    checkpoint._append({"type": "task", "index": 0, "result": "From another plan"})
+    checkpoint.save_plan(make_plan())
+    checkpoint.close()
+
+    restored = load_checkpoint(str(tmp_path), "run-1")
+
+    assert restored.results == {}
+
+
+def test_checkpoint_skips_truncated_last_line(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path), "run-1")
+    checkpoint.start("Objective", None, {})
+    checkpoint.save_final("Done")
+    checkpoint.close()
+    with open(checkpoint.path, "a") as checkpoint_file:
+        checkpoint_file.write('{"type": "task", "ind')
+
+    assert load_checkpoint(str(tmp_path), "run-1").final_output == "Done"
+
+
+def test_checkpoint_rejects_a_different_objective(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path), "run-1")
+    checkpoint.start("Objective", None, {})
+    checkpoint.close()
+
+    with pytest.raises(WorkflowError, match="different objective"):
+        RunCheckpoint(str(tmp_path), "run-1").start("Other objective", None, {})
+
+
+def test_load_checkpoint_of_unknown_run(tmp_path):
+    with pytest.raises(WorkflowError, match="No checkpoint found"):
+        load_checkpoint(str(tmp_path), "missing")
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.assistants import get_full_response, get_full_response_async
+from src.config import settings
+from src.deadline import call_timeout, current_deadline, deadline_scope, expired, remaining
+from src.utils.exceptions import AssistantError
+
+
+def test_deadline_scope_only_tightens():
+    assert remaining() is None
+    with deadline_scope(10):
+        outer = current_deadline()
+        with deadline_scope(100):
+            assert current_deadline() == outer
+        with deadline_scope(1):
+            assert current_deadline() < outer
+        assert 9 < remaining() <= 10
+    assert current_deadline() is None
+
+
+def test_call_timeout_is_cut_to_the_deadline():
+    with patch.object(settings, "CALL_TIMEOUTS", {"worker": 30.0}):
+        assert call_timeout("worker") == 30.0
+        with deadline_scope(5):
+            assert 4 < call_timeout("worker") <= 5
+        with deadline_scope(deadline=time.monotonic() - 1):
+            assert expired()
+            assert call_timeout("worker") == 0
+
+
+@pytest.mark.asyncio
+async def test_get_full_response_async_cancels_calls_that_exceed_the_deadline():
+    cancelled = asyncio.Event()
+
+    async def hang(prompt, stream=False):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    assistant = MagicMock()
+    assistant.llm.model = "claude-3-haiku-20240307"
+    assistant.arun = hang
+
+    with patch("src.assistants.has_native_async", return_value=True), deadline_scope(0.05):
+        with pytest.raises(AssistantError, match="did not respond"):
+            await get_full_response_async(assistant, "hello", stage="worker")
+
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_get_full_response_async_does_not_call_after_the_deadline():
+    assistant = MagicMock()
+    assistant.llm.model = "claude-3-haiku-20240307"
+
+    with deadline_scope(deadline=time.monotonic() - 1):
+        with pytest.raises(AssistantError, match="Deadline exceeded"):
+            await get_full_response_async(assistant, "hello", stage="worker")
+
+    assistant.run.assert_not_called()
+
+
+def test_get_full_response_gives_up_on_calls_that_exceed_the_deadline():
+    assistant = MagicMock()
+    assistant.llm.model = "claude-3-haiku-20240307"
+    assistant.run.side_effect = lambda prompt, stream=False: time.sleep(0.5)
+
+    started = time.monotonic()
+    with deadline_scope(0.05):
+        with pytest.raises(AssistantError, match="did not respond"):
+            get_full_response(assistant, "hello", stage="worker")
+
+    assert time.monotonic() - started < 0.5
@@ -0,0 +1,49 @@
+import json
+
+from src.exchange_log import ExchangeLog, read_exchange_log, render_markdown
+
+
+def test_exchange_log_appends_records_in_order(tmp_path):
+    path = str(tmp_path / "logs" / "run-1.jsonl")
+    log = ExchangeLog(path)
+    log.append("user", "Objective")
+    for index in range(50):
+        log.append("sub_assistant", f"Result {index}")
+    log.close()
+
+    records = list(read_exchange_log(path))
+    assert [record["content"] for record in records] == ["Objective"] + [
+        f"Result {index}" for index in range(50)
+    ]
+    assert all(record["type"] == "exchange" for record in records)
+
+
+def test_exchange_log_can_be_reopened_after_close(tmp_path):
+    path = str(tmp_path / "run-1.jsonl")
+    for content in ("First", "Second"):
+        log = ExchangeLog(path)
+        log.append("user", content)
+        log.close()
+
+    assert [record["content"] for record in read_exchange_log(path)] == ["First", "Second"]
+
+
+def test_render_markdown_skips_unreadable_lines(tmp_path):
+    path = tmp_path / "run-1.jsonl"
+    records = [
+        {"type": "exchange", "role": "user", "content": "Objective"},
+        {"type": "exchange", "role": "refiner_assistant", "content": "Refined"},
+        {"type": "final", "content": "Final"},
+    ]
+    path.write_text("".join(json.dumps(record) + "\n" for record in records) + '{"type": "exch')
+
+    markdown = render_markdown(str(path))
+
+    assert markdown == (
+        "# SAA Orchestrator Exchange Log\n\n"
+        "## Objective\nObjective\n\n"
+        "## Task Breakdown and Execution\n\n"
+        "### User\nObjective\n\n"
+        "### Refiner_assistant\nRefined\n\n"
+        "## Final Output\nFinal\n"
+    )
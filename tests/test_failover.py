@@ -0,0 +1,222 @@
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from phi.assistant import Assistant
+from phi.llm.base import LLM
+
+from src.assistants import assistant_pool, get_full_response_async, stream_full_response
+from src.config import settings
+from src.deadline import deadline_scope
+from src.failover import CircuitBreaker, fallback_models, get_circuit_breaker
+from src.utils.exceptions import AssistantError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_assistant(model, response=None, error=None):
+    assistant = MagicMock()
+    assistant.llm.model = model
+    assistant.run.side_effect = error
+    assistant.run.return_value = response
+    return assistant
+
+
+def test_circuit_opens_on_error_rate():
+    breaker = CircuitBreaker("gpt-4o", window=10, min_calls=4, error_rate=0.5)
+    for success in (True, False, True):
+        breaker.record(success, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record(False, 0.1)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.admit() is None
+
+
+def test_circuit_opens_on_slow_calls():
+    breaker = CircuitBreaker("gpt-4o", min_calls=2, slow_call_seconds=5, slow_call_rate=0.5)
+    breaker.record(True, 1)
+    breaker.record(True, 12)
+
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_probe_closes_or_reopens_circuit():
+    clock = FakeClock()
+    with patch("src.failover.time.monotonic", clock):
+        breaker = CircuitBreaker("gpt-4o", min_calls=1, cooldown=30)
+        breaker.record(False, 0.1)
+        clock.now += 29
+        assert breaker.admit() is None
+
+        clock.now += 1
+        assert breaker.admit() is not None
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        # Only one probe at a time
+        assert breaker.admit() is None
+        breaker.record(False, 0.1)
+        assert breaker.state == CircuitBreaker.OPEN
+
+        clock.now += 30
+        assert breaker.admit() is not None
+        breaker.record(True, 0.1)
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.admit() is not None
+
+
+def test_released_probe_lets_the_next_call_probe():
+    breaker = CircuitBreaker("gpt-4o")
+    breaker.state = CircuitBreaker.HALF_OPEN
+
+    probe = breaker.admit()
+    assert probe
+    assert breaker.admit() is None
+    breaker.release(probe)
+    next_probe = breaker.admit()
+    assert next_probe
+
+    # Releasing a stale probe leaves the one now in flight alone
+    breaker.release(probe)
+    assert breaker.admit() is None
+
+
+class SlowLLM(LLM):
+    async def aresponse(self, messages):
+        await asyncio.sleep(10)
+
+
+@pytest.mark.asyncio
+async def test_probe_is_released_when_the_deadline_is_already_spent():
+    breaker = get_circuit_breaker("claude-3-haiku-20240307")
+    breaker.state = CircuitBreaker.HALF_OPEN
+    primary = make_assistant("claude-3-haiku-20240307", response="never sent")
+
+    with patch.object(settings, "FALLBACK_CHAINS", {"worker": []}), deadline_scope(
+        deadline=time.monotonic() - 1
+    ), pytest.raises(AssistantError):
+        await get_full_response_async(primary, "hello", stage="worker")
+
+    primary.run.assert_not_called()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.admit() is not None
+
+
+@pytest.mark.asyncio
+async def test_probe_is_released_when_the_call_is_cancelled():
+    breaker = get_circuit_breaker("slow-model")
+    breaker.state = CircuitBreaker.HALF_OPEN
+    assistant = Assistant(name="Slow", llm=SlowLLM(model="slow-model"))
+
+    call = asyncio.create_task(get_full_response_async(assistant, "hello", stage="worker"))
+    await asyncio.sleep(0.01)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+    assert breaker.admit() is not None
+
+
+def test_fallback_models_per_stage():
+    chains = {"refiner": ["claude-3-5-sonnet-20240620", "gpt-4o", "gpt-4o"]}
+    with patch.object(settings, "FALLBACK_CHAINS", chains), patch.object(
+        settings, "FALLBACK_MODEL_1", "gpt-4o-mini"
+    ), patch.object(settings, "FALLBACK_MODEL_2", "gpt-4o-mini"):
+        assert fallback_models("refiner", "gpt-4o") == ["claude-3-5-sonnet-20240620"]
+        assert fallback_models("worker", "gpt-4o") == ["gpt-4o-mini"]
+        assert fallback_models("worker", "gpt-4o-mini") == []
+        assert fallback_models(None, "gpt-4o") == []
+
+
+@pytest.mark.asyncio
+async def test_get_full_response_async_fails_over_to_next_model():
+    primary = make_assistant("claude-3-haiku-20240307", error=ConnectionError("primary down"))
+    fallback = make_assistant("gpt-4o-mini", response="from fallback")
+
+    with patch.object(settings, "FALLBACK_CHAINS", {"worker": ["gpt-4o-mini"]}), patch.object(
+        assistant_pool, "with_model", return_value=fallback
+    ) as with_model:
+        response = await get_full_response_async(primary, "hello", max_retries=1, stage="worker")
+
+    assert response == "from fallback"
+    with_model.assert_called_once_with(primary, "gpt-4o-mini")
+    primary.run.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_routes_to_next_model_without_calling_primary():
+    primary = make_assistant("claude-3-haiku-20240307", response="from primary")
+    fallback = make_assistant("gpt-4o-mini", response="from fallback")
+    breaker = get_circuit_breaker("claude-3-haiku-20240307")
+    for _ in range(settings.CIRCUIT_BREAKER_MIN_CALLS):
+        breaker.record(False, 0.1)
+
+    with patch.object(settings, "FALLBACK_CHAINS", {"worker": ["gpt-4o-mini"]}), patch.object(
+        assistant_pool, "with_model", return_value=fallback
+    ):
+        response = await get_full_response_async(primary, "hello", stage="worker")
+
+    assert response == "from fallback"
+    primary.run.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_failover_raises_last_error_when_every_model_fails():
+    primary = make_assistant("claude-3-haiku-20240307", error=ConnectionError("primary down"))
+    fallback = make_assistant("gpt-4o-mini", error=ConnectionError("fallback down"))
+
+    with patch.object(settings, "FALLBACK_CHAINS", {"worker": ["gpt-4o-mini"]}), patch.object(
+        assistant_pool, "with_model", return_value=fallback
+    ), pytest.raises(AssistantError, match="fallback down"):
+        await get_full_response_async(primary, "hello", max_retries=1, stage="worker")
+
+
+@pytest.mark.asyncio
+async def test_bad_request_neither_fails_over_nor_counts_against_the_circuit():
+    primary = make_assistant("claude-3-haiku-20240307", error=ValueError("bad request"))
+
+    with patch.object(settings, "FALLBACK_CHAINS", {"worker": ["gpt-4o-mini"]}), patch.object(
+        assistant_pool, "with_model"
+    ) as with_model, pytest.raises(AssistantError, match="bad request"):
+        await get_full_response_async(primary, "hello", stage="worker")
+
+    with_model.assert_not_called()
+    assert not get_circuit_breaker("claude-3-haiku-20240307")._calls
+
+
+@pytest.mark.asyncio
+async def test_timeout_cut_short_by_the_deadline_does_not_count_against_the_circuit():
+    async def hang(prompt, stream=False):
+        await asyncio.sleep(60)
+
+    primary = make_assistant("claude-3-haiku-20240307")
+    primary.arun = hang
+
+    with patch("src.assistants.has_native_async", return_value=True), deadline_scope(0.05):
+        with pytest.raises(AssistantError, match="did not respond"):
+            await get_full_response_async(primary, "hello", stage="worker")
+
+    assert not get_circuit_breaker("claude-3-haiku-20240307")._calls
+
+
+@pytest.mark.asyncio
+async def test_stream_full_response_fails_over_before_first_chunk():
+    primary = make_assistant("claude-3-haiku-20240307", error=ConnectionError("primary down"))
+    fallback = make_assistant("gpt-4o-mini", response=iter(["a", "b"]))
+
+    with patch.object(settings, "FALLBACK_CHAINS", {"refiner": ["gpt-4o-mini"]}), patch.object(
+        assistant_pool, "with_model", return_value=fallback
+    ):
+        chunks = [
+            chunk
+            async for chunk in stream_full_response(primary, "hi", max_retries=1, stage="refiner")
+        ]
+
+    assert chunks == ["a", "b"]
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+from typing import Dict
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous enough for slow CI machines while still catching an eagerly imported provider SDK,
+# which alone costs several times this budget
+IMPORT_TIME_BUDGET_SECONDS = 1.5
+
+LAZY_MODULES = ["vertexai", "google.cloud.aiplatform", "anthropic", "openai", "tavily", "fastapi"]
+
+
+def import_times(module: str, cwd: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds of every module loaded by ``import module``."""
+    env = {**os.environ, "PYTHONPATH": PROJECT_ROOT}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.fixture(scope="module")
+def cli_import(tmp_path_factory):
+    cwd = tmp_path_factory.mktemp("import_time")
+    return import_times("src.main", str(cwd)), cwd
+
+
+def test_cli_import_does_not_load_provider_sdks(cli_import):
+    times, _ = cli_import
+    loaded = [module for module in LAZY_MODULES if module in times]
+    assert loaded == []
+
+
+@pytest.mark.benchmark
+def test_cli_import_within_budget(cli_import):
+    times, _ = cli_import
+    seconds = times["src.main"] / 1_000_000
+    assert seconds < IMPORT_TIME_BUDGET_SECONDS, f"importing src.main took {seconds:.2f}s"
+
+
+def test_cli_import_has_no_filesystem_side_effects(cli_import):
+    _, cwd = cli_import
+    assert os.listdir(cwd) == []
@@ -90,3 +90,161 @@ def test_run_workflow_with_plugin(mock_orchestrator, mock_asyncio_run):
     elif call_args.kwargs:
         assert "Test objective" in call_args.kwargs.get("objective", "")
         assert call_args.kwargs.get("use_case") == "test_plugin"
+
+
+def test_run_workflow_cache_options(mock_orchestrator, mock_asyncio_run, tmp_path):
+    with patch("src.main.configure_response_cache") as mock_configure:
+        mock_configure.return_value = None
+        result = runner.invoke(app, ["run-workflow", "Test objective", "--no-cache"])
+        assert result.exit_code == 0
+        mock_configure.assert_called_with(enabled=False, cache_dir=None)
+
+        cache_dir = str(tmp_path / "cache")
+        result = runner.invoke(app, ["run-workflow", "Test objective", "--cache-dir", cache_dir])
+        assert result.exit_code == 0
+        mock_configure.assert_called_with(enabled=True, cache_dir=cache_dir)
+
+
+def test_run_workflow_checkpoint_option(mock_orchestrator, mock_asyncio_run):
+    mock_asyncio_run.side_effect = Exception("Refiner down")
+
+    result = runner.invoke(app, ["run-workflow", "Test objective"])
+    assert mock_orchestrator.call_args.kwargs["settings"].checkpoints_enabled is False
+    assert "Resume the run with" not in result.stdout
+
+    result = runner.invoke(app, ["run-workflow", "Test objective", "--checkpoint"])
+    assert mock_orchestrator.call_args.kwargs["settings"].checkpoints_enabled is True
+    assert "Resume the run with" in result.stdout
+
+
+def test_run_workflow_writes_metrics_file(mock_orchestrator, mock_asyncio_run, tmp_path):
+    metrics_file = tmp_path / "metrics.prom"
+
+    result = runner.invoke(
+        app, ["run-workflow", "Test objective", "--metrics-file", str(metrics_file)]
+    )
+
+    assert result.exit_code == 0
+    assert "# TYPE saa_llm_calls_total counter" in metrics_file.read_text()
+
+
+def test_run_workflow_stream_writes_output(mock_orchestrator, tmp_path):
+    from src.orchestrator import WorkflowEvent
+
+    async def fake_stream(objective, use_case=None, run_id=None, stream_tokens=True):
+        yield WorkflowEvent(type="plan", source="planner", data={"tasks": ["Subtask 1"]})
+        yield WorkflowEvent(type="token", source="task-0", content="working")
+        yield WorkflowEvent(type="task_completed", source="task-0", content="Result 1")
+        yield WorkflowEvent(type="token", source="refiner", content="Streamed ")
+        yield WorkflowEvent(type="token", source="refiner", content="output")
+        yield WorkflowEvent(type="final", content="Streamed output")
+
+    mock_orchestrator.return_value.stream_workflow = fake_stream
+    output_file = tmp_path / "final.md"
+
+    result = runner.invoke(
+        app, ["run-workflow", "Test objective", "--stream", "--output-file", str(output_file)]
+    )
+
+    assert result.exit_code == 0
+    assert "Streamed output" in result.stdout
+    assert output_file.read_text() == "Streamed output"
+
+
+def test_run_workflow_stream_keeps_tasks_finished_before_the_plan(mock_orchestrator, tmp_path):
+    from src.orchestrator import WorkflowEvent
+
+    async def fake_stream(objective, use_case=None, run_id=None, stream_tokens=True):
+        data = {"index": 0, "task": "Subtask 1"}
+        yield WorkflowEvent(type="task_dispatched", source="task-0", data=data)
+        yield WorkflowEvent(type="task_completed", source="task-0", content="Result 1")
+        yield WorkflowEvent(type="plan", source="planner", data={"tasks": ["Subtask 1"]})
+        yield WorkflowEvent(type="final", content="Streamed output")
+
+    mock_orchestrator.return_value.stream_workflow = fake_stream
+
+    result = runner.invoke(
+        app,
+        ["run-workflow", "Test objective", "--stream", "--output-file", str(tmp_path / "f.md")],
+    )
+
+    assert result.exit_code == 0
+    assert "Worker task 1: Subtask 1 done" in result.stdout
+
+
+def test_run_batch_resumes_from_output(tmp_path):
+    input_file = tmp_path / "objectives.jsonl"
+    input_file.write_text('{"id": "a", "objective": "first"}\n{"id": "b", "objective": "second"}\n')
+    output_file = tmp_path / "results.jsonl"
+    output_file.write_text('{"id": "a", "status": "ok"}\n')
+
+    with patch("src.batch.Orchestrator") as MockOrchestrator:
+        MockOrchestrator.return_value.run_workflow = AsyncMock(return_value="Batch result")
+        result = runner.invoke(
+            app, ["run-batch", str(input_file), "--output", str(output_file), "-c", "2"]
+        )
+
+    assert result.exit_code == 0
+    assert "1 succeeded, 0 failed, 1 skipped" in result.stdout
+    MockOrchestrator.return_value.run_workflow.assert_awaited_once_with("second", use_case=None)
+    lines = output_file.read_text().splitlines()
+    assert len(lines) == 2
+    assert '"id":"b"' in lines[1]
+
+
+def test_run_batch_validates_input_before_running(tmp_path):
+    input_file = tmp_path / "objectives.jsonl"
+    input_file.write_text('{"id": "a", "objective": "first"}\n{"id": "b"\n')
+    output_file = tmp_path / "results.jsonl"
+
+    with patch("src.batch.Orchestrator") as MockOrchestrator:
+        result = runner.invoke(app, ["run-batch", str(input_file), "--output", str(output_file)])
+
+    assert "Invalid batch item on line 2" in result.stdout
+    MockOrchestrator.assert_not_called()
+    assert not output_file.exists()
+
+
+def test_resume_restores_run_settings(mock_orchestrator, mock_asyncio_run, tmp_path):
+    from src.checkpoint import RunCheckpoint
+    from src.orchestrator import Orchestrator, OrchestratorSettings
+
+    original = Orchestrator(
+        settings=OrchestratorSettings(
+            num_workers=5, checkpoint_dir=str(tmp_path / "old"), workflow_timeout=30
+        )
+    )
+    checkpoint = RunCheckpoint(str(tmp_path), "run-1")
+    checkpoint.start("Test objective", None, original._checkpoint_settings())
+    checkpoint.close()
+
+    result = runner.invoke(
+        app, ["resume", "run-1", "--checkpoint-dir", str(tmp_path), "--timeout", "90"]
+    )
+
+    assert result.exit_code == 0
+    assert "Resuming run run-1" in result.stdout
+    orchestrator_settings = mock_orchestrator.call_args.kwargs["settings"]
+    assert orchestrator_settings.num_workers == 5
+    assert orchestrator_settings.checkpoint_dir == str(tmp_path)
+    assert orchestrator_settings.workflow_timeout == 90
+    mock_orchestrator.return_value.resume_workflow.assert_called_once_with("run-1")
+
+
+def test_show_log_renders_markdown(tmp_path):
+    from src.exchange_log import ExchangeLog
+
+    log = ExchangeLog(str(tmp_path / "run-1.jsonl"))
+    log.append("user", "Test objective")
+    log.append_final("Test output")
+    log.close()
+    output_file = tmp_path / "log.md"
+
+    result = runner.invoke(
+        app,
+        ["show-log", "run-1", "--log-dir", str(tmp_path), "--output-file", str(output_file)],
+    )
+
+    assert result.exit_code == 0
+    assert "## Final Output\nTest output" in output_file.read_text()
+    assert runner.invoke(app, ["show-log", "missing", "--log-dir", str(tmp_path)]).exit_code == 1
@@ -0,0 +1,154 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.assistants import get_full_response, get_full_response_async, stream_full_response
+from src.cache import configure_response_cache
+from src.config import settings
+from src.metrics import (
+    CACHE_REQUESTS,
+    LLM_CALL_SECONDS,
+    LLM_CALLS,
+    LLM_IN_FLIGHT,
+    LLM_RETRIES,
+    LLM_TOKENS,
+    REGISTRY,
+    WORKER_QUEUE_DEPTH,
+    WORKER_TASKS,
+    WORKER_TASKS_IN_FLIGHT,
+    Counter,
+    Histogram,
+    plugin_scope,
+)
+from src.utils.exceptions import AssistantError
+from src.workers import SAAsWorkers, WorkerTask
+
+MODEL = "claude-3-haiku-20240307"
+
+
+@pytest.fixture
+def assistant():
+    assistant = MagicMock(description="helper", tools=[])
+    assistant.llm.model = MODEL
+    return assistant
+
+
+def test_counter_renders_text_exposition_format():
+    counter = Counter("calls_total", "Calls made.", ("model",))
+    counter.inc(model="a")
+    counter.inc(2, model='b"c')
+
+    assert counter.render() == (
+        "# HELP calls_total Calls made.\n"
+        "# TYPE calls_total counter\n"
+        'calls_total{model="a"} 1\n'
+        'calls_total{model="b\\"c"} 2\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", ("stage",), buckets=[1, 5])
+    for value in (0.5, 2, 10):
+        histogram.observe(value, stage="worker")
+
+    lines = histogram.render().splitlines()
+
+    assert 'latency_seconds_bucket{stage="worker",le="1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="worker",le="5"} 2' in lines
+    assert 'latency_seconds_bucket{stage="worker",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{stage="worker"} 12.5' in lines
+    assert 'latency_seconds_count{stage="worker"} 3' in lines
+
+
+def test_get_full_response_records_call_and_tokens(assistant):
+    assistant.run.return_value = "an answer"
+
+    with plugin_scope("research"):
+        get_full_response(assistant, "a question", stage="worker")
+
+    labels = {"stage": "worker", "model": MODEL, "plugin": "research"}
+    assert LLM_CALLS.value(outcome="success", **labels) == 1
+    assert LLM_CALL_SECONDS.count(**labels) == 1
+    assert LLM_TOKENS.value(direction="input", **labels) > 0
+    assert LLM_TOKENS.value(direction="output", **labels) > 0
+    assert LLM_IN_FLIGHT.value(stage="worker", model=MODEL) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_full_response_async_records_retries_and_errors(assistant):
+    assistant.run.side_effect = Exception("boom")
+
+    with patch.object(settings, "FALLBACK_CHAINS", {"planner": []}), pytest.raises(AssistantError):
+        await get_full_response_async(assistant, "hello", max_retries=3, delay=0, stage="planner")
+
+    labels = {"stage": "planner", "model": MODEL, "plugin": ""}
+    assert LLM_CALLS.value(outcome="error", **labels) == 3
+    assert LLM_RETRIES.value(**labels) == 2
+    assert LLM_IN_FLIGHT.value(stage="planner", model=MODEL) == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_full_response_records_retry(assistant):
+    assistant.run.side_effect = [Exception("boom"), iter(["recovered"])]
+
+    chunks = [
+        chunk async for chunk in stream_full_response(assistant, "hi", delay=0, stage="refiner")
+    ]
+
+    assert chunks == ["recovered"]
+    labels = {"stage": "refiner", "model": MODEL, "plugin": ""}
+    assert LLM_RETRIES.value(**labels) == 1
+    assert LLM_CALLS.value(outcome="success", **labels) == 1
+    assert LLM_CALLS.value(outcome="error", **labels) == 1
+
+
+def test_cache_lookups_are_counted(assistant, tmp_path):
+    configure_response_cache(enabled=True, cache_dir=str(tmp_path / "cache"))
+    try:
+        assistant.run.return_value = "fresh answer"
+        get_full_response(assistant, "prompt", stage="worker")
+        get_full_response(assistant, "prompt", stage="worker")
+    finally:
+        configure_response_cache(enabled=False)
+
+    assert CACHE_REQUESTS.value(stage="worker", plugin="", result="miss") == 1
+    assert CACHE_REQUESTS.value(stage="worker", plugin="", result="hit") == 1
+    assert LLM_CALLS.value(stage="worker", model=MODEL, plugin="", outcome="success") == 1
+
+
+@pytest.mark.asyncio
+async def test_process_tasks_tracks_queue_depth_and_outcomes():
+    workers = SAAsWorkers(num_workers=1)
+    depths = []
+
+    async def execute(worker, task, on_token=None):
+        depths.append((WORKER_QUEUE_DEPTH.value(), WORKER_TASKS_IN_FLIGHT.value()))
+        await asyncio.sleep(0)
+        if task.task == "bad":
+            raise Exception("failed")
+        return "done"
+
+    workers._workers = [MagicMock()]
+    workers.execute_task = execute
+    tasks = [WorkerTask(task=name, prompt=name) for name in ("one", "two", "bad")]
+    with plugin_scope("research"):
+        await workers.process_tasks(tasks)
+
+    assert depths == [(2, 1), (1, 1), (0, 1)]
+    assert WORKER_QUEUE_DEPTH.value() == 0
+    assert WORKER_TASKS_IN_FLIGHT.value() == 0
+    assert WORKER_TASKS.value(plugin="research", outcome="success") == 2
+    assert WORKER_TASKS.value(plugin="research", outcome="error") == 1
+
+
+def test_registry_write(tmp_path, assistant):
+    assistant.run.return_value = "an answer"
+    get_full_response(assistant, "a question", stage="worker")
+    path = tmp_path / "metrics" / "run.prom"
+
+    REGISTRY.write(str(path))
+
+    text = path.read_text()
+    assert "# TYPE saa_llm_calls_total counter" in text
+    assert 'saa_llm_calls_total{stage="worker",model="' + MODEL in text
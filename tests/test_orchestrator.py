@@ -1,11 +1,13 @@
+import asyncio
 import os
 from unittest.mock import AsyncMock, patch
 
 import pytest
 
-from src.orchestrator import Orchestrator, Task, TaskExchange
-from src.plugin_manager import PluginSpec
-from src.utils.exceptions import WorkflowError
+from src.exchange_log import render_markdown
+from src.orchestrator import Orchestrator, OrchestratorSettings, RunRecords, Task, TaskExchange
+from src.plugin_manager import PluginManager, PluginSpec, hookimpl
+from src.utils.exceptions import WorkflowError, WorkflowTimeoutError
 from src.workers import PlanResponse, WorkerTask
 
 
@@ -36,11 +38,11 @@ def test_task():
 
 
 @pytest.mark.asyncio
-@patch("src.orchestrator.create_assistant")
-async def test_run_workflow_single_task(mock_create_assistant, orchestrator):
+@patch("src.orchestrator.get_assistant")
+async def test_run_workflow_single_task(mock_get_assistant, orchestrator):
     mock_main_assistant = AsyncMock()
     mock_refiner_assistant = AsyncMock()
-    mock_create_assistant.side_effect = [mock_main_assistant, mock_refiner_assistant]
+    mock_get_assistant.side_effect = [mock_main_assistant, mock_refiner_assistant]
 
     mock_plan_response = PlanResponse(
         objective_completion=True, explanation="This is a simple task.", tasks=None
@@ -53,14 +55,16 @@ async def test_run_workflow_single_task(mock_create_assistant, orchestrator):
     assert len(orchestrator.state.task_exchanges) == 2
     assert orchestrator.state.task_exchanges[0].role == "user"
     assert orchestrator.state.task_exchanges[1].role == "main_assistant"
+    # Checkpoints are opt-in
+    assert not os.path.exists(os.path.join(orchestrator.output_dir, "runs"))
 
 
 @pytest.mark.asyncio
-@patch("src.orchestrator.create_assistant")
-async def test_run_workflow_multiple_tasks(mock_create_assistant, orchestrator):
+@patch("src.orchestrator.get_assistant")
+async def test_run_workflow_multiple_tasks(mock_get_assistant, orchestrator):
     mock_main_assistant = AsyncMock()
     mock_refiner_assistant = AsyncMock()
-    mock_create_assistant.side_effect = [mock_main_assistant, mock_refiner_assistant]
+    mock_get_assistant.side_effect = [mock_main_assistant, mock_refiner_assistant]
 
     mock_plan_response = PlanResponse(
         objective_completion=False,
@@ -91,10 +95,10 @@ async def test_run_workflow_multiple_tasks(mock_create_assistant, orchestrator):
 
 
 @pytest.mark.asyncio
-@patch("src.orchestrator.create_assistant")
-async def test_run_workflow_error(mock_create_assistant, orchestrator):
+@patch("src.orchestrator.get_assistant")
+async def test_run_workflow_error(mock_get_assistant, orchestrator):
     mock_main_assistant = AsyncMock()
-    mock_create_assistant.return_value = mock_main_assistant
+    mock_get_assistant.return_value = mock_main_assistant
 
     orchestrator.workers.plan_tasks = AsyncMock(side_effect=Exception("API Error"))
 
@@ -102,22 +106,45 @@ async def test_run_workflow_error(mock_create_assistant, orchestrator):
         await orchestrator.run_workflow("Test objective")
 
 
-def test_save_exchange_log(orchestrator):
-    orchestrator.state.task_exchanges = [
-        TaskExchange(role="user", content="Test objective"),
-        TaskExchange(role="main_assistant", content="Test response"),
-    ]
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_refiner_is_only_created_when_tasks_run(mock_get_assistant, orchestrator):
+    orchestrator.workers.plan_tasks = AsyncMock(
+        return_value=PlanResponse(objective_completion=True, explanation="Direct answer")
+    )
 
-    orchestrator._save_exchange_log("Test objective", "Test output")
+    await orchestrator.run_workflow("Test objective")
 
-    log_file_path = os.path.join(orchestrator.output_dir, "exchange_log.md")
-    assert os.path.exists(log_file_path)
+    assert [call.args[0] for call in mock_get_assistant.call_args_list] == ["MainAssistant"]
+
+
+def test_workers_use_sub_assistant_model(tmp_path):
+    orchestrator = Orchestrator(
+        output_dir=str(tmp_path),
+        settings=OrchestratorSettings(sub_assistant_model="gpt-4o"),
+    )
 
-    with open(log_file_path, "r") as f:
-        content = f.read()
-        assert "Test objective" in content
-        assert "Test response" in content
-        assert "Test output" in content
+    assert orchestrator.workers.model == "gpt-4o"
+
+
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_run_workflow_writes_exchange_log_per_run(mock_get_assistant, orchestrator):
+    orchestrator.workers.plan_tasks = AsyncMock(
+        return_value=PlanResponse(
+            objective_completion=True, explanation="Test response", tasks=None
+        )
+    )
+
+    await orchestrator.run_workflow("Test objective", run_id="run-1")
+    await orchestrator.run_workflow("Other objective", run_id="run-2")
+
+    content = render_markdown(orchestrator.exchange_log_file("run-1"))
+    assert "## Objective\nTest objective" in content
+    assert "### Main_assistant\nTest response" in content
+    assert "## Final Output\nTest response" in content
+    assert "Other objective" not in content
+    assert os.path.exists(orchestrator.exchange_log_file("run-2"))
 
 
 def test_state_to_dict(orchestrator):
@@ -139,13 +166,13 @@ async def test_run_workflow_with_plugin(orchestrator):
 
     orchestrator.use_case_prompts = {"TestPlugin": TestPlugin().get_use_case_prompt}
 
-    with patch("src.orchestrator.create_assistant") as mock_create_assistant, patch(
+    with patch("src.orchestrator.get_assistant") as mock_get_assistant, patch(
         "src.workers.SAAsWorkers.plan_tasks"
     ) as mock_plan_tasks:
 
         mock_main_assistant = AsyncMock()
         mock_refiner_assistant = AsyncMock()
-        mock_create_assistant.side_effect = [mock_main_assistant, mock_refiner_assistant]
+        mock_get_assistant.side_effect = [mock_main_assistant, mock_refiner_assistant]
 
         mock_plan_tasks.return_value = PlanResponse(
             objective_completion=True, explanation="Test result"
@@ -158,18 +185,41 @@ async def test_run_workflow_with_plugin(orchestrator):
         assert "Test plugin prompt for: Test objective" in mock_plan_tasks.call_args[0][0]
 
 
+@pytest.mark.asyncio
+async def test_run_workflow_uses_plugins_added_after_startup(tmp_path):
+    plugins = PluginManager(manifest_file=None)
+    orchestrator = Orchestrator(output_dir=str(tmp_path), plugins=plugins)
+
+    class LatePlugin:
+        @hookimpl
+        def get_use_case_prompt(self, objective: str) -> str:
+            return f"Late plugin prompt for: {objective}"
+
+    plugins.register_plugin(LatePlugin())
+
+    with patch("src.orchestrator.get_assistant"), patch(
+        "src.workers.SAAsWorkers.plan_tasks"
+    ) as mock_plan_tasks:
+        mock_plan_tasks.return_value = PlanResponse(
+            objective_completion=True, explanation="Test result"
+        )
+
+        assert await orchestrator.run_workflow("Test objective", use_case="LatePlugin")
+        assert "Late plugin prompt for: Test objective" in mock_plan_tasks.call_args[0][0]
+
+
 @pytest.mark.asyncio
 async def test_run_workflow_with_custom_prompt(orchestrator):
     custom_prompt = "Custom prompt: {objective}"
     orchestrator.settings.custom_prompt_template = custom_prompt
 
-    with patch("src.orchestrator.create_assistant") as mock_create_assistant, patch(
+    with patch("src.orchestrator.get_assistant") as mock_get_assistant, patch(
         "src.workers.SAAsWorkers.plan_tasks"
     ) as mock_plan_tasks:
 
         mock_main_assistant = AsyncMock()
         mock_refiner_assistant = AsyncMock()
-        mock_create_assistant.side_effect = [mock_main_assistant, mock_refiner_assistant]
+        mock_get_assistant.side_effect = [mock_main_assistant, mock_refiner_assistant]
 
         mock_plan_tasks.return_value = PlanResponse(
             objective_completion=True, explanation="Test result"
@@ -187,3 +237,478 @@ async def test_run_workflow_plugin_not_found(orchestrator):
     with pytest.raises(WorkflowError) as exc_info:
         await orchestrator.run_workflow("Test objective", use_case="NonExistentPlugin")
     assert "Plugin 'NonExistentPlugin' not found" in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_stream_workflow_emits_events(mock_get_assistant, orchestrator):
+    orchestrator.workers.plan_tasks = AsyncMock(
+        return_value=PlanResponse(
+            objective_completion=False,
+            explanation="Two steps.",
+            tasks=[WorkerTask(task="Subtask 1", prompt="Do subtask 1")],
+        )
+    )
+
+    async def fake_process(tasks, on_token=None, on_complete=None, **kwargs):
+        on_token(0, "partial")
+        tasks[0].result = "Result 1"
+        on_complete(0, tasks[0])
+        return tasks
+
+    async def fake_summarize(objective, results, refiner, on_token=None):
+        on_token("Final ")
+        on_token("summary")
+        return "Final summary"
+
+    orchestrator.workers.process_tasks = fake_process
+    orchestrator.workers.summarize_results = fake_summarize
+
+    events = [event async for event in orchestrator.stream_workflow("Test objective")]
+
+    assert [(event.type, event.source) for event in events] == [
+        ("plan", "planner"),
+        ("task_dispatched", "task-0"),
+        ("token", "task-0"),
+        ("task_completed", "task-0"),
+        ("token", "refiner"),
+        ("token", "refiner"),
+        ("final", ""),
+    ]
+    assert events[0].data["tasks"] == ["Subtask 1"]
+    assert events[-1].content == "Final summary"
+
+
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_stream_workflow_without_tokens_does_not_stream_calls(
+    mock_get_assistant, orchestrator
+):
+    orchestrator.workers.plan_tasks = AsyncMock(
+        return_value=PlanResponse(
+            objective_completion=False,
+            explanation="Two steps.",
+            tasks=[WorkerTask(task="Subtask 1", prompt="Do subtask 1", result=None)],
+        )
+    )
+    orchestrator.workers.process_tasks = AsyncMock(
+        return_value=[WorkerTask(task="Subtask 1", prompt="Do subtask 1", result="Result 1")]
+    )
+    orchestrator.workers.summarize_results = AsyncMock(return_value="Final summary")
+
+    events = [
+        event async for event in orchestrator.stream_workflow("Test objective", stream_tokens=False)
+    ]
+
+    assert [event.type for event in events] == ["plan", "task_dispatched", "final"]
+    assert orchestrator.workers.process_tasks.call_args.kwargs["on_token"] is None
+    assert orchestrator.workers.summarize_results.call_args.kwargs["on_token"] is None
+
+
+@pytest.mark.asyncio
+async def test_stream_workflow_propagates_errors(orchestrator):
+    with pytest.raises(WorkflowError):
+        async for _ in orchestrator.stream_workflow("Test objective", use_case="Missing"):
+            pass
+
+
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_run_workflow_progressive_refinement(mock_get_assistant, orchestrator):
+    orchestrator.settings.progressive_refinement = True
+    orchestrator.workers.plan_tasks = AsyncMock(
+        return_value=PlanResponse(
+            objective_completion=False,
+            explanation="Two steps.",
+            tasks=[
+                WorkerTask(task="Subtask 1", prompt="Do subtask 1"),
+                WorkerTask(task="Subtask 2", prompt="Do subtask 2"),
+            ],
+        )
+    )
+
+    async def fake_execute(worker, task):
+        return f"Result of {task.task}"
+
+    orchestrator.workers.execute_task = fake_execute
+    folded = []
+
+    async def fake_progressive(objective, completed, total, refiner, on_token=None):
+        while len(folded) < total:
+            folded.append((await completed.get()).result)
+        return "Progressive summary"
+
+    orchestrator.workers.summarize_progressively = fake_progressive
+    orchestrator.workers.summarize_results = AsyncMock(side_effect=AssertionError("not used"))
+
+    result = await orchestrator.run_workflow("Test objective")
+
+    assert result == "Progressive summary"
+    assert sorted(folded) == ["Result of Subtask 1", "Result of Subtask 2"]
+    assert [exchange.role for exchange in orchestrator.state.task_exchanges] == [
+        "user",
+        "main_assistant",
+        "sub_assistant",
+        "sub_assistant",
+        "refiner_assistant",
+    ]
+
+
+def _plan_with_slow_task(orchestrator):
+    orchestrator.workers.plan_tasks = AsyncMock(
+        return_value=PlanResponse(
+            objective_completion=False,
+            explanation="Two steps.",
+            tasks=[
+                WorkerTask(task="Fast", prompt="Do the fast part"),
+                WorkerTask(task="Slow", prompt="Do the slow part"),
+            ],
+        )
+    )
+
+    async def fake_execute(worker, task):
+        if task.task == "Slow":
+            await asyncio.sleep(60)
+        return f"Result of {task.task}"
+
+    orchestrator.workers.execute_task = fake_execute
+
+
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_run_workflow_refines_partial_results_at_the_deadline(
+    mock_get_assistant, orchestrator
+):
+    orchestrator.settings.workflow_timeout = 0.2
+    _plan_with_slow_task(orchestrator)
+    orchestrator.workers.summarize_results = AsyncMock(return_value="Partial summary")
+
+    result = await orchestrator.run_workflow("Test objective")
+
+    assert result == "Partial summary"
+    refined = orchestrator.workers.summarize_results.await_args.args[1]
+    assert [task.task for task in refined] == ["Fast"]
+    assert [task.task for task in orchestrator.state.tasks] == ["Fast"]
+
+
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_run_workflow_fails_at_the_deadline_with_fail_policy(
+    mock_get_assistant, orchestrator
+):
+    orchestrator.settings.workflow_timeout = 0.2
+    orchestrator.settings.partial_results_policy = "fail"
+    _plan_with_slow_task(orchestrator)
+
+    with pytest.raises(WorkflowTimeoutError, match="1 of 2 tasks"):
+        await orchestrator.run_workflow("Test objective")
+
+
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_run_workflow_executes_tasks_while_planning(mock_get_assistant, orchestrator):
+    tasks = [
+        WorkerTask(task="Subtask 1", prompt="Do subtask 1"),
+        WorkerTask(task="Subtask 2", prompt="Do subtask 2"),
+    ]
+    started = []
+
+    async def fake_plan(prompt, main_assistant, on_task=None):
+        on_task(tasks[0].model_copy())
+        # Let the worker pick up the first task before the plan is complete
+        await asyncio.sleep(0.01)
+        started.append("plan complete")
+        return PlanResponse(objective_completion=False, explanation="Two steps.", tasks=tasks)
+
+    async def fake_execute(worker, task):
+        started.append(task.task)
+        return f"Result of {task.task}"
+
+    orchestrator.workers.plan_tasks = fake_plan
+    orchestrator.workers.execute_task = fake_execute
+    orchestrator.workers.summarize_results = AsyncMock(return_value="Final summary")
+
+    result = await orchestrator.run_workflow("Test objective")
+
+    assert result == "Final summary"
+    assert started == ["Subtask 1", "plan complete", "Subtask 2"]
+    assert [task.result for task in orchestrator.state.tasks] == [
+        "Result of Subtask 1",
+        "Result of Subtask 2",
+    ]
+
+
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_stream_workflow_announces_streamed_tasks_before_they_run(
+    mock_get_assistant, orchestrator
+):
+    tasks = [
+        WorkerTask(task="Subtask 1", prompt="Do subtask 1"),
+        WorkerTask(task="Subtask 2", prompt="Do subtask 2"),
+    ]
+
+    async def fake_plan(prompt, main_assistant, on_task=None):
+        on_task(tasks[0].model_copy())
+        # Let the first task finish before the plan is complete
+        await asyncio.sleep(0.01)
+        return PlanResponse(objective_completion=False, explanation="Two steps.", tasks=tasks)
+
+    async def fake_execute(worker, task, on_token=None):
+        on_token(f"Working on {task.task}")
+        return f"Result of {task.task}"
+
+    orchestrator.workers.plan_tasks = fake_plan
+    orchestrator.workers.execute_task = fake_execute
+    orchestrator.workers.summarize_results = AsyncMock(return_value="Final summary")
+
+    events = [event async for event in orchestrator.stream_workflow("Test objective")]
+
+    assert [(event.type, event.source) for event in events] == [
+        ("task_dispatched", "task-0"),
+        ("token", "task-0"),
+        ("task_completed", "task-0"),
+        ("task_dispatched", "task-1"),
+        ("plan", "planner"),
+        ("token", "task-1"),
+        ("task_completed", "task-1"),
+        ("final", ""),
+    ]
+    assert events[0].data == {"index": 0, "task": "Subtask 1"}
+    assert events[4].data["tasks"] == ["Subtask 1", "Subtask 2"]
+
+
+def _decomposing_plan(orchestrator, sub_plans):
+    """Plan "Big" (decomposable) and "Small"; ``sub_plans`` maps a task prompt to its sub-plan."""
+    tasks = [
+        WorkerTask(task="Big", prompt="Do big", decomposable=True),
+        WorkerTask(task="Small", prompt="Do small"),
+    ]
+    plans = []
+
+    async def fake_plan(prompt, main_assistant, on_task=None):
+        plans.append(prompt)
+        if prompt in sub_plans:
+            return PlanResponse(
+                objective_completion=False, explanation="Split.", tasks=sub_plans[prompt]
+            )
+        return PlanResponse(objective_completion=False, explanation="Two steps.", tasks=tasks)
+
+    async def fake_execute(worker, task):
+        return f"Result of {task.task}"
+
+    async def fake_summarize(objective, results, refiner_assistant, on_token=None):
+        return f"Summary of {objective}: " + ", ".join(task.result for task in results)
+
+    orchestrator.workers.plan_tasks = fake_plan
+    orchestrator.workers.execute_task = fake_execute
+    orchestrator.workers.summarize_results = fake_summarize
+    return plans
+
+
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_run_workflow_runs_decomposable_task_as_sub_workflow(
+    mock_get_assistant, orchestrator
+):
+    orchestrator.settings.decomposition_max_depth = 1
+    plans = _decomposing_plan(
+        orchestrator,
+        {
+            "Do big": [
+                WorkerTask(task="Part 1", prompt="Do part 1", decomposable=True),
+                WorkerTask(task="Part 2", prompt="Do part 2"),
+            ]
+        },
+    )
+
+    await orchestrator.run_workflow("Test objective")
+
+    # "Part 1" is past the depth limit and runs directly
+    assert plans[1:] == ["Do big"]
+    assert [task.result for task in orchestrator.state.tasks] == [
+        "Summary of Do big: Result of Part 1, Result of Part 2",
+        "Result of Small",
+    ]
+
+
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_decomposition_stops_when_fan_out_budget_is_used_up(mock_get_assistant, orchestrator):
+    orchestrator.settings.decomposition_max_depth = 2
+    orchestrator.settings.decomposition_max_tasks = 3
+    plans = _decomposing_plan(
+        orchestrator,
+        {
+            "Do big": [
+                WorkerTask(task="Part 1", prompt="Do part 1", decomposable=True),
+                WorkerTask(task="Part 2", prompt="Do part 2"),
+            ],
+            "Do part 1": [
+                WorkerTask(task="Piece 1", prompt="Do piece 1"),
+                WorkerTask(task="Piece 2", prompt="Do piece 2"),
+            ],
+        },
+    )
+
+    await orchestrator.run_workflow("Test objective")
+
+    # Only one subtask is left after "Do big", so "Part 1" is not planned again
+    assert plans[1:] == ["Do big"]
+    assert orchestrator.state.tasks[0].result == (
+        "Summary of Do big: Result of Part 1, Result of Part 2"
+    )
+
+
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_decomposition_is_off_by_default(mock_get_assistant, orchestrator):
+    plans = _decomposing_plan(
+        orchestrator, {"Do big": [WorkerTask(task="Part 1", prompt="Do part 1")]}
+    )
+
+    await orchestrator.run_workflow("Test objective")
+
+    assert plans[1:] == []
+    assert orchestrator.state.tasks[0].result == "Result of Big"
+
+
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_decomposition_shares_concurrency_across_levels(mock_get_assistant, orchestrator):
+    orchestrator.settings.decomposition_max_depth = 1
+    orchestrator.settings.decomposition_max_concurrency = 2
+    _decomposing_plan(
+        orchestrator,
+        {"Do big": [WorkerTask(task=f"Part {i}", prompt=f"Do part {i}") for i in range(6)]},
+    )
+    in_flight = 0
+    peak = 0
+
+    async def fake_execute(worker, task):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return "done"
+
+    orchestrator.workers.execute_task = fake_execute
+
+    await orchestrator.run_workflow("Test objective")
+
+    assert peak == 2
+    assert orchestrator.state.tasks[0].result.startswith("Summary of Do big: done")
+
+
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_resume_workflow_skips_planning_and_finished_tasks(mock_get_assistant, orchestrator):
+    orchestrator.settings.checkpoints_enabled = True
+    orchestrator.workers.plan_tasks = AsyncMock(
+        return_value=PlanResponse(
+            objective_completion=False,
+            explanation="Two steps.",
+            tasks=[
+                WorkerTask(task="Subtask 1", prompt="Do subtask 1"),
+                WorkerTask(task="Subtask 2", prompt="Do subtask 2"),
+            ],
+        )
+    )
+    executed = []
+
+    async def fake_execute(worker, task):
+        executed.append(task.task)
+        return f"Result of {task.task}"
+
+    orchestrator.workers.execute_task = fake_execute
+    orchestrator.workers.summarize_results = AsyncMock(side_effect=Exception("Refiner down"))
+
+    with pytest.raises(WorkflowError, match="Refiner down"):
+        await orchestrator.run_workflow("Test objective", run_id="run-1")
+
+    orchestrator.workers.summarize_results = AsyncMock(return_value="Final summary")
+    result = await orchestrator.resume_workflow("run-1")
+
+    assert result == "Final summary"
+    orchestrator.workers.plan_tasks.assert_awaited_once()
+    assert sorted(executed) == ["Subtask 1", "Subtask 2"]
+    refined = orchestrator.workers.summarize_results.await_args.args[1]
+    assert [task.result for task in refined] == ["Result of Subtask 1", "Result of Subtask 2"]
+
+    # A completed run returns its final output without running anything
+    orchestrator.workers.summarize_results.reset_mock()
+    assert await orchestrator.resume_workflow("run-1") == "Final summary"
+    orchestrator.workers.summarize_results.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@patch("src.orchestrator.get_assistant")
+async def test_concurrent_runs_on_one_orchestrator_stay_apart(mock_get_assistant, orchestrator):
+    async def fake_plan(prompt, main_assistant, on_task=None):
+        objective = "first" if "first" in prompt else "second"
+        return PlanResponse(
+            objective_completion=False,
+            explanation="One step.",
+            tasks=[WorkerTask(task=f"Task for {objective}", prompt=f"Do {objective}")],
+        )
+
+    async def fake_execute(worker, task):
+        await asyncio.sleep(0.01)
+        return f"Result of {task.prompt}"
+
+    async def fake_summarize(objective, results, refiner_assistant, on_token=None):
+        return results[0].result
+
+    orchestrator.workers.plan_tasks = fake_plan
+    orchestrator.workers.execute_task = fake_execute
+    orchestrator.workers.summarize_results = fake_summarize
+
+    results = await asyncio.gather(
+        orchestrator.run_workflow("first objective", run_id="run-1"),
+        orchestrator.run_workflow("second objective", run_id="run-2"),
+    )
+
+    assert results == ["Result of Do first", "Result of Do second"]
+    assert orchestrator.active_runs == {}
+    for run_id, objective in (("run-1", "first"), ("run-2", "second")):
+        content = render_markdown(orchestrator.exchange_log_file(run_id))
+        other = "second" if objective == "first" else "first"
+        assert f"Result of Do {objective}" in content
+        assert f"Do {other}" not in content
+    # The orchestrator keeps only the state of the run that finished last
+    assert len(orchestrator.state.task_exchanges) == 4
+
+
+@pytest.mark.asyncio
+async def test_run_workflow_rejects_a_run_id_that_is_running(orchestrator):
+    orchestrator.active_runs["run-1"] = object()
+
+    with pytest.raises(WorkflowError, match="already running"):
+        await orchestrator.run_workflow("Test objective", run_id="run-1")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("run_id", ["../escape", "/tmp/absolute", "..", "a/b", ""])
+async def test_run_workflow_rejects_run_ids_that_are_not_safe_in_paths(orchestrator, run_id):
+    with pytest.raises(WorkflowError, match="Invalid run ID"):
+        await orchestrator.run_workflow("Test objective", run_id=run_id)
+
+    assert not orchestrator.active_runs
+
+
+def test_run_records_store_each_result_once():
+    records = RunRecords()
+    records.add_exchange("user", "Objective")
+    records.add_task("Task", "Do it", "Result")
+    records.add_exchange("refiner_assistant", "Refined")
+
+    assert records.exchanges[1] == ("sub_assistant", 0)
+    state = records.to_state()
+    assert [exchange.role for exchange in state.task_exchanges] == [
+        "user",
+        "sub_assistant",
+        "refiner_assistant",
+    ]
+    assert state.task_exchanges[1].content is state.tasks[0].result
+    assert state.to_dict() == records.to_dict()
@@ -0,0 +1,102 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.orchestrator import Orchestrator, OrchestratorSettings
+from src.plan_cache import PlanCache, normalize_objective
+from src.workers import PlanResponse, WorkerTask
+
+
+def make_plan(explanation="Compare the two languages"):
+    return PlanResponse(
+        objective_completion=False,
+        explanation=explanation,
+        tasks=[
+            WorkerTask(task="Performance", prompt="Compare performance"),
+            WorkerTask(task="Ecosystem", prompt="Compare ecosystems"),
+        ],
+    )
+
+
+def test_normalize_objective():
+    assert normalize_objective("  Compare Rust and Go!  ") == "compare rust and go"
+
+
+def test_exact_hit_after_normalization():
+    cache = PlanCache()
+    cache.put("Compare Rust and Go", make_plan())
+
+    plan = cache.get("compare rust AND go?")
+
+    assert plan is not None
+    assert plan.explanation == "Compare the two languages"
+    assert cache.exact_hits == 1
+
+
+def test_similarity_hit_for_near_duplicate():
+    cache = PlanCache(similarity_threshold=0.7)
+    cache.put("compare the performance of rust and go for web servers", make_plan())
+
+    plan = cache.get("please compare the performance of rust and go for web servers")
+
+    assert plan is not None
+    assert cache.similar_hits == 1
+
+
+def test_miss_for_unrelated_objective():
+    cache = PlanCache(similarity_threshold=0.7)
+    cache.put("compare the performance of rust and go for web servers", make_plan())
+
+    assert cache.get("write a marketing plan for a bakery") is None
+    assert cache.misses == 1
+    assert cache.hit_rate == 0.0
+
+
+def test_namespaces_are_isolated():
+    cache = PlanCache()
+    cache.put("compare rust and go", make_plan(), namespace="ComparativeAnalysisPlugin")
+
+    assert cache.get("compare rust and go") is None
+    assert cache.get("compare rust and go", namespace="ComparativeAnalysisPlugin") is not None
+
+
+def test_lru_eviction():
+    cache = PlanCache(max_entries=2)
+    cache.put("objective one", make_plan())
+    cache.put("objective two", make_plan())
+    cache.get("objective one")
+    cache.put("objective three", make_plan())
+
+    assert len(cache) == 2
+    assert cache.get("objective one") is not None
+    assert cache.get("objective two") is None
+
+
+def test_cached_plans_are_copies():
+    cache = PlanCache()
+    cache.put("compare rust and go", make_plan())
+
+    plan = cache.get("compare rust and go")
+    plan.tasks[0].result = "mutated"
+
+    assert cache.get("compare rust and go").tasks[0].result is None
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_reuses_cached_plan(tmp_path):
+    orchestrator = Orchestrator(
+        output_dir=str(tmp_path),
+        settings=OrchestratorSettings(plan_cache_enabled=True, plan_cache_similarity_threshold=0.7),
+    )
+    orchestrator.workers.plan_tasks = AsyncMock(
+        return_value=PlanResponse(objective_completion=True, explanation="Direct answer")
+    )
+
+    with patch("src.orchestrator.get_assistant"):
+        first = await orchestrator.run_workflow("Explain the CAP theorem in distributed systems")
+        second = await orchestrator.run_workflow(
+            "Explain the CAP theorem in distributed systems briefly"
+        )
+
+    assert first == second == "Direct answer"
+    orchestrator.workers.plan_tasks.assert_awaited_once()
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from src.plan_parser import PlanStreamParser, load_json, repair_json, strip_trailing_commas
+
+PLAN = {
+    "objective_completion": False,
+    "explanation": 'Split into {two} "parts"',
+    "tasks": [
+        {"task": "First", "prompt": "Look at [1, 2] and {braces}"},
+        {"task": "Second", "prompt": 'Say "done", then stop}'},
+    ],
+}
+
+
+def test_strip_trailing_commas_leaves_strings_alone():
+    text = '{"a": [1, 2, ], "b": "x, }", }'
+    assert json.loads(strip_trailing_commas(text)) == {"a": [1, 2], "b": "x, }"}
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        "```json\n" + json.dumps(PLAN) + "\n```",
+        "Here is the plan:\n" + json.dumps(PLAN, indent=2) + "\nLet me know if it helps.",
+        json.dumps(PLAN, indent=2).replace('"\n    }', '",\n    }'),
+    ],
+)
+def test_load_json_repairs_common_malformations(response):
+    assert load_json(response) == PLAN
+
+
+def test_load_json_raises_when_unrepairable():
+    with pytest.raises(json.JSONDecodeError):
+        load_json("no plan here")
+    assert repair_json("no plan here") == "no plan here"
+
+
+def test_stream_parser_returns_tasks_as_they_close():
+    text = "Sure!\n```json\n" + json.dumps(PLAN, indent=2) + "\n```"
+    parser = PlanStreamParser()
+    seen = []
+    closed_at = []
+    for position, char in enumerate(text):
+        for task in parser.feed(char):
+            seen.append(task)
+            closed_at.append(position)
+
+    assert seen == PLAN["tasks"]
+    # The first task is available long before the response ends
+    assert closed_at[0] < text.index('"Second"')
+    assert parser.text == text
+
+
+def test_stream_parser_stops_after_a_malformed_task():
+    text = '{"tasks": [{"task": "A", "prompt": "a"}, {"task": B}, {"task": "C", "prompt": "c"}]}'
+    parser = PlanStreamParser()
+
+    assert parser.feed(text) == [{"task": "A", "prompt": "a"}]
@@ -0,0 +1,159 @@
+import os
+import textwrap
+from importlib.metadata import EntryPoint
+from unittest.mock import patch
+
+import pytest
+
+from src.plugin_manager import LazyUseCasePrompt, PluginManager, scan_plugin_source
+from src.utils.exceptions import PluginError
+
+PLUGIN_SOURCE = '''
+from src.plugin_manager import hookimpl
+
+{side_effect}
+
+
+class {name}:
+    @hookimpl
+    def get_use_case_prompt(self, objective: str) -> str:
+        """{description}"""
+        return f"{prefix}: {{objective}}"
+'''
+
+
+def write_plugin(folder, filename, name="DemoPlugin", prefix="Demo", side_effect=""):
+    path = folder / filename
+    path.write_text(
+        PLUGIN_SOURCE.format(
+            name=name, prefix=prefix, description=f"{name} description.", side_effect=side_effect
+        )
+    )
+    return path
+
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def plugin_folder(tmp_path):
+    folder = tmp_path / "plugins"
+    folder.mkdir()
+    return folder
+
+
+@pytest.fixture
+def manifest_file(tmp_path):
+    return str(tmp_path / "cache" / "plugin_manifest.json")
+
+
+def test_scan_plugin_source():
+    source = textwrap.dedent(
+        '''
+        class Helper:
+            pass
+
+        class DocumentedPlugin:
+            """Class docstring."""
+
+        class HookPlugin:
+            """Class docstring."""
+
+            def get_use_case_prompt(self, objective):
+                """Hook docstring."""
+        '''
+    ).encode()
+
+    assert scan_plugin_source(source) == {
+        "DocumentedPlugin": "Class docstring.",
+        "HookPlugin": "Hook docstring.",
+    }
+
+
+def test_plugins_are_listed_without_importing(plugin_folder, manifest_file, tmp_path):
+    marker = tmp_path / "imported"
+    write_plugin(plugin_folder, "demo_plugin.py", side_effect=f"open({str(marker)!r}, 'w').close()")
+    write_plugin(plugin_folder, "notes.py", name="IgnoredPlugin")
+    manager = PluginManager(manifest_file=manifest_file)
+
+    manager.load_plugins(str(plugin_folder))
+    prompts = manager.get_use_case_prompts()
+
+    assert list(prompts) == ["DemoPlugin"]
+    assert isinstance(prompts["DemoPlugin"], LazyUseCasePrompt)
+    assert prompts["DemoPlugin"].__doc__ == "DemoPlugin description."
+    assert not marker.exists()
+
+    assert prompts["DemoPlugin"]("objective") == "Demo: objective"
+    assert marker.exists()
+
+
+def test_manifest_cache_skips_unchanged_files(plugin_folder, manifest_file):
+    path = write_plugin(plugin_folder, "demo_plugin.py")
+    PluginManager(manifest_file=manifest_file).load_plugins(str(plugin_folder))
+
+    with patch("src.plugin_manager.scan_plugin_source") as mock_scan:
+        manager = PluginManager(manifest_file=manifest_file)
+        manager.load_plugins(str(plugin_folder))
+        # A new mtime with identical content is matched by hash
+        bump_mtime(path)
+        manager.refresh(force=True)
+
+    mock_scan.assert_not_called()
+    assert list(manager.get_use_case_prompts()) == ["DemoPlugin"]
+
+
+def test_changed_plugins_are_hot_reloaded(plugin_folder, manifest_file):
+    path = write_plugin(plugin_folder, "demo_plugin.py", prefix="Old")
+    manager = PluginManager(manifest_file=manifest_file, reload_interval=0)
+    manager.load_plugins(str(plugin_folder))
+    assert manager.get_use_case_prompts()["DemoPlugin"]("x") == "Old: x"
+
+    write_plugin(plugin_folder, "demo_plugin.py", prefix="New")
+    bump_mtime(path)
+    write_plugin(plugin_folder, "other_plugin.py", name="OtherPlugin")
+
+    prompts = manager.get_use_case_prompts()
+    assert prompts["DemoPlugin"]("x") == "New: x"
+    assert set(prompts) == {"DemoPlugin", "OtherPlugin"}
+
+    os.remove(path)
+    assert set(manager.get_use_case_prompts()) == {"OtherPlugin"}
+
+
+def test_broken_plugins_are_reported(plugin_folder, manifest_file, caplog):
+    (plugin_folder / "broken_plugin.py").write_text("class BrokenPlugin(:\n")
+    write_plugin(plugin_folder, "failing_plugin.py", name="FailingPlugin", side_effect="1 / 0")
+    manager = PluginManager(manifest_file=manifest_file)
+
+    manager.load_plugins(str(plugin_folder))
+
+    assert "Skipping plugin file" in caplog.text
+    prompts = manager.get_use_case_prompts()
+    assert list(prompts) == ["FailingPlugin"]
+    with pytest.raises(PluginError, match="division by zero"):
+        prompts["FailingPlugin"]("objective")
+    with pytest.raises(PluginError, match="not found"):
+        manager.get_plugin("MissingPlugin")
+
+
+def test_entry_point_plugins(tmp_path, manifest_file, monkeypatch):
+    package = tmp_path / "site"
+    package.mkdir()
+    write_plugin(package, "installed_saa_plugin.py", name="InstalledPlugin", prefix="Installed")
+    monkeypatch.syspath_prepend(str(package))
+    entry_point = EntryPoint(
+        name="installed",
+        value="installed_saa_plugin:InstalledPlugin",
+        group="saa_orchestrator.plugins",
+    )
+    manager = PluginManager(manifest_file=manifest_file)
+
+    with patch("src.plugin_manager.entry_points", return_value=[entry_point]):
+        manager.discover_entry_points()
+
+    prompts = manager.get_use_case_prompts()
+    assert prompts["InstalledPlugin"].__doc__ == "InstalledPlugin description."
+    assert prompts["InstalledPlugin"]("objective") == "Installed: objective"
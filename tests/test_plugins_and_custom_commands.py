@@ -65,13 +65,13 @@ async def test_orchestrator_with_plugin():
     orchestrator = Orchestrator(settings=OrchestratorSettings())
     orchestrator.use_case_prompts = plugin_manager.get_use_case_prompts()
 
-    with patch("src.orchestrator.create_assistant") as mock_create_assistant, patch(
+    with patch("src.orchestrator.get_assistant") as mock_get_assistant, patch(
         "src.workers.SAAsWorkers.plan_tasks"
     ) as mock_plan_tasks:
 
         mock_main_assistant = MagicMock()
         mock_refiner_assistant = MagicMock()
-        mock_create_assistant.side_effect = [mock_main_assistant, mock_refiner_assistant]
+        mock_get_assistant.side_effect = [mock_main_assistant, mock_refiner_assistant]
 
         mock_plan_tasks.return_value = MagicMock(
             objective_completion=True, explanation="Test result"
@@ -89,13 +89,13 @@ async def test_orchestrator_with_custom_prompt():
     custom_prompt = "Custom prompt: {objective}"
     orchestrator = Orchestrator(settings=OrchestratorSettings(custom_prompt_template=custom_prompt))
 
-    with patch("src.orchestrator.create_assistant") as mock_create_assistant, patch(
+    with patch("src.orchestrator.get_assistant") as mock_get_assistant, patch(
         "src.workers.SAAsWorkers.plan_tasks"
     ) as mock_plan_tasks:
 
         mock_main_assistant = MagicMock()
         mock_refiner_assistant = MagicMock()
-        mock_create_assistant.side_effect = [mock_main_assistant, mock_refiner_assistant]
+        mock_get_assistant.side_effect = [mock_main_assistant, mock_refiner_assistant]
 
         mock_plan_tasks.return_value = MagicMock(
             objective_completion=True, explanation="Test result"
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from phi.assistant import Assistant
+from phi.llm.base import LLM
+
+from src.assistants import get_full_response, get_full_response_async
+from src.config import settings
+from src.llm import RateLimitedMixin
+from src.rate_limit import ProviderLimiter, TokenBucket, get_rate_limiter, provider_for
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_waits_for_refill():
+    clock = FakeClock()
+    with patch("src.rate_limit.time.monotonic", clock):
+        bucket = TokenBucket(60)
+        assert bucket.reserve(60) == 0
+        # One unit per second; later callers queue behind earlier reservations
+        assert bucket.reserve(1) == pytest.approx(1.0)
+        assert bucket.reserve(2) == pytest.approx(3.0)
+
+        clock.now += 3
+        assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_token_bucket_caps_oversized_requests():
+    clock = FakeClock()
+    with patch("src.rate_limit.time.monotonic", clock):
+        bucket = TokenBucket(600)
+        bucket.reserve(600)
+        assert bucket.reserve(10_000) == pytest.approx(60.0)
+
+
+def test_rate_limiters_are_shared_per_provider_and_key():
+    assert provider_for("claude-3-haiku-20240307") == "anthropic"
+    assert provider_for("gpt-4o") == "openai"
+    assert provider_for("gemini-1.5-pro-001") == "vertexai"
+    assert provider_for(MagicMock()) is None
+
+    with patch.object(settings, "PROVIDER_RATE_LIMITS", {"anthropic": {"rpm": 100, "tpm": 1000}}):
+        limiter = get_rate_limiter("claude-3-haiku-20240307")
+        assert get_rate_limiter("claude-3-5-sonnet-20240620") is limiter
+        assert limiter.requests.capacity == pytest.approx(100 * settings.RATE_LIMIT_HEADROOM)
+        assert get_rate_limiter("gpt-4o") is not limiter
+
+        with patch.object(settings, "ANTHROPIC_API_KEY", "another-key"):
+            assert get_rate_limiter("claude-3-haiku-20240307") is not limiter
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_limits_calls_in_flight():
+    limiter = ProviderLimiter("test", concurrency=2)
+    in_flight = peak = 0
+
+    async def call():
+        nonlocal in_flight, peak
+        async with limiter.slot():
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    await asyncio.gather(*(call() for _ in range(6)))
+
+    assert peak == 2
+
+
+def test_bulkhead_is_shared_by_threads_and_event_loops():
+    limiter = ProviderLimiter("test", concurrency=2)
+    lock = threading.Lock()
+    in_flight = peak = 0
+
+    def track(change: int):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += change
+            peak = max(peak, in_flight)
+
+    def sync_call():
+        with limiter.slot_sync():
+            track(1)
+            time.sleep(0.02)
+            track(-1)
+
+    async def async_call():
+        async with limiter.slot():
+            track(1)
+            await asyncio.sleep(0.02)
+            track(-1)
+
+    async def async_calls():
+        await asyncio.gather(*(async_call() for _ in range(3)))
+
+    threads = [threading.Thread(target=sync_call) for _ in range(3)]
+    threads += [threading.Thread(target=asyncio.run, args=(async_calls(),)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == 2
+    assert limiter.bulkhead.in_flight == 0
+
+
+class ToolCallingLLM(LLM):
+    """Sends a follow-up request after a tool call, like phidata's LLMs do inside ``response``."""
+
+    def invoke(self, messages):
+        return "reply"
+
+    async def ainvoke(self, messages):
+        return "reply"
+
+    def response(self, messages):
+        self.invoke(messages)
+        return self.invoke(messages)
+
+    async def aresponse(self, messages):
+        await self.ainvoke(messages)
+        return await self.ainvoke(messages)
+
+
+class LimitedLLM(RateLimitedMixin, ToolCallingLLM):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_get_full_response_async_waits_for_rate_limit(mocker):
+    sleep = mocker.patch("src.rate_limit.asyncio.sleep")
+    assistant = Assistant(name="Limited", llm=LimitedLLM(model="gpt-4o"))
+
+    with patch.object(settings, "PROVIDER_RATE_LIMITS", {"openai": {"rpm": 2}}), patch.object(
+        settings, "RATE_LIMIT_HEADROOM", 1.0
+    ):
+        assert await get_full_response_async(assistant, "hello") == "reply"
+        sleep.assert_not_called()
+        assert await get_full_response_async(assistant, "hello again") == "reply"
+
+    # The second call's two requests wait for the refill of the first call's two
+    assert sleep.call_count == 2
+    assert sleep.call_args.args[0] == pytest.approx(60, abs=1)
+
+
+def test_tool_call_follow_ups_are_charged_to_the_limiter():
+    assistant = Assistant(name="Limited", llm=LimitedLLM(model="gpt-4o"))
+
+    with patch.object(settings, "PROVIDER_RATE_LIMITS", {"openai": {"rpm": 100}}):
+        assert get_full_response(assistant, "hello") == "reply"
+        limiter = get_rate_limiter("gpt-4o")
+
+    assert limiter.requests.level == pytest.approx(limiter.requests.capacity - 2, abs=0.1)
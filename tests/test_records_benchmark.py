@@ -0,0 +1,53 @@
+import json
+import timeit
+
+import pytest
+
+from src import serialization
+from src.orchestrator import RunRecords, State, Task, TaskExchange
+from src.serialization import dumps
+
+TASKS = 500
+RESULT = "result " * 300
+REPEAT = 5
+
+
+def best_of(function, number: int = 5) -> float:
+    return min(timeit.repeat(function, number=number, repeat=REPEAT))
+
+
+def record_validated():
+    state = State()
+    for index in range(TASKS):
+        state.tasks.append(Task(task=f"Task {index}", prompt="Do it", result=RESULT))
+        state.task_exchanges.append(TaskExchange(role="sub_assistant", content=RESULT))
+    return state.to_dict()
+
+
+def record_compact():
+    records = RunRecords()
+    for index in range(TASKS):
+        records.add_task(f"Task {index}", "Do it", RESULT)
+    return records.to_dict()
+
+
+def test_compact_records_match_validated_state():
+    assert record_compact() == record_validated()
+
+
+@pytest.mark.benchmark
+def test_compact_records_are_faster_than_validated_state():
+    validated, compact = best_of(record_validated), best_of(record_compact)
+    assert compact < validated, f"validated {validated:.4f}s, compact {compact:.4f}s"
+
+
+@pytest.mark.benchmark
+def test_serializer_is_not_slower_than_json():
+    records = [
+        {"type": "exchange", "role": "sub_assistant", "content": RESULT, "time": 0.0}
+    ] * TASKS
+    standard = best_of(lambda: [json.dumps(record) for record in records])
+    fast = best_of(lambda: [dumps(record) for record in records])
+    # Without orjson the serializer is json itself, plus encoding to bytes
+    backend = "json" if serialization.orjson is None else "orjson"
+    assert fast < standard * 1.5, f"json {standard:.4f}s, serializer ({backend}) {fast:.4f}s"
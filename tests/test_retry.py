@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.assistants import get_full_response_async
+from src.config import settings
+from src.retry import RetryPolicy, is_retryable, retry_after, retry_async, retry_policy, retry_sync
+from src.utils.exceptions import AssistantError
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = MagicMock(status_code=status_code, headers=headers or {})
+
+
+class RateLimitError(Exception):
+    pass
+
+
+@pytest.mark.parametrize(
+    "error, retryable",
+    [
+        (StatusError(429), True),
+        (StatusError(503), True),
+        (StatusError(400), False),
+        (StatusError(401), False),
+        (TimeoutError(), True),
+        (ConnectionResetError(), True),
+        (RateLimitError("slow down"), True),
+        (ValueError("bad prompt"), False),
+        (Exception("unknown"), True),
+    ],
+)
+def test_is_retryable(error, retryable):
+    assert is_retryable(error) is retryable
+
+
+def test_is_retryable_follows_cause():
+    try:
+        try:
+            raise StatusError(400)
+        except StatusError as cause:
+            raise RuntimeError("wrapped") from cause
+    except RuntimeError as error:
+        assert not is_retryable(error)
+
+
+def test_retry_after_headers():
+    assert retry_after(StatusError(429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after(StatusError(429, {"retry-after": "7"})) == 7.0
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    seconds = retry_after(StatusError(429, {"retry-after": format_datetime(retry_at)}))
+    assert 25 < seconds <= 30
+    assert retry_after(StatusError(429)) is None
+    assert retry_after(Exception()) is None
+
+
+def test_backoff_uses_full_jitter():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    with patch("src.retry.random.uniform", side_effect=lambda low, high: (low, high)):
+        assert policy.backoff(0) == (0, 1.0)
+        assert policy.backoff(2) == (0, 4.0)
+        assert policy.backoff(5) == (0, 5.0)
+
+
+def test_retry_after_takes_precedence_over_backoff():
+    policy = RetryPolicy(max_delay=10.0)
+    assert policy.delay_for(StatusError(429, {"retry-after": "3"}), 0) == 3.0
+    assert policy.delay_for(StatusError(429, {"retry-after": "60"}), 0) == 10.0
+
+
+def test_retry_policy_overrides():
+    overrides = {
+        "refiner": {"total_budget": 120},
+        "gemini": {"max_attempts": 5},
+        "gemini-1.5": {"max_attempts": 6},
+    }
+    with patch.object(settings, "RETRY_POLICY_OVERRIDES", overrides):
+        assert retry_policy("refiner", "gemini-1.5-pro").total_budget == 120
+        assert retry_policy("refiner", "gemini-1.5-pro").max_attempts == 6
+        assert retry_policy("worker", "gemini-pro").max_attempts == 5
+        assert retry_policy("worker", "claude-3-haiku").max_attempts == settings.RETRY_MAX_ATTEMPTS
+
+
+@pytest.mark.asyncio
+async def test_retry_async_waits_for_retry_after():
+    call = AsyncMock(side_effect=[StatusError(429, {"retry-after": "2"}), "ok"])
+    with patch("src.retry.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        assert await retry_async(call, RetryPolicy()) == "ok"
+
+    mock_sleep.assert_awaited_once_with(2.0)
+
+
+@pytest.mark.asyncio
+async def test_retry_async_does_not_retry_client_errors():
+    call = AsyncMock(side_effect=StatusError(400))
+    with pytest.raises(StatusError):
+        await retry_async(call, RetryPolicy(max_attempts=5, base_delay=0))
+
+    assert call.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_async_stops_at_total_budget():
+    call = AsyncMock(side_effect=StatusError(503, {"retry-after": "5"}))
+    clock = [0.0]
+
+    async def fake_sleep(delay):
+        clock[0] += delay
+
+    with patch("src.retry.asyncio.sleep", side_effect=fake_sleep) as mock_sleep, patch(
+        "src.retry.time.monotonic", side_effect=lambda: clock[0]
+    ):
+        with pytest.raises(StatusError):
+            await retry_async(call, RetryPolicy(max_attempts=10, total_budget=12))
+
+    assert mock_sleep.await_count == 2
+    assert call.await_count == 3
+
+
+def test_retry_sync_gives_up_after_max_attempts():
+    call = MagicMock(side_effect=TimeoutError("slow"))
+    with patch("src.retry.time.sleep") as mock_sleep:
+        with pytest.raises(TimeoutError):
+            retry_sync(call, RetryPolicy(max_attempts=3))
+
+    assert call.call_count == 3
+    assert mock_sleep.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_full_response_async_fails_fast_on_bad_request():
+    assistant = MagicMock()
+    assistant.run.side_effect = StatusError(400)
+
+    with pytest.raises(AssistantError, match="^Could not get a response"):
+        await get_full_response_async(assistant, "hello")
+
+    assistant.run.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_full_response_async_uses_stage_policy():
+    assistant = MagicMock()
+    assistant.llm.model = "claude-3-haiku-20240307"
+    assistant.run.side_effect = [TimeoutError(), TimeoutError(), TimeoutError(), "done"]
+    overrides = {"worker": {"max_attempts": 4, "base_delay": 0}}
+
+    with patch.object(settings, "RETRY_POLICY_OVERRIDES", overrides):
+        assert await get_full_response_async(assistant, "hello", stage="worker") == "done"
+
+    assert assistant.run.call_count == 4
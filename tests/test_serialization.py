@@ -0,0 +1,33 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src import serialization
+from src.serialization import dumps, dumps_lines, loads
+
+RECORD = {"type": "exchange", "role": "user", "content": "Résumé ✓", "time": 1.5, "tags": None}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_round_trip_with_and_without_orjson(use_orjson):
+    backend = serialization.orjson if use_orjson else None
+    if use_orjson and backend is None:
+        pytest.skip("orjson is not installed")
+    with patch.object(serialization, "orjson", backend):
+        encoded = dumps(RECORD)
+        assert isinstance(encoded, bytes)
+        assert b"\n" not in encoded
+        assert loads(encoded) == RECORD
+        assert loads(encoded.decode("utf-8")) == RECORD
+
+
+def test_dumps_lines_writes_one_record_per_line():
+    lines = dumps_lines([RECORD, {"type": "final", "content": "Done"}]).splitlines()
+
+    assert [loads(line)["type"] for line in lines] == ["exchange", "final"]
+
+
+def test_loads_raises_json_decode_error():
+    with pytest.raises(json.JSONDecodeError):
+        loads(b'{"type": "exch')
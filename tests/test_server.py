@@ -0,0 +1,143 @@
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.metrics import WORKER_TASKS  # noqa: E402
+from src.orchestrator import Orchestrator, WorkflowEvent  # noqa: E402
+from src.plugin_manager import PluginManager  # noqa: E402
+from src.server import create_app  # noqa: E402
+from src.utils.exceptions import WorkflowError  # noqa: E402
+from src.workers import PlanResponse, WorkerTask  # noqa: E402
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def fake_run_emitting(*events):
+    async def fake_run(objective, use_case=None, on_event=None, run_id=None, stream_tokens=True):
+        for event in events:
+            if event.type != "token" or stream_tokens:
+                on_event(event)
+        return events[-1].content
+
+    return fake_run
+
+
+@pytest.fixture
+def orchestrator(tmp_path):
+    orchestrator = Orchestrator(output_dir=str(tmp_path), plugins=PluginManager(manifest_file=None))
+    orchestrator.use_case_prompts = {"TestPlugin": lambda objective: f"Plugin: {objective}"}
+    return orchestrator
+
+
+@pytest.fixture
+def client(orchestrator):
+    return TestClient(create_app(orchestrator))
+
+
+def test_health_and_plugins(client):
+    assert client.get("/health").json() == {"status": "ok"}
+    assert client.get("/plugins").json() == {"plugins": ["TestPlugin"]}
+
+
+def test_metrics_endpoint(client):
+    WORKER_TASKS.inc(plugin="TestPlugin", outcome="success")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'saa_worker_tasks_total{plugin="TestPlugin",outcome="success"} 1' in response.text
+
+
+def test_workflow_streams_events(client, mocker):
+    run_workflow = mocker.patch.object(
+        Orchestrator,
+        "run_workflow",
+        side_effect=fake_run_emitting(
+            WorkflowEvent(type="plan", source="planner", data={"tasks": ["Subtask 1"]}),
+            WorkflowEvent(type="token", source="task-0", content="partial"),
+            WorkflowEvent(type="task_completed", source="task-0", content="Result 1"),
+            WorkflowEvent(type="final", content="Final output"),
+        ),
+    )
+
+    response = client.post("/workflows", json={"objective": "Test", "plugin": "TestPlugin"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert [event for event, _ in events] == ["plan", "task_completed", "final"]
+    assert events[-1][1]["content"] == "Final output"
+    assert run_workflow.call_args.args[:2] == ("Test", "TestPlugin")
+    assert run_workflow.call_args.kwargs["stream_tokens"] is False
+
+
+def test_workflow_streams_tokens_on_request(client, mocker):
+    mocker.patch.object(
+        Orchestrator,
+        "run_workflow",
+        side_effect=fake_run_emitting(
+            WorkflowEvent(type="token", source="refiner", content="Fin"),
+            WorkflowEvent(type="final", content="Final"),
+        ),
+    )
+
+    response = client.post("/workflows", json={"objective": "Test", "stream_tokens": True})
+
+    assert [event for event, _ in parse_sse(response.text)] == ["token", "final"]
+
+
+def test_requests_share_warm_workers_but_not_state(client, orchestrator):
+    workers = orchestrator.workers
+    workers.plan_tasks = AsyncMock(
+        return_value=PlanResponse(
+            objective_completion=False,
+            explanation="Plan",
+            tasks=[WorkerTask(task="Subtask 1", prompt="Do it")],
+        )
+    )
+    workers.process_tasks = AsyncMock(
+        return_value=[WorkerTask(task="Subtask 1", prompt="Do it", result="Done")]
+    )
+    workers.summarize_results = AsyncMock(return_value="Summary")
+
+    with patch("src.orchestrator.get_assistant"):
+        for _ in range(2):
+            response = client.post("/workflows", json={"objective": "Test"})
+            assert parse_sse(response.text)[-1][1]["content"] == "Summary"
+
+    assert workers.plan_tasks.await_count == 2
+    assert orchestrator.workers is workers
+    assert orchestrator.state.task_exchanges == []
+
+
+def test_workflow_errors_are_streamed(client, mocker):
+    mocker.patch.object(Orchestrator, "run_workflow", side_effect=WorkflowError("planner failed"))
+
+    response = client.post("/workflows", json={"objective": "Test"})
+
+    assert parse_sse(response.text) == [("error", {"message": "planner failed"})]
+
+
+def test_unknown_plugin_is_rejected(client):
+    response = client.post("/workflows", json={"objective": "Test", "plugin": "Missing"})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("run_id", ["../../x", "/etc/x", ".."])
+def test_unsafe_run_id_is_rejected(client, run_id):
+    response = client.post("/workflows", json={"objective": "Test", "run_id": run_id})
+
+    assert response.status_code == 422
@@ -0,0 +1,75 @@
+from unittest.mock import MagicMock, patch
+
+from src.config import settings
+from src.token_budget import (
+    apply_output_cap,
+    estimate_tokens,
+    fit_prompt,
+    model_family,
+    output_cap,
+    task_output_cap,
+)
+
+
+def test_model_family():
+    assert model_family("claude-3-5-sonnet-20240620") == "claude"
+    assert model_family("gemini-1.5-pro-001") == "gemini"
+    assert model_family("gpt-4o") == "gpt"
+    assert model_family(MagicMock()) == "default"
+
+
+def test_estimate_tokens_by_family():
+    text = "x" * 700
+    assert estimate_tokens(text, "claude-3-haiku-20240307") == 200
+    assert estimate_tokens(text, "gpt-4o") == 175
+    assert estimate_tokens("") == 0
+
+
+def test_fit_prompt_keeps_prompts_within_limit():
+    assert fit_prompt("short prompt", "worker", "gpt-4o") == "short prompt"
+    assert fit_prompt("x" * 10_000, None) == "x" * 10_000
+
+
+def test_fit_prompt_trims_head_and_tail():
+    prompt = "HEAD" + "x" * 10_000 + "TAIL"
+    with patch.dict(settings.STAGE_INPUT_TOKEN_LIMITS, {"worker": 500}):
+        trimmed = fit_prompt(prompt, "worker", "gpt-4o")
+
+    assert estimate_tokens(trimmed, "gpt-4o") <= 500
+    assert trimmed.startswith("HEAD")
+    assert trimmed.endswith("TAIL")
+    assert "trimmed to fit the token budget" in trimmed
+
+
+def test_task_output_cap_splits_remaining_budget():
+    # (10_000 - 1_000 - 1_000) // (2 * 3 + 1)
+    assert task_output_cap(3, 1_000, 1_000, budget=10_000) == 1_142
+    assert task_output_cap(3, 1_000, 1_000, budget=None) is None
+    assert task_output_cap(0, 0, 0, budget=10_000) is None
+
+
+def test_task_output_cap_is_clamped():
+    assert task_output_cap(3, 9_000, 900, budget=10_000) == settings.MIN_TASK_OUTPUT_TOKENS
+    assert task_output_cap(1, 0, 0, budget=1_000_000) == settings.MAX_TASK_OUTPUT_TOKENS
+
+
+def test_apply_output_cap_sets_max_tokens():
+    assistant = MagicMock()
+    assistant.llm.model = "claude-3-haiku-20240307"
+
+    apply_output_cap(assistant, 512)
+
+    assert assistant.llm.max_tokens == 512
+    assert output_cap(assistant) == 512
+
+
+def test_apply_output_cap_rebuilds_gemini_generation_config():
+    assistant = MagicMock()
+    assistant.llm.model = "gemini-1.5-flash-001"
+    assistant.llm.generation_config = {"temperature": 0.2}
+
+    apply_output_cap(assistant, 512)
+
+    assert assistant.llm.generation_config == {"temperature": 0.2, "max_output_tokens": 512}
+    assert assistant.llm.generative_model is None
+    assert output_cap(assistant) == 512
@@ -1,10 +1,16 @@
+import asyncio
 import json
+from typing import Optional
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from phi.assistant import Assistant
+from phi.llm.base import LLM
 
+from src.config import settings
+from src.deadline import deadline_scope
 from src.utils.exceptions import WorkerError
-from src.workers import PlanResponse, SAAsWorkers, WorkerTask
+from src.workers import PlanResponse, SAAsWorkers, WorkerTask, summary_limits
 
 
 @pytest.fixture
@@ -17,6 +23,20 @@ def workers():
     return SAAsWorkers(num_workers=3)
 
 
+def test_workers_are_created_lazily_with_configured_model():
+    with patch("src.workers.get_assistant") as mock_get_assistant:
+        workers = SAAsWorkers(num_workers=2, model="gpt-4o")
+        mock_get_assistant.assert_not_called()
+
+        assert len(workers.workers) == 2
+        assert workers.workers is workers.workers
+
+    assert [call.args for call in mock_get_assistant.call_args_list] == [
+        ("Worker0", "gpt-4o"),
+        ("Worker1", "gpt-4o"),
+    ]
+
+
 @pytest.mark.asyncio
 async def test_plan_tasks_single_task(workers, mock_assistant):
     expected_response = PlanResponse(
@@ -26,13 +46,13 @@ async def test_plan_tasks_single_task(workers, mock_assistant):
     )
     json_response = json.dumps(expected_response.model_dump())
 
-    def check_plan(assistant, prompt):
+    def check_plan(assistant, prompt, **kwargs):
         assert "Simple objective" in prompt
         return json_response
 
     with patch("src.workers.Assistant") as MockAssistant:
         MockAssistant.return_value = AsyncMock()
-        with patch("src.workers.get_full_response", side_effect=check_plan):
+        with patch("src.workers.get_full_response_async", side_effect=check_plan):
             result = await workers.plan_tasks("Simple objective", mock_assistant)
 
     assert isinstance(result, PlanResponse)
@@ -59,13 +79,13 @@ async def test_plan_tasks_multiple_tasks(workers, mock_assistant):
     )
     json_response = json.dumps(expected_response.model_dump())
 
-    def check_plan(assistant, prompt):
+    def check_plan(assistant, prompt, **kwargs):
         assert "Complex objective" in prompt
         return json_response
 
     with patch("src.workers.Assistant") as MockAssistant:
         MockAssistant.return_value = AsyncMock()
-        with patch("src.workers.get_full_response", side_effect=check_plan):
+        with patch("src.workers.get_full_response_async", side_effect=check_plan):
             result = await workers.plan_tasks("Complex objective", mock_assistant)
 
     assert isinstance(result, PlanResponse)
@@ -99,12 +119,12 @@ async def test_execute_task(workers):
     worker = AsyncMock()
     task = WorkerTask(task="Test task", prompt="Test prompt")
 
-    def check_execute(assistant, prompt):
+    def check_execute(assistant, prompt, **kwargs):
         assert assistant == worker
         assert prompt == "Test prompt"
         return "Task result"
 
-    with patch("src.workers.get_full_response", side_effect=check_execute):
+    with patch("src.workers.get_full_response_async", side_effect=check_execute):
         result = await workers.execute_task(worker, task)
     assert result == "Task result"
 
@@ -118,14 +138,16 @@ async def test_summarize_results(workers, mock_assistant):
     ]
     expected_summary = "Summary of results"
 
-    def check_prompt(assistant, prompt):
+    def check_prompt(assistant, prompt, **kwargs):
         assert assistant == mock_assistant
         assert objective in prompt
         assert all(task.task in prompt for task in tasks)
         assert all(task.result in prompt for task in tasks)
         return expected_summary
 
-    with patch("src.workers.get_full_response", side_effect=check_prompt) as mock_get_full_response:
+    with patch(
+        "src.workers.get_full_response_async", side_effect=check_prompt
+    ) as mock_get_full_response:
         result = await workers.summarize_results(objective, tasks, mock_assistant)
 
     assert result == expected_summary
@@ -135,7 +157,7 @@ async def test_summarize_results(workers, mock_assistant):
 @pytest.mark.asyncio
 async def test_plan_tasks_error_handling(workers, mock_assistant):
     with patch("src.workers.Assistant"):
-        with patch("src.workers.get_full_response", return_value="Invalid JSON"):
+        with patch("src.workers.get_full_response_async", return_value="Invalid JSON"):
             with pytest.raises(WorkerError):
                 await workers.plan_tasks("Test objective", mock_assistant)
 
@@ -148,6 +170,7 @@ async def test_process_tasks_error_handling(workers):
     results = await workers.process_tasks(tasks)
     assert len(results) == 1
     assert results[0].result.startswith("Error:")
+    assert results[0].failed
 
 
 @pytest.mark.asyncio
@@ -155,6 +178,386 @@ async def test_execute_task_error_handling(workers):
     worker = AsyncMock()
     task = WorkerTask(task="Test task", prompt="Test prompt")
 
-    with patch("src.workers.get_full_response", side_effect=Exception("Execution error")):
+    with patch("src.workers.get_full_response_async", side_effect=Exception("Execution error")):
         with pytest.raises(WorkerError):
             await workers.execute_task(worker, task)
+
+
+@pytest.mark.asyncio
+async def test_process_tasks_runs_more_tasks_than_workers(workers):
+    tasks = [WorkerTask(task=f"Task {i}", prompt=f"Do task {i}") for i in range(10)]
+
+    async def fake_execute(worker, task):
+        return f"Result for {task.prompt}"
+
+    workers.execute_task = AsyncMock(side_effect=fake_execute)
+    results = await workers.process_tasks(tasks)
+
+    assert len(results) == 10
+    assert [task.result for task in results] == [f"Result for Do task {i}" for i in range(10)]
+    assert workers.execute_task.await_count == 10
+
+
+@pytest.mark.asyncio
+async def test_process_tasks_respects_concurrency_limits():
+    workers = SAAsWorkers(num_workers=2, worker_concurrency=3, max_concurrent_tasks=4)
+    tasks = [WorkerTask(task=f"Task {i}", prompt=f"Do task {i}") for i in range(12)]
+    in_flight = 0
+    peak = 0
+    per_worker = {}
+    per_worker_peak = {}
+
+    async def fake_execute(worker, task):
+        nonlocal in_flight, peak
+        in_flight += 1
+        per_worker[id(worker)] = per_worker.get(id(worker), 0) + 1
+        peak = max(peak, in_flight)
+        per_worker_peak[id(worker)] = max(
+            per_worker_peak.get(id(worker), 0), per_worker[id(worker)]
+        )
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        per_worker[id(worker)] -= 1
+        return "done"
+
+    workers.execute_task = fake_execute
+    results = await workers.process_tasks(tasks)
+
+    assert all(task.result == "done" for task in results)
+    assert peak == 4
+    assert max(per_worker_peak.values()) <= 3
+
+
+@pytest.mark.asyncio
+async def test_execute_task_streams_tokens(workers):
+    task = WorkerTask(task="Test task", prompt="Test prompt")
+    tokens = []
+
+    async def fake_stream(assistant, prompt, **kwargs):
+        for chunk in ["Task ", "result"]:
+            yield chunk
+
+    with patch("src.workers.stream_full_response", side_effect=fake_stream):
+        result = await workers.execute_task(AsyncMock(), task, on_token=tokens.append)
+
+    assert result == "Task result"
+    assert tokens == ["Task ", "result"]
+
+
+@pytest.mark.asyncio
+async def test_process_tasks_reports_tokens_and_completions(workers):
+    tasks = [WorkerTask(task=f"Task {i}", prompt=f"Do task {i}") for i in range(2)]
+    tokens = []
+    completed = []
+
+    async def fake_execute(worker, task, on_token=None):
+        on_token(f"chunk for {task.task}")
+        return f"Result for {task.task}"
+
+    workers.execute_task = fake_execute
+    await workers.process_tasks(
+        tasks,
+        on_token=lambda index, chunk: tokens.append((index, chunk)),
+        on_complete=lambda index, task: completed.append((index, task.result)),
+    )
+
+    assert sorted(tokens) == [(0, "chunk for Task 0"), (1, "chunk for Task 1")]
+    assert sorted(completed) == [(0, "Result for Task 0"), (1, "Result for Task 1")]
+
+
+@pytest.mark.asyncio
+async def test_summarize_results_streams_tokens(workers, mock_assistant):
+    tasks = [WorkerTask(task="Task 1", prompt="Prompt 1", result="Result 1")]
+    tokens = []
+
+    async def fake_stream(assistant, prompt, **kwargs):
+        assert "Result 1" in prompt
+        for chunk in ["Final ", "summary"]:
+            yield chunk
+
+    with patch("src.workers.stream_full_response", side_effect=fake_stream):
+        result = await workers.summarize_results(
+            "Objective", tasks, mock_assistant, on_token=tokens.append
+        )
+
+    assert result == "Final summary"
+    assert tokens == ["Final ", "summary"]
+
+
+@pytest.mark.asyncio
+async def test_summarize_progressively_folds_then_merges_last_delta(mock_assistant):
+    completed = asyncio.Queue()
+    prompts = []
+    first = WorkerTask(task="Task 1", prompt="Prompt 1", result="Result 1")
+    rest = [
+        WorkerTask(task="Task 2", prompt="Prompt 2", result="Result 2"),
+        WorkerTask(task="Task 3", prompt="Prompt 3", result="Result 3"),
+    ]
+
+    async def fake_refine(assistant, prompt, **kwargs):
+        prompts.append(prompt)
+        if len(prompts) == 1:
+            # Remaining results land while the refiner is busy folding the first one
+            for task in rest:
+                completed.put_nowait(task)
+            return "Partial summary"
+        return "Final output"
+
+    completed.put_nowait(first)
+    with patch("src.workers.get_full_response_async", side_effect=fake_refine):
+        result = await SAAsWorkers.summarize_progressively(
+            "Objective", completed, 3, mock_assistant
+        )
+
+    assert result == "Final output"
+    assert len(prompts) == 2
+    assert "Result 1" in prompts[0] and "Result 2" not in prompts[0]
+    assert "Partial summary" in prompts[1]
+    assert "Result 1" not in prompts[1]
+    assert "Result 2" in prompts[1] and "Result 3" in prompts[1]
+
+
+@pytest.mark.asyncio
+async def test_summarize_progressively_single_batch_uses_plain_summary(mock_assistant):
+    completed = asyncio.Queue()
+    for i in range(2):
+        completed.put_nowait(WorkerTask(task=f"Task {i}", prompt="Prompt", result=f"Result {i}"))
+
+    with patch("src.workers.get_full_response_async", return_value="Summary") as mock_refine:
+        result = await SAAsWorkers.summarize_progressively(
+            "Objective", completed, 2, mock_assistant
+        )
+
+    assert result == "Summary"
+    mock_refine.assert_awaited_once()
+    assert "Please summarize these results" in mock_refine.call_args[0][1]
+
+
+def test_summary_limits_model_overrides():
+    overrides = {"gemini": {"fan_in": 4}, "gemini-1.5": {"chunk_tokens": 1000}}
+    with patch.object(settings, "SUMMARY_MODEL_LIMITS", overrides):
+        limits = summary_limits("gemini-1.5-pro-preview-0409")
+        default = summary_limits("claude-3-haiku-20240307")
+
+    assert limits.chunk_tokens == 1000
+    assert limits.fan_in == settings.SUMMARY_FAN_IN
+    assert default.chunk_tokens == settings.SUMMARY_CHUNK_TOKENS
+
+
+@pytest.mark.asyncio
+async def test_summarize_results_tree_reduces_large_result_sets(mock_assistant):
+    tasks = [WorkerTask(task=f"Task {i}", prompt="Prompt", result="x" * 60) for i in range(8)]
+    prompts = []
+
+    async def fake_refine(assistant, prompt, **kwargs):
+        prompts.append(prompt)
+        return f"summary {len(prompts)}"
+
+    with patch.object(settings, "SUMMARY_CHUNK_TOKENS", 60), patch.object(
+        settings, "SUMMARY_FAN_IN", 2
+    ), patch.object(settings, "SUMMARY_MAX_DEPTH", 5), patch(
+        "src.workers.get_full_response_async", side_effect=fake_refine
+    ):
+        result = await SAAsWorkers.summarize_results("Objective", tasks, mock_assistant)
+
+    leaf_prompts = [p for p in prompts if "Task results (part" in p]
+    merge_prompts = [p for p in prompts if "Merge these partial summaries" in p]
+    final_prompts = [p for p in prompts if "Please combine these partial summaries" in p]
+    # 8 results of ~23 tokens in 60-token chunks -> 4 leaves -> 2 merges -> 1 final
+    assert len(leaf_prompts) == 4
+    assert len(merge_prompts) == 2
+    assert len(final_prompts) == 1
+    assert result == f"summary {len(prompts)}"
+
+
+@pytest.mark.asyncio
+async def test_summarize_results_forces_final_merge_at_max_depth(mock_assistant):
+    tasks = [WorkerTask(task=f"Task {i}", prompt="Prompt", result="x" * 60) for i in range(8)]
+
+    with patch.object(settings, "SUMMARY_CHUNK_TOKENS", 60), patch.object(
+        settings, "SUMMARY_FAN_IN", 2
+    ), patch.object(settings, "SUMMARY_MAX_DEPTH", 1), patch(
+        "src.workers.get_full_response_async", return_value="summary"
+    ) as mock_refine:
+        await SAAsWorkers.summarize_results("Objective", tasks, mock_assistant)
+
+    # 4 leaf summaries, then the final merge is forced without an intermediate level
+    assert mock_refine.await_count == 5
+    assert "Please combine" in mock_refine.call_args[0][1]
+
+
+@pytest.mark.asyncio
+async def test_process_tasks_stops_at_the_deadline(workers):
+    tasks = [WorkerTask(task=f"Task {i}", prompt=f"Do task {i}") for i in range(3)]
+    cancelled = []
+
+    async def fake_execute(worker, task):
+        if task.task == "Task 1":
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(task.task)
+                raise
+        return "done"
+
+    workers.execute_task = fake_execute
+    with deadline_scope(0.05):
+        results = await workers.process_tasks(tasks)
+
+    assert [task.result for task in results] == ["done", None, "done"]
+    assert cancelled == ["Task 1"]
+
+
+@pytest.mark.asyncio
+async def test_summarize_progressively_skips_unfinished_tasks(mock_assistant):
+    completed = asyncio.Queue()
+    completed.put_nowait(WorkerTask(task="Task 1", prompt="p", result="Result 1"))
+    completed.put_nowait(None)
+
+    with patch(
+        "src.workers.get_full_response_async", AsyncMock(return_value="Summary")
+    ) as mock_response:
+        summary = await SAAsWorkers.summarize_progressively(
+            "Objective", completed, 2, mock_assistant
+        )
+
+    assert summary == "Summary"
+    prompt = mock_response.await_args.args[1]
+    assert "Result 1" in prompt
+
+
+@pytest.mark.asyncio
+async def test_plan_tasks_repairs_fenced_response(workers, mock_assistant):
+    response = '```json\n{"objective_completion": true, "explanation": "Done",}\n```'
+
+    with patch("src.workers.Assistant"):
+        with patch("src.workers.get_full_response_async", return_value=response):
+            result = await workers.plan_tasks("Objective", mock_assistant)
+
+    assert result.objective_completion is True
+    assert result.explanation == "Done"
+
+
+@pytest.mark.asyncio
+async def test_plan_tasks_dispatches_tasks_while_streaming(workers, mock_assistant):
+    plan = {
+        "objective_completion": False,
+        "explanation": "Two steps",
+        "tasks": [{"task": "One", "prompt": "Do one"}, {"task": "Two", "prompt": "Do two"}],
+    }
+    text = json.dumps(plan)
+    split = text.index("}") + 1
+    events = []
+
+    async def fake_stream(assistant, prompt, **kwargs):
+        for chunk in (text[:split], text[split:]):
+            events.append("chunk")
+            yield chunk
+
+    with patch("src.workers.Assistant"), patch("src.workers.stream_full_response", fake_stream):
+        result = await workers.plan_tasks(
+            "Objective", mock_assistant, on_task=lambda task: events.append(task.task)
+        )
+
+    assert events == ["chunk", "One", "chunk", "Two"]
+    assert [task.task for task in result.tasks] == ["One", "Two"]
+
+
+def test_worker_task_normalizes_dependencies():
+    assert WorkerTask(task="t", prompt="p", depends_on=None).depends_on == []
+    assert WorkerTask(task="t", prompt="p", depends_on="a").depends_on == ["a"]
+    task = WorkerTask(id=2, task="t", prompt="p", depends_on=[1])
+    assert (task.id, task.depends_on) == ("2", ["1"])
+
+
+@pytest.mark.asyncio
+async def test_process_tasks_runs_dependency_graph(workers):
+    tasks = [
+        WorkerTask(id="research", task="Research", prompt="Find facts"),
+        WorkerTask(id="write", task="Write", prompt="Write it up", depends_on=["research"]),
+        WorkerTask(id="images", task="Images", prompt="Pick images"),
+    ]
+    events = []
+    prompts = {}
+
+    async def fake_execute(worker, task):
+        events.append(f"start {task.task}")
+        prompts[task.task] = task.prompt
+        await asyncio.sleep(0.01)
+        events.append(f"end {task.task}")
+        return f"{task.task} result"
+
+    workers.execute_task = fake_execute
+    results = await workers.process_tasks(tasks)
+
+    # Independent tasks start together; the dependent one waits for its upstream task
+    assert events[:2] == ["start Research", "start Images"]
+    assert events.index("start Write") > events.index("end Research")
+    assert "Research result" in prompts["Write"]
+    assert prompts["Research"] == "Find facts"
+    assert results[1].prompt == "Write it up"
+    assert [task.result for task in results] == ["Research result", "Write result", "Images result"]
+
+
+@pytest.mark.asyncio
+async def test_process_tasks_falls_back_to_flat_execution_on_cycles(workers):
+    tasks = [
+        WorkerTask(id="a", task="A", prompt="Do a", depends_on=["b"]),
+        WorkerTask(id="b", task="B", prompt="Do b", depends_on=["a"]),
+        WorkerTask(id="c", task="C", prompt="Do c", depends_on=["missing"]),
+    ]
+
+    async def fake_execute(worker, task):
+        return "done"
+
+    workers.execute_task = fake_execute
+    results = await workers.process_tasks(tasks)
+
+    assert [task.result for task in results] == ["done", "done", "done"]
+
+
+@pytest.mark.asyncio
+async def test_process_tasks_offers_decomposable_tasks_to_decompose(workers):
+    tasks = [
+        WorkerTask(task="Big", prompt="Do big", decomposable=True),
+        WorkerTask(task="Other big", prompt="Do other", decomposable=True),
+        WorkerTask(task="Small", prompt="Do small"),
+    ]
+
+    async def decompose(task):
+        # None runs the task directly
+        return "Sub-workflow result" if task.task == "Big" else None
+
+    async def fake_execute(worker, task):
+        return f"Result of {task.task}"
+
+    workers.execute_task = fake_execute
+    results = await workers.process_tasks(tasks, decompose=decompose)
+
+    assert [task.result for task in results] == [
+        "Sub-workflow result",
+        "Result of Other big",
+        "Result of Small",
+    ]
+
+
+class CappableLLM(LLM):
+    max_tokens: Optional[int] = 1024
+
+
+@pytest.mark.asyncio
+async def test_output_cap_applies_to_this_run_only(workers):
+    pooled = [Assistant(name=f"Worker{i}", llm=CappableLLM(model="fake")) for i in range(3)]
+    workers._workers = pooled
+    caps = []
+
+    async def execute(worker, task, on_token=None):
+        caps.append(worker.llm.max_tokens)
+        return "done"
+
+    workers.execute_task = execute
+    await workers.process_tasks([WorkerTask(task="A", prompt="A")], max_output_tokens=256)
+    await workers.process_tasks([WorkerTask(task="B", prompt="B")])
+
+    assert caps == [256, 1024]
+    assert all(worker.llm.max_tokens == 1024 for worker in pooled)